@@ -0,0 +1,133 @@
+"""複数アカウントの設定モジュール.
+
+Author: github.com/nezumi0627
+
+設定ファイルの例::
+
+    dispatch_workers: 8
+    accounts:
+      - name: main
+        works_id: bot@example.com
+        password_env: MAIN_WORKS_PASSWORD
+        ignore_file: ignored_ids_main.txt
+      - name: sub
+        works_id: sub@example.com
+        password: secret
+        commands: [help, search, status]
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Any
+
+import yaml
+
+from core.constants.commands import ALL_COMMANDS, COMMAND_PREFIX
+
+
+@dataclass(frozen=True)
+class AccountConfig:
+    """1アカウント分の設定."""
+
+    name: str
+    works_id: str
+    password: str
+    ignore_file: str | None = None
+    # 有効なコマンド (Noneの場合は全コマンド)
+    commands: frozenset[str] | None = None
+
+
+@dataclass(frozen=True)
+class AccountsConfig:
+    """複数アカウントモードの設定."""
+
+    accounts: list[AccountConfig]
+    dispatch_workers: int
+
+
+def _normalize_commands(commands: Any, name: str) -> frozenset[str] | None:
+    """コマンド名の一覧を "!help" 形式のセットに変換する.
+
+    Args:
+        commands: 設定ファイルのコマンド一覧
+        name: アカウント名 (エラーメッセージ用)
+
+    Returns:
+        frozenset[str] | None: コマンドのセット (未指定の場合None)
+    """
+    if commands is None:
+        return None
+    if not isinstance(commands, list):
+        raise ValueError(f"accounts[{name}].commands must be a list")
+    normalized = frozenset(
+        c if c.startswith(COMMAND_PREFIX) else f"{COMMAND_PREFIX}{c}"
+        for c in map(str, commands)
+    )
+    unknown = normalized - set(ALL_COMMANDS)
+    if unknown:
+        raise ValueError(
+            f"accounts[{name}] has unknown commands: {sorted(unknown)}"
+        )
+    return normalized
+
+
+def _parse_account(entry: Any, index: int) -> AccountConfig:
+    """アカウント1件分の設定を解析する.
+
+    Args:
+        entry: 設定ファイルのアカウント要素
+        index: 要素の位置
+
+    Returns:
+        AccountConfig: アカウント設定
+    """
+    if not isinstance(entry, dict):
+        raise ValueError(f"accounts[{index}] must be a mapping")
+    name = str(entry.get("name") or f"account{index}")
+    works_id = entry.get("works_id")
+    if not works_id:
+        raise ValueError(f"accounts[{name}].works_id is required")
+
+    password = entry.get("password")
+    if password_env := entry.get("password_env"):
+        password = os.getenv(str(password_env))
+    if not password:
+        raise ValueError(f"accounts[{name}] has no password")
+
+    return AccountConfig(
+        name=name,
+        works_id=str(works_id),
+        password=str(password),
+        ignore_file=entry.get("ignore_file"),
+        commands=_normalize_commands(entry.get("commands"), name),
+    )
+
+
+def load_accounts(path: str, dispatch_workers: int = 8) -> AccountsConfig:
+    """YAMLファイルから複数アカウントの設定を読み込む.
+
+    Args:
+        path: 設定ファイルのパス
+        dispatch_workers: ファイルで指定されない場合の処理スレッド数
+
+    Returns:
+        AccountsConfig: 複数アカウントモードの設定
+    """
+    with open(path, encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    if not isinstance(data, dict):
+        raise ValueError(f"{path} must contain a mapping")
+
+    entries = data.get("accounts") or []
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"{path} has no accounts")
+    accounts = [_parse_account(e, i) for i, e in enumerate(entries)]
+
+    names = [a.name for a in accounts]
+    if len(set(names)) != len(names):
+        raise ValueError(f"{path} has duplicate account names")
+
+    return AccountsConfig(
+        accounts=accounts,
+        dispatch_workers=int(data.get("dispatch_workers", dispatch_workers)),
+    )
@@ -12,3 +12,84 @@ load_dotenv()
 
 WORKS_ID: str = os.getenv("WORKS_ID", "")
 PASSWORD: str = os.getenv("WORKS_PASSWORD", "")
+
+# 永続キャッシュの保存先
+CACHE_DIR: str = os.getenv("CACHE_DIR", ".cache")
+
+# サービスステータス監視 (STATUS_WATCH=0 で無効化)
+STATUS_WATCH: bool = os.getenv("STATUS_WATCH", "1") != "0"
+STATUS_ALERT_CHANNELS: list[int] = [
+    int(c) for c in os.getenv("STATUS_ALERT_CHANNELS", "").split(",") if c
+]
+STATUS_HEALTHY_INTERVAL: float = float(
+    os.getenv("STATUS_HEALTHY_INTERVAL", "300")
+)
+STATUS_INCIDENT_INTERVAL: float = float(
+    os.getenv("STATUS_INCIDENT_INTERVAL", "30")
+)
+
+# ログ設定
+LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+LOG_FILE: str = os.getenv("LOG_FILE", "logs/bot.jsonl")
+LOG_MAX_BYTES: int = int(os.getenv("LOG_MAX_BYTES", str(5 * 1024 * 1024)))
+LOG_BACKUP_COUNT: int = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+# メッセージやレスポンス本文をログに残す最大長
+LOG_MAX_FIELD_LENGTH: int = int(os.getenv("LOG_MAX_FIELD_LENGTH", "1000"))
+# DEBUGログの間引き設定 (例: "core.handlers=0.1,line_works=0.01")
+LOG_SAMPLING: str = os.getenv("LOG_SAMPLING", "")
+
+# 複数アカウントの設定ファイル (YAML, 未設定の場合は単一アカウント)
+ACCOUNTS_FILE: str = os.getenv("ACCOUNTS_FILE", "")
+# 複数アカウントで共有するメッセージ処理スレッド数
+DISPATCH_WORKERS: int = int(os.getenv("DISPATCH_WORKERS", "8"))
+
+# トレーサー切断時の再接続待ち (秒)
+RECONNECT_BASE_DELAY: float = float(os.getenv("RECONNECT_BASE_DELAY", "1"))
+RECONNECT_MAX_DELAY: float = float(os.getenv("RECONNECT_MAX_DELAY", "60"))
+
+# この時間MQTTのパケットが届かない場合に無応答として警告する (秒, 0 で無効)
+LINK_STALL_SECONDS: float = float(os.getenv("LINK_STALL_SECONDS", "45"))
+
+# 再起動の間に届いたメッセージの処理 (CATCH_UP=0 で無効化)
+CATCH_UP: bool = os.getenv("CATCH_UP", "1") != "0"
+CATCH_UP_MAX_MESSAGES: int = int(os.getenv("CATCH_UP_MAX_MESSAGES", "50"))
+CATCH_UP_WORKERS: int = int(os.getenv("CATCH_UP_WORKERS", "4"))
+
+# コマンドの受付制御
+ADMISSION_WORKERS: int = int(os.getenv("ADMISSION_WORKERS", "4"))
+CHANNEL_MAX_INFLIGHT: int = int(os.getenv("CHANNEL_MAX_INFLIGHT", "1"))
+CHANNEL_MAX_QUEUE: int = int(os.getenv("CHANNEL_MAX_QUEUE", "5"))
+# ユーザーごとの平均実行回数 (回/分) と連続で実行できる回数
+ADMISSION_USER_RATE: float = float(os.getenv("ADMISSION_USER_RATE", "10"))
+ADMISSION_USER_BURST: int = int(os.getenv("ADMISSION_USER_BURST", "5"))
+
+# スタンプの返信などをチャンネルごとにまとめる期間 (秒, 0 で即時送信)
+REPLY_DEBOUNCE_SECONDS: float = float(os.getenv("REPLY_DEBOUNCE_SECONDS", "2"))
+# チャンネルごとの返信数の上限 (回/分) と送信スレッド数
+REPLY_CAP_PER_MINUTE: float = float(os.getenv("REPLY_CAP_PER_MINUTE", "6"))
+REPLY_WORKERS: int = int(os.getenv("REPLY_WORKERS", "2"))
+
+# !searchall で同時に検索するチャンネル数、全体の待ち時間 (秒) と
+# 検索するチャンネル数の上限 (更新の新しい順)
+SEARCH_ALL_WORKERS: int = int(os.getenv("SEARCH_ALL_WORKERS", "8"))
+SEARCH_ALL_TIMEOUT: float = float(os.getenv("SEARCH_ALL_TIMEOUT", "20"))
+SEARCH_ALL_MAX_CHANNELS: int = int(os.getenv("SEARCH_ALL_MAX_CHANNELS", "200"))
+
+# 管理者のユーザー番号 (カンマ区切り、!ignore などの管理コマンドを実行できる)
+ADMIN_USER_IDS: frozenset[str] = frozenset(
+    u.strip() for u in os.getenv("ADMIN_USER_IDS", "").split(",") if u.strip()
+)
+
+# トークAPIの向け先 (負荷試験用の代替サーバーなど、未設定の場合は実サービス)
+LINE_WORKS_BASE_URL: str = os.getenv("LINE_WORKS_BASE_URL", "")
+
+# ユーザー情報 (!userinfo) を使い回す期間 (秒)
+USER_INFO_CACHE_TTL: float = float(os.getenv("USER_INFO_CACHE_TTL", "3600"))
+
+# 終了時に保存し、起動時に復元する状態のスナップショット (空の場合は無効)
+SNAPSHOT_FILE: str = os.getenv(
+    "SNAPSHOT_FILE", os.path.join(CACHE_DIR, "state.snapshot")
+)
+
+# 起動直後にプロファイリングする期間 (秒, 0 で無効、SIGUSR1 でも切り替え可能)
+PROFILE_ON_START: float = float(os.getenv("PROFILE_ON_START", "0"))
@@ -0,0 +1,135 @@
+"""検索結果のアクティビティを集計するモジュール.
+
+検索結果の列をNumPy配列に読み込み、ヒストグラムや送信者ごとの件数を
+ベクトル演算でまとめて計算する.
+"""
+
+import datetime
+from dataclasses import dataclass
+from typing import Any, Final
+
+import numpy as np
+
+# ミリ秒のタイムスタンプとみなす閾値 (これより大きい値はミリ秒)
+_MILLISECONDS_THRESHOLD: Final[int] = 100_000_000_000
+
+# 1970-01-01 の曜日 (月曜日=0)
+_EPOCH_WEEKDAY: Final[int] = 3
+
+WEEKDAY_LABELS: Final[tuple[str, ...]] = (
+    "月",
+    "火",
+    "水",
+    "木",
+    "金",
+    "土",
+    "日",
+)
+
+
+@dataclass(frozen=True)
+class ActivityStats:
+    """検索結果のアクティビティ集計."""
+
+    total: int
+    first_time: float
+    last_time: float
+    hourly: np.ndarray
+    weekday: np.ndarray
+    top_senders: list[tuple[str, int]]
+    sender_count: int
+    gap_median: float
+    gap_mean: float
+    gap_max: float
+
+
+def local_utc_offset() -> int:
+    """ローカルタイムゾーンのUTCオフセットを取得する.
+
+    Returns:
+        int: オフセット (秒)
+    """
+    offset = datetime.datetime.now().astimezone().utcoffset()
+    return int(offset.total_seconds()) if offset else 0
+
+
+def compute_activity(
+    messages: list[dict[str, Any]],
+    top_n: int = 5,
+    utc_offset: int | None = None,
+) -> ActivityStats | None:
+    """検索結果のメッセージからアクティビティを集計する.
+
+    Args:
+        messages: messageUnixTime と name を持つメッセージのリスト
+        top_n: 上位何人の送信者を返すか
+        utc_offset: 時刻の集計に使うUTCオフセット (秒, 省略時はローカル)
+
+    Returns:
+        ActivityStats | None: 集計結果 (メッセージが無い場合None)
+    """
+    count = len(messages)
+    if count == 0:
+        return None
+    if utc_offset is None:
+        utc_offset = local_utc_offset()
+
+    # 列をまとめて配列に読み込む
+    times = np.fromiter(
+        (m["messageUnixTime"] for m in messages), dtype=np.int64, count=count
+    )
+    names = np.array([m.get("name", "N/A") for m in messages], dtype=object)
+
+    is_milliseconds = times.max() > _MILLISECONDS_THRESHOLD
+    seconds = times // 1000 if is_milliseconds else times
+    local = seconds + utc_offset
+
+    hourly = np.bincount((local // 3600) % 24, minlength=24)
+    weekday = np.bincount((local // 86400 + _EPOCH_WEEKDAY) % 7, minlength=7)
+
+    unique_names, counts = np.unique(names.astype(str), return_counts=True)
+    order = np.argsort(-counts, kind="stable")[:top_n]
+    top_senders = [(str(unique_names[i]), int(counts[i])) for i in order]
+
+    gaps = np.diff(np.sort(seconds))
+    if gaps.size:
+        gap_median = float(np.median(gaps))
+        gap_mean = float(gaps.mean())
+        gap_max = float(gaps.max())
+    else:
+        gap_median = gap_mean = gap_max = 0.0
+
+    return ActivityStats(
+        total=count,
+        first_time=float(seconds.min()),
+        last_time=float(seconds.max()),
+        hourly=hourly,
+        weekday=weekday,
+        top_senders=top_senders,
+        sender_count=int(unique_names.size),
+        gap_median=gap_median,
+        gap_mean=gap_mean,
+        gap_max=gap_max,
+    )
+
+
+def format_duration(seconds: float) -> str:
+    """秒数を読みやすい文字列に変換する.
+
+    Args:
+        seconds: 秒数
+
+    Returns:
+        str: "1日2時間" のような文字列
+    """
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}秒"
+    minutes, _ = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}分"
+    hours, minutes = divmod(minutes, 60)
+    if hours < 24:
+        return f"{hours}時間{minutes}分"
+    days, hours = divmod(hours, 24)
+    return f"{days}日{hours}時間"
@@ -0,0 +1,463 @@
+"""再起動の間に届いたメッセージを起動時に処理するモジュール.
+
+MQTTは接続中のメッセージしか配信しないため、チャンネルごとに処理済みの
+最大 messageNo (ハイウォーターマーク) を保存しておき、起動時にチャット
+一覧と比較して不足分だけを getChannelInfo で取得する.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Final, Protocol
+
+from line_works.client import LineWorks
+from line_works.mqtt.enums.notification_type import NotificationType
+
+from core.history import DIRECTION_FORWARD
+
+logger = logging.getLogger(__name__)
+
+# テキストメッセージの messageTypeCode
+TEXT_MESSAGE_TYPE: Final[int] = 1
+
+# チャンネルごとに処理する最大件数 (古いメッセージは捨てる)
+DEFAULT_MAX_MESSAGES: Final[int] = 50
+
+# 同時に処理するチャンネル数
+DEFAULT_WORKERS: Final[int] = 4
+
+# ハイウォーターマークを保存する最短間隔 (秒)
+SAVE_INTERVAL: Final[float] = 5.0
+
+
+@dataclass(frozen=True)
+class Mark:
+    """チャンネルのハイウォーターマーク."""
+
+    message_no: int
+    create_time: int = 0
+    update_time: int = 0
+
+
+@dataclass
+class CatchUpPayload:
+    """取得した履歴を MessagePayload と同じ属性で表すペイロード."""
+
+    notification_type: int
+    channel_no: int
+    from_user_no: int | None
+    user_no: int | None
+    message_no: int
+    create_time: int
+    loc_args1: str
+    extras: str = ""
+    catch_up: bool = True
+
+
+class HistoryClient(Protocol):
+    """チャット一覧と履歴を取得するクライアント."""
+
+    def get_all_chats(self, domain_id: int, user_no: int) -> dict[str, Any]:
+        """チャット一覧を取得する."""
+        ...
+
+    def iter_channel_history(
+        self,
+        channel_no: str,
+        start_message_no: int,
+        direction: int = ...,
+        stop_message_no: int | None = ...,
+        limit: int | None = ...,
+    ) -> Iterable[dict[str, Any]]:
+        """チャンネル履歴を走査する."""
+        ...
+
+
+class HighWaterMarks:
+    """チャンネルごとのハイウォーターマークを永続化するクラス."""
+
+    def __init__(self, path: str) -> None:
+        """初期化.
+
+        Args:
+            path: 保存先のJSONファイル
+        """
+        self.path = path
+        self._marks: dict[str, Mark] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = 0.0
+        # 間隔内で見送った保存を後で行うタイマー
+        self._flush_timer: threading.Timer | None = None
+        self.load()
+
+    def load(self) -> None:
+        """ファイルから読み込む (存在しない場合は空)."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            self._marks = {
+                str(channel_no): Mark(**mark)
+                for channel_no, mark in data.items()
+                if isinstance(mark, dict)
+            }
+
+    def get(self, channel_no: Any) -> Mark | None:
+        """チャンネルのハイウォーターマークを取得する.
+
+        Args:
+            channel_no: チャンネル番号
+
+        Returns:
+            Mark | None: ハイウォーターマーク (未記録の場合None)
+        """
+        with self._lock:
+            return self._marks.get(str(channel_no))
+
+    def snapshot(self) -> dict[str, Mark]:
+        """現在のハイウォーターマークの写しを取得する.
+
+        Returns:
+            dict[str, Mark]: チャンネル番号ごとのハイウォーターマーク
+        """
+        with self._lock:
+            return dict(self._marks)
+
+    def update(
+        self,
+        channel_no: Any,
+        message_no: int,
+        create_time: int = 0,
+        update_time: int = 0,
+    ) -> None:
+        """ハイウォーターマークを進める (小さい値では戻さない).
+
+        Args:
+            channel_no: チャンネル番号
+            message_no: 処理したメッセージ番号
+            create_time: メッセージの作成時刻
+            update_time: チャット一覧の更新時刻
+        """
+        key = str(channel_no)
+        with self._lock:
+            current = self._marks.get(key)
+            if current is not None:
+                if message_no < current.message_no:
+                    return
+                create_time = max(create_time, current.create_time)
+                update_time = max(update_time, current.update_time)
+            self._marks[key] = Mark(message_no, create_time, update_time)
+            self._dirty = True
+        self.save(force=False)
+
+    def _flush(self) -> None:
+        """見送った保存を行う (タイマーから呼ぶ)."""
+        with self._lock:
+            self._flush_timer = None
+        self.save()
+
+    def save(self, force: bool = True) -> None:
+        """変更があればファイルに保存する.
+
+        Args:
+            force: Falseの場合、前回の保存から SAVE_INTERVAL 秒は保存せず、
+                間隔が空いた時点で保存する
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            elapsed = time.monotonic() - self._saved_at
+            if not force and elapsed < SAVE_INTERVAL:
+                # 見送った変更はシグナルで終了しても失われないよう、
+                # 間隔が空いた時点で保存する
+                if self._flush_timer is None:
+                    self._flush_timer = threading.Timer(
+                        SAVE_INTERVAL - elapsed, self._flush
+                    )
+                    self._flush_timer.daemon = True
+                    self._flush_timer.start()
+                return
+            data = {
+                channel_no: mark.__dict__
+                for channel_no, mark in self._marks.items()
+            }
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        try:
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("Failed to persist high-water marks: %s", e)
+
+
+def _first_int(message: dict[str, Any], *keys: str) -> int | None:
+    """最初に見つかったキーの値を整数で取得する.
+
+    Args:
+        message: メッセージ
+        *keys: 候補のキー
+
+    Returns:
+        int | None: 値 (見つからない場合None)
+    """
+    for key in keys:
+        value = message.get(key)
+        if value not in (None, ""):
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                continue
+    return None
+
+
+def to_payload(
+    channel_no: Any, message: dict[str, Any]
+) -> CatchUpPayload | None:
+    """getChannelInfo のメッセージをペイロードに変換する.
+
+    Args:
+        channel_no: チャンネル番号
+        message: メッセージ
+
+    Returns:
+        CatchUpPayload | None: テキストメッセージ以外の場合None
+    """
+    message_type = _first_int(message, "messageTypeCode", "messageType")
+    if message_type != TEXT_MESSAGE_TYPE:
+        return None
+    sender = _first_int(message, "userNo", "fromUserNo", "senderNo")
+    return CatchUpPayload(
+        notification_type=NotificationType.NOTIFICATION_MESSAGE,
+        channel_no=int(channel_no),
+        from_user_no=sender,
+        user_no=sender,
+        message_no=int(message["messageNo"]),
+        create_time=_first_int(message, "createTime", "messageTime") or 0,
+        loc_args1=str(message.get("content") or ""),
+        extras=str(message.get("extras") or ""),
+    )
+
+
+class CatchUp:
+    """起動時に取りこぼしたメッセージを処理するクラス."""
+
+    def __init__(
+        self,
+        connect: Callable[[], HistoryClient],
+        works: LineWorks,
+        handle: Callable[[LineWorks, Any], None],
+        marks: HighWaterMarks,
+        max_messages: int = DEFAULT_MAX_MESSAGES,
+        workers: int = DEFAULT_WORKERS,
+    ) -> None:
+        """初期化.
+
+        Args:
+            connect: チャット一覧と履歴を取得するクライアントを作成する関数
+                (ログインを伴うため、キャッチアップのスレッドで呼ぶ)
+            works: 返信に使うLineWorksクライアント
+            handle: メッセージを処理する関数 (MessageHandler.handle_message)
+            marks: ハイウォーターマーク
+            max_messages: チャンネルごとに処理する最大件数
+            workers: 同時に処理するチャンネル数
+        """
+        self.connect = connect
+        self._client: HistoryClient | None = None
+        # ログイン中もライブ受信の記録 (_lock) を止めないよう分ける
+        self._client_lock = threading.Lock()
+        self.works = works
+        self.handle = handle
+        self.marks = marks
+        self.max_messages = max_messages
+        self.workers = max(1, workers)
+        self.processed = 0
+        self._live: set[tuple[str, int]] = set()
+        self._lock = threading.Lock()
+        # ライブ受信で進む前の値を起点にする
+        self._baseline = marks.snapshot()
+
+    @property
+    def client(self) -> HistoryClient:
+        """チャット一覧と履歴を取得するクライアント (初回に作成する)."""
+        with self._client_lock:
+            if self._client is None:
+                self._client = self.connect()
+            return self._client
+
+    def observe(self, payload: Any) -> None:
+        """ライブで受信したメッセージを記録する.
+
+        ハイウォーターマークを進め、キャッチアップ中の二重処理を防ぐ.
+
+        Args:
+            payload: 受信したペイロード
+        """
+        message_no = getattr(payload, "message_no", None)
+        if not message_no or not payload.channel_no:
+            return
+        with self._lock:
+            self._live.add((str(payload.channel_no), int(message_no)))
+        self.marks.update(
+            payload.channel_no,
+            int(message_no),
+            int(getattr(payload, "create_time", 0) or 0),
+        )
+
+    def find_pending(self) -> list[tuple[str, Mark, dict[str, Any]]]:
+        """ハイウォーターマークより新しいメッセージがあるチャンネルを探す.
+
+        初めて見るチャンネルは現在の最新メッセージを記録するだけで、
+        過去のメッセージは処理しない.
+
+        Returns:
+            list[tuple[str, Mark, dict[str, Any]]]:
+                (チャンネル番号, ハイウォーターマーク, チャット) のリスト
+        """
+        response = self.client.get_all_chats(
+            self.works.domain_id, self.works.contact_no
+        )
+        chats = (
+            response.get("result", []) if isinstance(response, dict) else []
+        )
+        pending = []
+        for chat in chats if isinstance(chats, list) else []:
+            channel_no = chat.get("channelNo")
+            last_no = _first_int(chat, "lastMessageNo")
+            if not channel_no or not last_no:
+                continue
+            update_time = _first_int(chat, "updateTime") or 0
+            mark = self._baseline.get(str(channel_no))
+            if mark is None:
+                self.marks.update(channel_no, last_no, 0, update_time)
+                continue
+            if update_time and update_time <= mark.update_time:
+                continue
+            if last_no > mark.message_no:
+                pending.append((str(channel_no), mark, chat))
+        return pending
+
+    def _iter_missing(
+        self, channel_no: str, mark: Mark, last_no: int
+    ) -> Iterator[dict[str, Any]]:
+        """ハイウォーターマーク以降のメッセージを古い順に返す.
+
+        Args:
+            channel_no: チャンネル番号
+            mark: ハイウォーターマーク
+            last_no: チャット一覧の最新メッセージ番号
+
+        Yields:
+            dict[str, Any]: メッセージ
+        """
+        # 件数の上限を超える分は古い方を捨てる
+        start = max(mark.message_no + 1, last_no - self.max_messages + 1)
+        yield from self.client.iter_channel_history(
+            channel_no,
+            start,
+            direction=DIRECTION_FORWARD,
+            stop_message_no=last_no,
+            limit=self.max_messages,
+        )
+
+    def catch_up_channel(
+        self, channel_no: str, mark: Mark, chat: dict[str, Any]
+    ) -> int:
+        """1チャンネル分の取りこぼしを順に処理する.
+
+        Args:
+            channel_no: チャンネル番号
+            mark: ハイウォーターマーク
+            chat: チャット一覧の要素
+
+        Returns:
+            int: 処理したメッセージ数
+        """
+        last_no = int(chat["lastMessageNo"])
+        update_time = _first_int(chat, "updateTime") or 0
+        handled = 0
+        for message in self._iter_missing(channel_no, mark, last_no):
+            payload = to_payload(channel_no, message)
+            message_no = int(message["messageNo"])
+            with self._lock:
+                live = (channel_no, message_no) in self._live
+            own = payload and payload.from_user_no == self.works.contact_no
+            if payload and not live and not own:
+                try:
+                    self.handle(self.works, payload)
+                    handled += 1
+                except Exception as e:
+                    logger.error(
+                        "Failed to handle missed message %s/%s: %s",
+                        channel_no,
+                        message_no,
+                        e,
+                    )
+            self.marks.update(
+                channel_no,
+                message_no,
+                payload.create_time if payload else 0,
+            )
+        self.marks.update(channel_no, last_no, 0, update_time)
+        return handled
+
+    def run(self) -> int:
+        """全チャンネルの取りこぼしを処理する.
+
+        Returns:
+            int: 処理したメッセージ数
+        """
+        started = time.monotonic()
+        pending = self.find_pending()
+        with ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="catchup"
+        ) as executor:
+            futures = [
+                executor.submit(self.catch_up_channel, *item)
+                for item in pending
+            ]
+            for future in futures:
+                try:
+                    self.processed += future.result()
+                except Exception as e:
+                    logger.error("Catch-up failed: %s", e)
+        self.marks.save()
+        logger.info(
+            "Caught up %d message(s) in %d channel(s) in %.1fs",
+            self.processed,
+            len(pending),
+            time.monotonic() - started,
+            extra={"event": "catch_up"},
+        )
+        return self.processed
+
+    def start(self) -> threading.Thread:
+        """バックグラウンドでキャッチアップを開始する.
+
+        Returns:
+            threading.Thread: キャッチアップのスレッド
+        """
+
+        def run_safely() -> None:
+            try:
+                self.run()
+            except Exception as e:
+                logger.error("Catch-up failed: %s", e)
+
+        thread = threading.Thread(
+            target=run_safely, name="catchup", daemon=True
+        )
+        thread.start()
+        return thread
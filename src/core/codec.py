@@ -0,0 +1,127 @@
+"""JSON のエンコードとデコードを一元化するモジュール.
+
+orjson がインストールされていれば使い、無ければ標準ライブラリの json に
+切り替える. どちらでも出力は UTF-8 のまま (ensure_ascii=False 相当) の
+コンパクトな形式に揃える.
+"""
+
+import json
+from collections.abc import Callable, Mapping
+from pathlib import Path
+from typing import Any, Final
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson は任意の依存
+    orjson = None
+
+# 使用中の実装 ("orjson" または "json")
+BACKEND: Final[str] = "json" if orjson is None else "orjson"
+
+# デコード時に受け付ける型
+Source = str | bytes | bytearray | memoryview
+
+
+def loads(data: Source) -> Any:
+    """JSON をデコードする.
+
+    レスポンスの本文などはバイト列のまま渡すと、文字列へのデコードを
+    挟まずに解析する.
+
+    Args:
+        data: JSON の文字列またはバイト列
+
+    Returns:
+        Any: デコードした値
+
+    Raises:
+        ValueError: JSON として不正な場合
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def dumpb(
+    obj: Any,
+    *,
+    sort_keys: bool = False,
+    default: Callable[[Any], Any] | None = None,
+) -> bytes:
+    """値を UTF-8 の JSON バイト列にエンコードする.
+
+    Args:
+        obj: 値
+        sort_keys: キーを並べ替える場合はTrue
+        default: JSON に変換できない値の変換関数
+
+    Returns:
+        bytes: JSON
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=default, option=option)
+    return dumps(obj, sort_keys=sort_keys, default=default).encode()
+
+
+def dumps(
+    obj: Any,
+    *,
+    sort_keys: bool = False,
+    default: Callable[[Any], Any] | None = None,
+) -> str:
+    """値を JSON 文字列にエンコードする.
+
+    Args:
+        obj: 値
+        sort_keys: キーを並べ替える場合はTrue
+        default: JSON に変換できない値の変換関数
+
+    Returns:
+        str: JSON
+    """
+    if orjson is not None:
+        return dumpb(obj, sort_keys=sort_keys, default=default).decode()
+    return json.dumps(
+        obj,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        sort_keys=sort_keys,
+        default=default,
+    )
+
+
+def load_file(path: str | Path) -> Any:
+    """JSON ファイルを読み込む.
+
+    Args:
+        path: ファイルのパス
+
+    Returns:
+        Any: デコードした値
+    """
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+def substitute(template: Any, values: Mapping[str, Any]) -> Any:
+    """テンプレート中のプレースホルダーを値で置き換える.
+
+    テンプレートを一度 JSON にしてから置換し、値は JSON 文字列として
+    エスケープするため、引用符や改行を含む値でも構造が壊れない.
+
+    Args:
+        template: テンプレート (変更しない)
+        values: プレースホルダー (例: "${os}") と置き換える値
+
+    Returns:
+        Any: 置き換えたテンプレートのコピー
+    """
+    text = dumps(template)
+    for placeholder, value in values.items():
+        text = text.replace(placeholder, dumps(str(value))[1:-1])
+    return loads(text)
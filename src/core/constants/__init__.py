@@ -3,14 +3,21 @@
 from typing import Final
 
 from .commands import (
+    ACTIVITY_COMMAND,
     ALL_COMMANDS,
     COMMAND_PREFIX,
     FLEX_COMMAND,
     FRIENDS_COMMAND,
     GET_DATA_COMMAND,
     GROUPS_COMMAND,
+    HEAVY_COMMANDS,
     HELP_COMMAND,
+    IGNORE_COMMAND,
+    ISSUES_COMMAND,
+    PROFILE_COMMAND,
+    SEARCH_ALL_COMMAND,
     SEARCH_COMMAND,
+    STATUS_COMMAND,
     TEST_COMMAND,
     USER_INFO_COMMAND,
 )
@@ -18,12 +25,19 @@ from .commands import (
 __all__ = [
     "COMMAND_PREFIX",
     "ALL_COMMANDS",
+    "HEAVY_COMMANDS",
     "HELP_COMMAND",
     "TEST_COMMAND",
     "FLEX_COMMAND",
     "GET_DATA_COMMAND",
     "USER_INFO_COMMAND",
     "SEARCH_COMMAND",
+    "SEARCH_ALL_COMMAND",
     "GROUPS_COMMAND",
     "FRIENDS_COMMAND",
+    "ISSUES_COMMAND",
+    "STATUS_COMMAND",
+    "ACTIVITY_COMMAND",
+    "IGNORE_COMMAND",
+    "PROFILE_COMMAND",
 ]
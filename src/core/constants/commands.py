@@ -12,9 +12,15 @@ FLEX_COMMAND: Final[str] = f"{COMMAND_PREFIX}flex"
 GET_DATA_COMMAND: Final[str] = f"{COMMAND_PREFIX}getdata"
 USER_INFO_COMMAND: Final[str] = f"{COMMAND_PREFIX}userinfo"
 SEARCH_COMMAND: Final[str] = f"{COMMAND_PREFIX}search"
+SEARCH_ALL_COMMAND: Final[str] = f"{COMMAND_PREFIX}searchall"
 GROUPS_COMMAND: Final[str] = f"{COMMAND_PREFIX}groups"
 FRIENDS_COMMAND: Final[str] = f"{COMMAND_PREFIX}friends"
 SYSTEM_INFO_COMMAND: Final[str] = f"{COMMAND_PREFIX}systeminfo"
+ISSUES_COMMAND: Final[str] = f"{COMMAND_PREFIX}issues"
+STATUS_COMMAND: Final[str] = f"{COMMAND_PREFIX}status"
+ACTIVITY_COMMAND: Final[str] = f"{COMMAND_PREFIX}activity"
+IGNORE_COMMAND: Final[str] = f"{COMMAND_PREFIX}ignore"
+PROFILE_COMMAND: Final[str] = f"{COMMAND_PREFIX}profile"
 
 # 全コマンドのリスト
 ALL_COMMANDS: Final[list[str]] = [
@@ -24,7 +30,23 @@ ALL_COMMANDS: Final[list[str]] = [
     GET_DATA_COMMAND,
     USER_INFO_COMMAND,
     SEARCH_COMMAND,
+    SEARCH_ALL_COMMAND,
     GROUPS_COMMAND,
     FRIENDS_COMMAND,
     SYSTEM_INFO_COMMAND,
+    ISSUES_COMMAND,
+    STATUS_COMMAND,
+    ACTIVITY_COMMAND,
+    IGNORE_COMMAND,
+    PROFILE_COMMAND,
+]
+
+# 外部APIを多く呼ぶため、受付制御で重く数えるコマンド
+HEAVY_COMMANDS: Final[list[str]] = [
+    SEARCH_COMMAND,
+    SEARCH_ALL_COMMAND,
+    ACTIVITY_COMMAND,
+    FRIENDS_COMMAND,
+    GROUPS_COMMAND,
+    ISSUES_COMMAND,
 ]
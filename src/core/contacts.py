@@ -0,0 +1,326 @@
+"""ユーザー名からユーザー番号を引くための連絡先ディレクトリ.
+
+チャット一覧の参加者 (userList) と取得したプロフィールから連絡先を
+集め、表示名、ふりがな、ニックネームで検索できるようにする.
+
+- 前方一致: 正規化した名前の昇順リストを二分探索する
+- 部分一致: 1文字と2文字の部分文字列から連絡先への索引で候補を絞り、
+  候補だけを照合する
+
+名前は NFKC で正規化し、大文字と小文字、カタカナとひらがな、空白の
+違いを無視する.
+"""
+
+import bisect
+import functools
+import heapq
+import threading
+import time
+import unicodedata
+from collections.abc import Iterable
+from dataclasses import astuple, dataclass
+from typing import Any, Final
+
+# 検索結果の既定の上限
+DEFAULT_LIMIT: Final[int] = 10
+
+# 一度の追加でこの件数を超える変更は索引を作り直す
+REBUILD_THRESHOLD: Final[int] = 256
+
+# カタカナをひらがなに変換する表 (ァ〜ヶ)
+_KATAKANA_TO_HIRAGANA: Final[dict[int, int]] = {
+    code: code - 0x60 for code in range(0x30A1, 0x30F7)
+}
+
+
+def normalize_name(name: str) -> str:
+    """検索用に名前を正規化する.
+
+    Args:
+        name: 名前
+
+    Returns:
+        str: 正規化した名前
+    """
+    text = unicodedata.normalize("NFKC", name).casefold()
+    return "".join(text.split()).translate(_KATAKANA_TO_HIRAGANA)
+
+
+def _grams(key: str) -> set[str]:
+    """索引に使う1文字と2文字の部分文字列を取得する.
+
+    Args:
+        key: 正規化した名前
+
+    Returns:
+        set[str]: 部分文字列
+    """
+    return set(key) | {key[i : i + 2] for i in range(len(key) - 1)}
+
+
+@dataclass(frozen=True)
+class Contact:
+    """連絡先."""
+
+    user_no: str
+    name: str
+    phonetic: str = ""
+    nickname: str = ""
+
+    @functools.cached_property
+    def sort_key(self) -> str:
+        """並べ替えに使う正規化した表示名."""
+        return normalize_name(self.name)
+
+    @functools.cached_property
+    def search_keys(self) -> frozenset[str]:
+        """検索に使う正規化した名前 (表示名、ふりがな、ニックネーム)."""
+        names = (self.name, self.phonetic, self.nickname)
+        return frozenset(
+            key for name in names if (key := normalize_name(name))
+        )
+
+
+class ContactDirectory:
+    """名前で連絡先を検索するクラス."""
+
+    def __init__(self) -> None:
+        """初期化."""
+        self._contacts: dict[str, Contact] = {}
+        # (正規化した名前, ユーザー番号) の昇順リスト
+        self._sorted: list[tuple[str, str]] = []
+        # 部分文字列 -> ユーザー番号
+        self._grams: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+        self.refreshed_at = float("-inf")
+
+    def __len__(self) -> int:
+        """連絡先の数."""
+        return len(self._contacts)
+
+    def get(self, user_no: Any) -> Contact | None:
+        """ユーザー番号で連絡先を取得する.
+
+        Args:
+            user_no: ユーザー番号
+
+        Returns:
+            Contact | None: 連絡先 (未登録の場合None)
+        """
+        return self._contacts.get(str(user_no))
+
+    def _merge(self, contact: Contact) -> tuple[Contact, Contact | None]:
+        """登録済みの連絡先と合わせる (ロックを取得して呼ぶ).
+
+        空の項目は登録済みの値を引き継ぐため、チャット一覧の名前だけの
+        情報でプロフィールのふりがなが消えることはない.
+
+        Args:
+            contact: 連絡先
+
+        Returns:
+            tuple[Contact, Contact | None]: 合わせた連絡先と登録済みの連絡先
+        """
+        old = self._contacts.get(contact.user_no)
+        if old is not None:
+            contact = Contact(
+                contact.user_no,
+                contact.name,
+                contact.phonetic or old.phonetic,
+                contact.nickname or old.nickname,
+            )
+        return contact, old
+
+    def add(self, contact: Contact) -> bool:
+        """連絡先を追加または更新する.
+
+        Args:
+            contact: 連絡先
+
+        Returns:
+            bool: 追加または変更した場合はTrue
+        """
+        return self.add_many([contact]) > 0
+
+    def add_many(self, contacts: Iterable[Contact]) -> int:
+        """連絡先をまとめて追加または更新する.
+
+        変更が登録数に比べて多い場合は1件ずつ挿入せず、索引を作り直す.
+
+        Args:
+            contacts: 連絡先
+
+        Returns:
+            int: 追加または変更した連絡先の数
+        """
+        with self._lock:
+            # ユーザー番号 -> 追加前に索引に載っていた連絡先
+            changed: dict[str, Contact | None] = {}
+            for contact in contacts:
+                if not contact.user_no or not contact.name:
+                    continue
+                contact, old = self._merge(contact)
+                if contact == old:
+                    continue
+                self._contacts[contact.user_no] = contact
+                changed.setdefault(contact.user_no, old)
+            if len(changed) > max(REBUILD_THRESHOLD, len(self._contacts) // 8):
+                self._rebuild()
+            else:
+                for user_no, old in changed.items():
+                    contact = self._contacts[user_no]
+                    if old is not None:
+                        self._unindex(old)
+                    self._index(contact)
+        return len(changed)
+
+    def _rebuild(self) -> None:
+        """登録済みの連絡先から索引を作り直す (ロックを取得して呼ぶ)."""
+        self._sorted = sorted(
+            (key, c.user_no)
+            for c in self._contacts.values()
+            for key in c.search_keys
+        )
+        self._grams = {}
+        for key, user_no in self._sorted:
+            for gram in _grams(key):
+                self._grams.setdefault(gram, set()).add(user_no)
+
+    def _index(self, contact: Contact) -> None:
+        """連絡先を索引に加える.
+
+        Args:
+            contact: 連絡先
+        """
+        for key in contact.search_keys:
+            bisect.insort(self._sorted, (key, contact.user_no))
+            for gram in _grams(key):
+                self._grams.setdefault(gram, set()).add(contact.user_no)
+
+    def _unindex(self, contact: Contact) -> None:
+        """連絡先を索引から除く.
+
+        Args:
+            contact: 連絡先
+        """
+        for key in contact.search_keys:
+            entry = (key, contact.user_no)
+            i = bisect.bisect_left(self._sorted, entry)
+            if i < len(self._sorted) and self._sorted[i] == entry:
+                del self._sorted[i]
+        for gram in set().union(*map(_grams, contact.search_keys)):
+            users = self._grams.get(gram)
+            if users is not None:
+                users.discard(contact.user_no)
+                if not users:
+                    del self._grams[gram]
+
+    def add_chat_list(self, chats: Iterable[dict[str, Any]]) -> int:
+        """チャット一覧の参加者を追加する.
+
+        Args:
+            chats: getVisibleUserChannelList の result
+
+        Returns:
+            int: 追加または変更した連絡先の数
+        """
+        added = self.add_many(
+            Contact(str(user.get("userNo") or ""), user.get("name", ""))
+            for chat in chats
+            for user in chat.get("userList") or []
+            if user.get("relationStatus") != "me"
+        )
+        self.refreshed_at = time.monotonic()
+        return added
+
+    def add_profile(self, profile: dict[str, Any]) -> bool:
+        """プロフィール (contact/v4/users) を追加する.
+
+        Args:
+            profile: get_user_info の結果
+
+        Returns:
+            bool: 追加または変更した場合はTrue
+        """
+        name = profile.get("name") or {}
+        return self.add(
+            Contact(
+                str(profile.get("userId") or ""),
+                name.get("displayName", ""),
+                name.get("displayPhoneticName", ""),
+                profile.get("nickName", ""),
+            )
+        )
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> list[Contact]:
+        """名前で連絡先を検索する.
+
+        前方一致を先に、部分一致をその後に、それぞれ名前の順で返す.
+
+        Args:
+            query: 名前の一部
+            limit: 結果の上限
+
+        Returns:
+            list[Contact]: 連絡先
+        """
+        q = normalize_name(query)
+        if not q:
+            return []
+        with self._lock:
+            contacts = self._contacts
+            prefix: dict[str, None] = {}
+            i = bisect.bisect_left(self._sorted, (q, ""))
+            while (
+                len(prefix) < limit
+                and i < len(self._sorted)
+                and self._sorted[i][0].startswith(q)
+            ):
+                prefix[self._sorted[i][1]] = None
+                i += 1
+            rest = limit - len(prefix)
+            if rest <= 0:
+                return [contacts[user_no] for user_no in prefix]
+
+            grams = (
+                [q]
+                if len(q) == 1
+                else [q[j : j + 2] for j in range(len(q) - 1)]
+            )
+            # 候補の少ない部分文字列から絞り込む
+            sets = sorted(
+                (self._grams.get(gram, set()) for gram in grams), key=len
+            )
+            candidates = sets[0].intersection(*sets[1:]) - prefix.keys()
+            substring = [
+                user_no
+                for user_no in candidates
+                if any(q in key for key in contacts[user_no].search_keys)
+            ]
+            # 上限に必要な分だけ名前の順に取り出す
+            ordered = list(prefix) + heapq.nsmallest(
+                rest, substring, key=lambda no: contacts[no].sort_key
+            )
+            return [contacts[user_no] for user_no in ordered]
+
+    def export(self) -> list[list[str]]:
+        """連絡先を取得する (スナップショット用).
+
+        Returns:
+            list[list[str]]: [ユーザー番号, 表示名, ふりがな, ニックネーム]
+        """
+        with self._lock:
+            return [list(astuple(c)) for c in self._contacts.values()]
+
+    def restore(self, entries: list[list[str]]) -> None:
+        """連絡先を復元する (スナップショット用).
+
+        Args:
+            entries: export で取得した連絡先
+        """
+        with self._lock:
+            for entry in entries:
+                contact = Contact(*entry)
+                if contact.user_no and contact.name:
+                    self._contacts.setdefault(contact.user_no, contact)
+            self._rebuild()
@@ -0,0 +1,171 @@
+"""反射的な返信 (スタンプの返信など) をチャンネルごとにまとめるモジュール."""
+
+import logging
+import threading
+from collections.abc import Callable, Hashable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Final
+
+from config.config import (
+    REPLY_CAP_PER_MINUTE,
+    REPLY_DEBOUNCE_SECONDS,
+    REPLY_WORKERS,
+)
+from core.scheduler import TokenBucket
+from core.timer_wheel import TimerWheel
+
+logger = logging.getLogger(__name__)
+
+# 既定のまとめる期間 (秒)
+DEFAULT_WINDOW: Final[float] = 2.0
+
+# チャンネルごとの既定の返信数の上限 (回/分)
+DEFAULT_CAP_PER_MINUTE: Final[float] = 6.0
+
+
+@dataclass
+class _Pending:
+    """期間中の最新の返信."""
+
+    action: Callable[[], None]
+    coalesced: int = 0
+
+
+class ReplyDebouncer:
+    """チャンネルごとに、期間中の返信を最新の1件にまとめるクラス.
+
+    最初の返信から ``window`` 秒後に、その間に届いた最新の返信だけを
+    送信する. 期間は延長しないため、連続して届いても必ず送信される.
+    送信はチャンネルごとのトークンバケットで ``cap_per_minute`` に制限する.
+    """
+
+    def __init__(
+        self,
+        window: float = DEFAULT_WINDOW,
+        cap_per_minute: float = DEFAULT_CAP_PER_MINUTE,
+        wheel: TimerWheel | None = None,
+        workers: int = 2,
+    ) -> None:
+        """初期化.
+
+        Args:
+            window: まとめる期間 (秒, 0以下の場合は即時送信)
+            cap_per_minute: チャンネルごとの返信数の上限 (回/分)
+            wheel: 期限の管理に使うタイマーホイール
+            workers: 送信に使うスレッド数
+        """
+        self.window = window
+        self.cap_per_minute = cap_per_minute
+        self.wheel = wheel or TimerWheel()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="reply"
+        )
+        self._pending: dict[Hashable, _Pending] = {}
+        self._buckets: dict[Hashable, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    def submit(self, key: Hashable, action: Callable[[], None]) -> None:
+        """返信を登録する.
+
+        Args:
+            key: まとめる単位 (チャンネル番号など)
+            action: 返信を送信する関数
+        """
+        if self.window <= 0:
+            self._send(key, action)
+            return
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None:
+                pending.action = action
+                pending.coalesced += 1
+                self.coalesced += 1
+                return
+            self._pending[key] = _Pending(action)
+        self.wheel.schedule(self.window, lambda: self._flush(key))
+
+    def _flush(self, key: Hashable) -> None:
+        """期間が終わったキーの最新の返信を送信する.
+
+        Args:
+            key: まとめる単位
+        """
+        with self._lock:
+            pending = self._pending.pop(key, None)
+        if pending is None:
+            return
+        if pending.coalesced:
+            logger.debug("Coalesced %d replies for %s", pending.coalesced, key)
+        self._send(key, pending.action)
+
+    def _send(self, key: Hashable, action: Callable[[], None]) -> None:
+        """上限の範囲内で返信を送信する.
+
+        Args:
+            key: まとめる単位
+            action: 返信を送信する関数
+        """
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                burst = max(1, int(self.cap_per_minute))
+                bucket = TokenBucket(self.cap_per_minute / 60, burst)
+                self._buckets[key] = bucket
+            if not bucket.take():
+                self.dropped += 1
+                return
+            self.sent += 1
+        self._executor.submit(self._run, key, action)
+
+    @staticmethod
+    def _run(key: Hashable, action: Callable[[], None]) -> None:
+        """返信を送信する.
+
+        Args:
+            key: まとめる単位
+            action: 返信を送信する関数
+        """
+        try:
+            action()
+        except Exception as e:
+            logger.error("Failed to send reply to %s: %s", key, e)
+
+    def stats(self) -> dict[str, int]:
+        """送信、集約、破棄した返信の数を取得する.
+
+        Returns:
+            dict[str, int]: 統計
+        """
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "sent": self.sent,
+                "coalesced": self.coalesced,
+                "dropped": self.dropped,
+            }
+
+
+_debouncer: ReplyDebouncer | None = None
+_debouncer_lock = threading.Lock()
+
+
+def get_reply_debouncer() -> ReplyDebouncer:
+    """プロセス共有の ReplyDebouncer を取得する.
+
+    Returns:
+        ReplyDebouncer: 共有のインスタンス
+    """
+    global _debouncer
+
+    with _debouncer_lock:
+        if _debouncer is None:
+            _debouncer = ReplyDebouncer(
+                window=REPLY_DEBOUNCE_SECONDS,
+                cap_per_minute=REPLY_CAP_PER_MINUTE,
+                workers=REPLY_WORKERS,
+            )
+        return _debouncer
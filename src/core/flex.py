@@ -0,0 +1,250 @@
+"""Flexメッセージの要素を組み立てるモジュール.
+
+テンプレートJSONでは表現しにくい、件数が可変の要素を組み立てる際に使う.
+"""
+
+from typing import Any, Final
+
+from line_works.requests.send_message import FlexContent
+
+# テンプレートと揃えた配色
+TITLE_COLOR: Final[str] = "#1DB446"
+LABEL_COLOR: Final[str] = "#aaaaaa"
+VALUE_COLOR: Final[str] = "#666666"
+BAR_COLOR: Final[str] = "#6C5CE7"
+BAR_BACKGROUND: Final[str] = "#EEEEEE"
+
+# カルーセルに含められるバブルの最大数
+MAX_CAROUSEL_BUBBLES: Final[int] = 10
+
+
+def text(value: Any, **props: Any) -> dict[str, Any]:
+    """テキスト要素を作成する.
+
+    Args:
+        value: 表示する値
+        **props: 追加のプロパティ
+
+    Returns:
+        dict[str, Any]: テキスト要素
+    """
+    return {"type": "text", "text": str(value) or " ", "wrap": True, **props}
+
+
+def separator(margin: str = "md") -> dict[str, Any]:
+    """区切り線を作成する.
+
+    Args:
+        margin: 上側の余白
+
+    Returns:
+        dict[str, Any]: 区切り線
+    """
+    return {"type": "separator", "margin": margin}
+
+
+def row(label: str, value: Any) -> dict[str, Any]:
+    """ラベルと値を横に並べた行を作成する.
+
+    Args:
+        label: ラベル
+        value: 値
+
+    Returns:
+        dict[str, Any]: 行のボックス
+    """
+    return {
+        "type": "box",
+        "layout": "baseline",
+        "spacing": "sm",
+        "contents": [
+            text(label, color=LABEL_COLOR, size="sm", flex=2),
+            text(value, color=VALUE_COLOR, size="sm", flex=5),
+        ],
+    }
+
+
+def bar_row(label: str, value: int, maximum: int) -> dict[str, Any]:
+    """ラベル付きの横棒グラフの行を作成する.
+
+    Args:
+        label: ラベル
+        value: 値
+        maximum: 棒の長さを100%とする値
+
+    Returns:
+        dict[str, Any]: 行のボックス
+    """
+    ratio = value / maximum if maximum > 0 else 0.0
+    width = max(int(round(ratio * 100)), 1)
+    return {
+        "type": "box",
+        "layout": "horizontal",
+        "spacing": "sm",
+        "contents": [
+            text(label, color=LABEL_COLOR, size="xs", flex=2),
+            {
+                "type": "box",
+                "layout": "vertical",
+                "flex": 5,
+                "backgroundColor": BAR_BACKGROUND,
+                "height": "8px",
+                "contents": [
+                    {
+                        "type": "box",
+                        "layout": "vertical",
+                        "width": f"{width}%",
+                        "height": "8px",
+                        "backgroundColor": BAR_COLOR,
+                        "contents": [],
+                    }
+                ],
+                "justifyContent": "center",
+                "offsetTop": "4px",
+            },
+            text(value, color=VALUE_COLOR, size="xs", flex=1, align="end"),
+        ],
+    }
+
+
+def column_chart(
+    values: list[int], labels: list[str], height: int = 60
+) -> dict[str, Any]:
+    """縦棒グラフを作成する.
+
+    Args:
+        values: 各列の値
+        labels: 各列の下に表示するラベル (空文字は非表示)
+        height: 最大値の列の高さ (px)
+
+    Returns:
+        dict[str, Any]: グラフのボックス
+    """
+    maximum = max(values) if values else 0
+    columns = []
+    for value, label in zip(values, labels, strict=True):
+        bar_height = (
+            max(int(round(value / maximum * height)), 1) if maximum else 1
+        )
+        columns.append(
+            {
+                "type": "box",
+                "layout": "vertical",
+                "flex": 1,
+                "justifyContent": "flex-end",
+                "contents": [
+                    {
+                        "type": "box",
+                        "layout": "vertical",
+                        "height": f"{bar_height}px",
+                        "backgroundColor": BAR_COLOR,
+                        "contents": [],
+                    },
+                    text(label, size="xxs", color=LABEL_COLOR, align="center"),
+                ],
+            }
+        )
+    return {
+        "type": "box",
+        "layout": "horizontal",
+        "spacing": "xs",
+        "height": f"{height + 16}px",
+        "contents": columns,
+    }
+
+
+def section(title: str, contents: list[dict[str, Any]]) -> dict[str, Any]:
+    """見出し付きのセクションを作成する.
+
+    Args:
+        title: 見出し
+        contents: セクションの要素
+
+    Returns:
+        dict[str, Any]: セクションのボックス
+    """
+    return {
+        "type": "box",
+        "layout": "vertical",
+        "margin": "lg",
+        "spacing": "sm",
+        "contents": [text(title, weight="bold", size="md"), *contents],
+    }
+
+
+def bubble(
+    title: str, contents: list[dict[str, Any]], size: str | None = None
+) -> dict[str, Any]:
+    """タイトル付きのバブルを作成する.
+
+    Args:
+        title: タイトル
+        contents: 本文の要素
+        size: バブルのサイズ (例: "kilo")
+
+    Returns:
+        dict[str, Any]: バブル
+    """
+    result: dict[str, Any] = {
+        "type": "bubble",
+        "body": {
+            "type": "box",
+            "layout": "vertical",
+            "spacing": "sm",
+            "contents": [
+                text(title, weight="bold", size="lg", color=TITLE_COLOR),
+                separator(),
+                *contents,
+            ],
+        },
+    }
+    if size:
+        result["size"] = size
+    return result
+
+
+def footer(value: str) -> dict[str, Any]:
+    """バブルのフッターを作成する.
+
+    Args:
+        value: 表示するテキスト
+
+    Returns:
+        dict[str, Any]: フッターのボックス
+    """
+    return {
+        "type": "box",
+        "layout": "vertical",
+        "contents": [
+            text(value, size="xs", color=LABEL_COLOR, align="center")
+        ],
+    }
+
+
+def carousel(bubbles: list[dict[str, Any]]) -> dict[str, Any]:
+    """バブルをカルーセルにまとめる.
+
+    Args:
+        bubbles: バブルのリスト (MAX_CAROUSEL_BUBBLES 件まで)
+
+    Returns:
+        dict[str, Any]: カルーセル
+    """
+    if len(bubbles) > MAX_CAROUSEL_BUBBLES:
+        raise ValueError(
+            f"A carousel can hold at most {MAX_CAROUSEL_BUBBLES} bubbles"
+        )
+    return {"type": "carousel", "contents": bubbles}
+
+
+def to_flex_content(contents: dict[str, Any], alt_text: str) -> FlexContent:
+    """組み立てた要素をFlexContentに変換する.
+
+    Args:
+        contents: バブルまたはカルーセル
+        alt_text: 代替テキスト
+
+    Returns:
+        FlexContent: 送信可能なFlexメッセージ
+    """
+    return FlexContent(alt_text=alt_text, contents=contents)
@@ -1,44 +1,135 @@
-import platform
-import psutil
-import subprocess
-import socket
 import datetime
+import functools
 import locale
-from locale import setlocale, LC_ALL
+import os
+import platform
+import socket
+import subprocess
+import threading
+from typing import Any
+
+import psutil
+
+from core.system_sampler import MetricStats, SystemSampler, get_sampler
 
-def get_system_info():
-    """Get system information."""
+# 静的情報のプローブに許容する最大秒数
+STATIC_PROBE_TIMEOUT = 5
+
+
+def get_system_info(sampler: SystemSampler | None = None) -> dict[str, Any]:
+    """Get system information.
+
+    動的な値はバックグラウンドのサンプラーが保持する最新のスナップショット
+    から取得するため、呼び出しはブロックしない.
+    """
+    sampler = sampler or get_sampler()
+    static = get_static_info()
+    snapshot = sampler.snapshot()
+    if snapshot is None:
+        pending = "Collecting..."
+        return {
+            **static,
+            "ram": pending,
+            "disk": pending,
+            "network": pending,
+            "uptime": pending,
+        }
+
+    cpu_stats = _format_stats(sampler.stats("cpu_percent"))
+    ram_stats = _format_stats(sampler.stats("memory_percent"))
+    total = snapshot.memory_total // (1024 * 1024)
+    available = snapshot.memory_available // (1024 * 1024)
+    return {
+        **static,
+        "cpu": (
+            f"{static['cpu']} / {snapshot.cpu_percent:.1f}% {cpu_stats}"
+        ).strip(),
+        "ram": (
+            f"Total: {total} MB, Available: {available} MB / "
+            f"{snapshot.memory_percent:.1f}% {ram_stats}"
+        ).strip(),
+        "disk": (
+            f"{sampler.disk_path}: {snapshot.disk_percent:.1f}% "
+            f"(Used {snapshot.disk_used // (1024**3)} GB / "
+            f"{snapshot.disk_total // (1024**3)} GB)"
+        ),
+        "network": (
+            f"Sent {_format_rate(snapshot.net_send_rate)}, "
+            f"Recv {_format_rate(snapshot.net_recv_rate)}"
+        ),
+        "uptime": str(
+            datetime.timedelta(seconds=int(snapshot.uptime_seconds))
+        ),
+    }
+
+
+@functools.cache
+def get_static_info() -> dict[str, str]:
+    """Get information that does not change while the process is running."""
     return {
         "os": get_os_info(),
         "cpu": get_cpu_info(),
         "gpu": get_gpu_info(),
-        "ram": get_ram_info(),
-        "disks": get_disk_info(),
-        "networks": get_network_info(),
-        "uptime": get_system_uptime(),
         "windows_version": get_windows_version(),
         "language": get_language_info(),
     }
 
+
+def warm_up() -> None:
+    """Start the sampler and resolve static information in the background."""
+    get_sampler()
+    threading.Thread(
+        target=get_static_info, name="static-info", daemon=True
+    ).start()
+
+
+def _format_stats(stats: MetricStats | None) -> str:
+    """Format min/avg/max over the sampling window."""
+    if stats is None or stats.samples < 2:
+        return ""
+    return (
+        f"(min {stats.minimum:.1f} / avg {stats.average:.1f} / "
+        f"max {stats.maximum:.1f})"
+    )
+
+
+def _format_rate(bytes_per_sec: float) -> str:
+    """Format a transfer rate."""
+    for unit in ("B/s", "KB/s", "MB/s"):
+        if bytes_per_sec < 1024:
+            return f"{bytes_per_sec:.1f} {unit}"
+        bytes_per_sec /= 1024
+    return f"{bytes_per_sec:.1f} GB/s"
+
+
 def get_os_info():
     """Get OS information."""
     return f"{platform.system()} {platform.release()} ({platform.version()})"
 
+
 def get_cpu_info():
     """Get CPU information."""
-    cpu = platform.processor()
+    cpu = platform.processor() or platform.machine()
     cpu_count = psutil.cpu_count(logical=True)
     return f"{cpu} ({cpu_count} cores)"
 
+
 def get_gpu_info():
-    """Get GPU information."""
+    """Get GPU information. wmic is only available on Windows."""
+    if platform.system() != "Windows":
+        return "N/A"
     try:
-        result = subprocess.run(['wmic', 'path', 'win32_VideoController', 'get', 'name'],
-                               capture_output=True, text=True)
-        return result.stdout.strip().split('\n')[-1].strip()
+        result = subprocess.run(  # noqa: S603
+            ["wmic", "path", "win32_VideoController", "get", "name"],  # noqa: S607
+            capture_output=True,
+            text=True,
+            timeout=STATIC_PROBE_TIMEOUT,
+        )
+        return result.stdout.strip().split("\n")[-1].strip()
     except Exception:
         return "Unknown"
 
+
 def get_ram_info():
     """Get RAM information."""
     mem = psutil.virtual_memory()
@@ -99,10 +190,17 @@ def get_windows_version():
         return "N/A (Not Windows)"
 
 def get_language_info():
-    """Get language information."""
+    """Get language information.
+
+    setlocale はプロセス全体を書き換えスレッドセーフでないため呼ばない.
+    """
     try:
-        setlocale(LC_ALL, '')
-        return locale.getlocale()[0]
+        return (
+            locale.getlocale()[0]
+            or os.getenv("LC_ALL")
+            or os.getenv("LANG")
+            or "Unknown"
+        )
     except Exception:
         return "Unknown"
 
@@ -122,7 +220,13 @@ def format_disk_info(info):
 
 if __name__ == "__main__":
     # Get all system information
-    info = get_system_info()
+    info = {
+        **get_static_info(),
+        "ram": get_ram_info(),
+        "disks": get_disk_info(),
+        "networks": get_network_info(),
+        "uptime": get_system_uptime(),
+    }
     print("\n=== System Information ===")
     print(f"Operating System: {info['os']}")
     print(f"Windows Version: {info['windows_version']}")
@@ -1,27 +1,83 @@
 """コマンド処理を管理するモジュール."""
 
 import datetime
-import json
+import time
+from collections.abc import Callable
 from typing import Any
 
 from line_works import LineWorks
 
+from config.config import (
+    SEARCH_ALL_MAX_CHANNELS,
+    SEARCH_ALL_TIMEOUT,
+    SEARCH_ALL_WORKERS,
+)
+from core import codec, flex
+from core.activity import (
+    WEEKDAY_LABELS,
+    ActivityStats,
+    compute_activity,
+    format_duration,
+)
 from core.constants.commands import (
+    ACTIVITY_COMMAND,
     ALL_COMMANDS,
     FLEX_COMMAND,
     FRIENDS_COMMAND,
     GET_DATA_COMMAND,
     GROUPS_COMMAND,
     HELP_COMMAND,
+    ISSUES_COMMAND,
+    PROFILE_COMMAND,
+    SEARCH_ALL_COMMAND,
     SEARCH_COMMAND,
+    STATUS_COMMAND,
     SYSTEM_INFO_COMMAND,
     TEST_COMMAND,
     USER_INFO_COMMAND,
 )
+from core.contacts import Contact, normalize_name
 from core.get_info import get_system_info
+from core.link_monitor import get_link_monitors
+from core.page_cache import PageCache
+from core.profiler import DEFAULT_DURATION, MAX_DURATION, get_profiler
+from core.scheduler import get_admission_controller
+from core.search import CrossSearchResult, search_channels
+from core.serializer import truncate
+from core.status_watcher import (
+    format_epoch,
+    format_time,
+    get_cached_status,
+)
 from core.utils import load_flex_message
 from custom_line_works import CustomLineWorks
 
+# !issues で指定できる日数の上限と既定値
+MAX_ISSUE_DAYS = 90
+DEFAULT_ISSUE_DAYS = 30
+
+# !activity で表示する送信者の上位件数
+ACTIVITY_TOP_SENDERS = 5
+
+# !searchall で表示するチャンネルの上位件数
+SEARCH_ALL_TOP_CHANNELS = 10
+# !searchall で表示するトーク名の最大長
+SEARCH_ALL_TITLE_LENGTH = 30
+
+# !userinfo で名前に複数の候補がある場合に表示する件数
+USER_INFO_CANDIDATES = 5
+# !userinfo で名前が見つからない場合に連絡先を取り直す間隔 (秒)
+CONTACTS_REFRESH_INTERVAL = 60
+
+# !friends / !groups の1ページの件数 (カルーセルの上限)
+CHANNEL_PAGE_SIZE = flex.MAX_CAROUSEL_BUBBLES
+
+# 一覧のバブルに表示する最終メッセージの最大長
+CONTENT_PREVIEW_LENGTH = 60
+
+# !friends / !groups の取得結果とページカーソル
+CHANNEL_PAGES = PageCache()
+
 # データ取得状態を管理する辞書
 DATA_RETRIEVAL_STATE: dict[str, dict[str, str | None]] = {}
 
@@ -38,9 +94,14 @@ class CommandHandler:
             GET_DATA_COMMAND: self.get_data,
             USER_INFO_COMMAND: self.user_info,
             SEARCH_COMMAND: self.search,
+            SEARCH_ALL_COMMAND: self.search_all,
             GROUPS_COMMAND: self.groups,
             FRIENDS_COMMAND: self.friends,
             SYSTEM_INFO_COMMAND: self.system_info,
+            ISSUES_COMMAND: self.issues,
+            STATUS_COMMAND: self.status,
+            ACTIVITY_COMMAND: self.activity,
+            PROFILE_COMMAND: self.profile,
         }
 
     def handle_command(
@@ -138,29 +199,52 @@ class CommandHandler:
     def user_info(works: LineWorks, channel_no: str, text: str) -> None:
         """指定されたユーザーIDの詳細情報をFlexメッセージで送信します.
 
+        ID の代わりに名前 (表示名、ふりがな、ニックネームの一部) を
+        指定した場合は、連絡先ディレクトリからIDを解決します.
+
         Args:
             works: LineWorksクライアントインスタンス
             channel_no: メッセージを送信するチャンネル番号
-            text: ユーザーID取得のためのコマンドテキスト
+            text: ユーザーIDまたは名前取得のためのコマンドテキスト
         """
-        # コマンドからユーザーIDを抽出
+        # コマンドからユーザーIDまたは名前を抽出
         if not text.startswith("!userinfo:"):
             works.send_text_message(
                 channel_no, "!userinfo:{user_id} の形式で入力してください"
             )
             return
 
-        user_id = text.split(":")[-1].strip()
+        user_id = text.partition(":")[2].strip()
         if not user_id:
             works.send_text_message(
                 channel_no, "ユーザーIDを指定してください。"
             )
             return
 
-        # プロファイル情報を取得
         custom_works = CustomLineWorks(
             works_id=works.works_id, password=works.password
         )
+        if not user_id.isdigit():
+            # 名前は連絡先ディレクトリで解決する
+            contacts = CommandHandler._find_contacts(
+                works, custom_works, user_id
+            )
+            if not contacts:
+                works.send_text_message(
+                    channel_no, f"「{user_id}」に一致するユーザーはいません。"
+                )
+                return
+            if len(contacts) > 1:
+                works.send_text_message(
+                    channel_no,
+                    CommandHandler.format_contact_candidates(
+                        user_id, contacts
+                    ),
+                )
+                return
+            user_id = contacts[0].user_no
+
+        # プロファイル情報を取得
         user_info = custom_works.get_user_info(user_id)
 
         if not user_info:
@@ -172,43 +256,81 @@ class CommandHandler:
         # Flexメッセージテンプレートを読み込み
         flex_message = load_flex_message("user_info.json", "User Info")
 
-        # JSONをコピーして編集
-        contents = flex_message.contents.copy()
-
         # テンプレートの値を置換
-        contents = json.dumps(contents).replace(
-            "{user_id}", str(user_info.get("userId", "未設定"))
-        )
-        contents = contents.replace(
-            "{display_name}",
-            user_info.get("name", {}).get("displayName", "未設定"),
-        )
-        contents = contents.replace(
-            "{original_photo_url}",
-            user_info.get("photo", {}).get(
-                "originalPhotoUrl", "https://via.placeholder.com/300"
-            ),
-        )
-        contents = contents.replace(
-            "{service_type}",
-            user_info.get("worksAt", {}).get("serviceType", "未設定"),
-        )
-
+        works_at = user_info.get("worksAt", {})
         # privateContactNoが0以外の場合のみ表示
-        private_contact_no = user_info.get("worksAt", {}).get(
-            "privateContactNo", 0
+        private_contact_no = works_at.get("privateContactNo", 0) or "未登録"
+        flex_message.contents = codec.substitute(
+            flex_message.contents,
+            {
+                "{user_id}": user_info.get("userId", "未設定"),
+                "{display_name}": user_info.get("name", {}).get(
+                    "displayName", "未設定"
+                ),
+                "{original_photo_url}": user_info.get("photo", {}).get(
+                    "originalPhotoUrl", "https://via.placeholder.com/300"
+                ),
+                "{service_type}": works_at.get("serviceType", "未設定"),
+                "{private_contact_no}": private_contact_no,
+            },
         )
-        contents = contents.replace(
-            "{private_contact_no}",
-            str(private_contact_no) if private_contact_no != 0 else "未登録",
-        )
-
-        # JSONに戻す
-        flex_message.contents = json.loads(contents)
 
         # Flexメッセージを送信
         works.send_flex_message(channel_no, flex_content=flex_message)
 
+    @staticmethod
+    def _find_contacts(
+        works: LineWorks, custom_works: CustomLineWorks, name: str
+    ) -> list[Contact]:
+        """名前に一致する連絡先を検索する.
+
+        名前と完全に一致する連絡先が1件だけの場合はそれのみを返す.
+        見つからない場合は、連絡先が一定時間更新されていなければ
+        チャット一覧を取得して追加してから再度検索する.
+
+        Args:
+            works: LineWorksクライアント
+            custom_works: 拡張LineWorksクライアント
+            name: 名前の一部
+
+        Returns:
+            list[Contact]: 一致した連絡先 (候補の表示件数 + 1 件まで)
+        """
+        contacts = CustomLineWorks.CONTACTS
+        # 表示件数を超える候補があるかを判定するため1件多く取得する
+        limit = USER_INFO_CANDIDATES + 1
+        found = contacts.search(name, limit)
+        if not found:
+            elapsed = time.monotonic() - contacts.refreshed_at
+            if elapsed < CONTACTS_REFRESH_INTERVAL:
+                return []
+            custom_works.get_all_chats(works.domain_id, works.contact_no)
+            found = contacts.search(name, limit)
+        key = normalize_name(name)
+        exact = [contact for contact in found if key in contact.search_keys]
+        return exact if len(exact) == 1 else found
+
+    @staticmethod
+    def format_contact_candidates(name: str, contacts: list[Contact]) -> str:
+        """名前に一致した複数の連絡先を表示用に整形する.
+
+        Args:
+            name: 検索した名前
+            contacts: 一致した連絡先
+
+        Returns:
+            str: 整形した文字列
+        """
+        lines = [f"「{name}」に一致するユーザーが複数います。"]
+        lines.extend(
+            f"・{contact.name} (ID: {contact.user_no})"
+            for contact in contacts[:USER_INFO_CANDIDATES]
+        )
+        if len(contacts) > USER_INFO_CANDIDATES:
+            lines.append("...")
+        lines.append("!userinfo:{ID} で指定してください。")
+        return "\n".join(lines)
+
     def format_search_result(self, result: list) -> str:
         """search関数の検索結果をフォーマットする.
 
@@ -296,148 +418,322 @@ class CommandHandler:
                 channel_no, "検索結果が見つかりませんでした。"
             )
 
-    def groups(self, works: LineWorks, channel_no: str) -> None:
-        """Send formatted groups message.
+    def search_all(
+        self, works: LineWorks, channel_no: str, text: str = SEARCH_ALL_COMMAND
+    ) -> None:
+        """参加中の全チャンネルを並行して検索し、結果を送信する.
+
+        待ち時間内に応答の無かったチャンネルは除き、それまでの結果を送る.
 
         Args:
-            works: LineWorks client.
-            channel_no: Channel number.
+            works: LineWorksクライアント
+            channel_no: チャンネル番号
+            text: "!searchall:キーワード"
         """
+        keyword = text.partition(":")[2].strip()
+        if not keyword:
+            works.send_text_message(
+                channel_no,
+                "全トークを検索するには、\n"
+                "!searchall:検索したいキーワード の形式で入力してください。",
+            )
+            return
+
         custom_works = CustomLineWorks(
             works_id=works.works_id, password=works.password
         )
-        groups_result = custom_works.get_all_groups(
-            domain_id=works.domain_id, user_no=works.contact_no
+        chats = custom_works.get_all_chats(
+            works.domain_id, works.contact_no
+        ).get("result", [])
+        if not isinstance(chats, list) or not chats:
+            works.send_text_message(
+                channel_no, "検索できるトークが見つかりませんでした。"
+            )
+            return
+
+        # 更新の新しいチャンネルから上限まで検索する
+        chats = sorted(
+            chats, key=lambda chat: chat.get("updateTime") or 0, reverse=True
+        )[:SEARCH_ALL_MAX_CHANNELS]
+        titles = {
+            str(chat.get("channelNo")): self._chat_title(chat)
+            for chat in chats
+        }
+
+        def fetch(target: str) -> list[dict[str, Any]]:
+            return custom_works.search_and_fetch_messages(
+                keyword=keyword, start=0, display=10000, channel_no=target
+            ).get("result", [])
+
+        result = search_channels(
+            fetch,
+            titles,
+            workers=SEARCH_ALL_WORKERS,
+            timeout=SEARCH_ALL_TIMEOUT,
         )
+        works.send_text_message(
+            channel_no, self.format_search_all(keyword, result, titles)
+        )
+
+    @staticmethod
+    def _chat_title(chat: dict) -> str:
+        """チャンネルの表示名を取得する.
+
+        Args:
+            chat: チャット情報
 
-        # Format the result into a clean and readable message
-        formatted_result = self.format_groups_info(groups_result)
-        works.send_text_message(channel_no, formatted_result)
+        Returns:
+            str: グループ名 (無い場合は自分以外の参加者名)
+        """
+        if chat.get("title"):
+            return str(chat["title"])
+        names = [
+            user.get("name", "N/A")
+            for user in chat.get("userList", [])
+            if user.get("relationStatus") != "me"
+        ]
+        return ", ".join(names) or str(chat.get("channelNo", "N/A"))
 
-    def format_groups_info(self, groups_result: list[dict]) -> str:
-        """Formats groups information into a readable string.
+    @staticmethod
+    def format_search_all(
+        keyword: str, result: CrossSearchResult, titles: dict[str, str]
+    ) -> str:
+        """!searchall の検索結果をフォーマットする.
 
         Args:
-            groups_result: List of group information dictionaries.
+            keyword: 検索キーワード
+            result: 集計結果
+            titles: チャンネル番号ごとの表示名
 
         Returns:
-            str: Formatted groups information.
+            str: フォーマットされた文字列
         """
-        if not groups_result:
-            return "No groups found."
-
-        formatted_list = []
-        for group in groups_result:
-            channel_extras = json.loads(group.get("channelExtras", "{}"))
-            service_type = channel_extras.get("serviceType", "N/A")
-
-            content = (
-                f"Content:\n{group.get('content', 'N/A')}"
-                if group.get("messageTypeCode", 0) == 1
-                else ""
+        lines = [f"検索 : {keyword}"]
+        if result.counts:
+            ranking = sorted(
+                result.counts.items(), key=lambda item: item[1], reverse=True
             )
+            lines += [
+                f"合計回数 : {result.total} "
+                f"({len(result.counts)}/{len(titles)} トーク)",
+                f"最初のメッセージ : {format_epoch(result.first_time)}",
+                f"最後のメッセージ : {format_epoch(result.last_time)}",
+                "-------トーク別-------",
+                *(
+                    f"{truncate(titles.get(no, no), SEARCH_ALL_TITLE_LENGTH)}"
+                    f": {count}"
+                    for no, count in ranking[:SEARCH_ALL_TOP_CHANNELS]
+                ),
+            ]
+            if len(ranking) > SEARCH_ALL_TOP_CHANNELS:
+                lines.append(
+                    f"...他{len(ranking) - SEARCH_ALL_TOP_CHANNELS}トーク"
+                )
+        else:
+            lines.append("検索結果が見つかりませんでした。")
 
-            formatted_list.append(
-                f"Title: {group.get('title', 'N/A')}\n"
-                f"Channel No: {group.get('channelNo', 'N/A')}\n"
-                f"User Count: {group.get('userCount', 'N/A')}\n"
-                f"Bot Count: {group.get('botCount', 'N/A')}\n"
-                f"Visible: {group.get('visible', 'N/A')}\n"
-                f"Joined: {group.get('joined', 'N/A')}\n"
-                f"Unread Count: {group.get('unreadCount', 'N/A')}\n"
-                f"Last Message No: {group.get('lastMessageNo', 'N/A')}\n"
-                f"{content}\n"
-                f"Service Type: {service_type}\n"
-                f"{'-' * 30}"
+        if result.partial:
+            lines.append(
+                f"\n※ 一部の結果です (応答なし {len(result.pending)}件 / "
+                f"失敗 {len(result.failed)}件、{result.elapsed:.1f}秒)"
             )
+        return "\n".join(lines)
 
-        return "\n".join(formatted_list)
-
-    def friends(self, works: LineWorks, channel_no: str) -> None:
-        """Friendsメッセージを送信.
+    def groups(
+        self, works: LineWorks, channel_no: str, text: str = GROUPS_COMMAND
+    ) -> None:
+        """グループ一覧をFlexカルーセルで送信する.
 
         Args:
             works: LineWorksクライアント
             channel_no: チャンネル番号
+            text: "!groups" または "!groups ページ番号"
         """
-        custom_works = CustomLineWorks(
-            works_id=works.works_id, password=works.password
+
+        def fetch() -> list[dict]:
+            custom_works = CustomLineWorks(
+                works_id=works.works_id, password=works.password
+            )
+            return custom_works.get_all_groups(
+                domain_id=works.domain_id, user_no=works.contact_no
+            )
+
+        self._send_channel_page(
+            works, channel_no, text, GROUPS_COMMAND, fetch, self.group_bubble
         )
-        friends_result = custom_works.get_all_friends(
-            domain_id=works.domain_id, user_no=works.contact_no
+
+    def friends(
+        self, works: LineWorks, channel_no: str, text: str = FRIENDS_COMMAND
+    ) -> None:
+        """友だち一覧をFlexカルーセルで送信する.
+
+        Args:
+            works: LineWorksクライアント
+            channel_no: チャンネル番号
+            text: "!friends" または "!friends ページ番号"
+        """
+
+        def fetch() -> list[dict]:
+            custom_works = CustomLineWorks(
+                works_id=works.works_id, password=works.password
+            )
+            return custom_works.get_all_friends(
+                domain_id=works.domain_id, user_no=works.contact_no
+            )
+
+        self._send_channel_page(
+            works, channel_no, text, FRIENDS_COMMAND, fetch, self.friend_bubble
         )
 
-        formatted_friends_list = []
-        for friend in friends_result:
-            formatted_friends_list.append(self.format_friend_info(friend))
+    @staticmethod
+    def _send_channel_page(
+        works: LineWorks,
+        channel_no: str,
+        text: str,
+        command: str,
+        fetch: Callable[[], list[dict]],
+        render: Callable[[dict], dict[str, Any]],
+    ) -> None:
+        """チャンネル一覧の1ページ分をFlexカルーセルで送信する.
+
+        ページ番号なしのコマンドでは一覧を取得し直し、ページ番号または
+        "next" を指定した場合はキャッシュ済みの一覧を使う.
 
-        for i in range(0, len(formatted_friends_list), 5):
-            formatted_friends = "\n".join(formatted_friends_list[i : i + 5])
-            works.send_text_message(channel_no, formatted_friends)
+        Args:
+            works: LineWorksクライアント
+            channel_no: チャンネル番号
+            text: 受信したテキスト
+            command: コマンド ("!friends" など)
+            fetch: 一覧を取得する関数
+            render: 1件分のバブルを作成する関数
+        """
+        arg = text[len(command) :].strip().lower()
+        kind = f"{works.works_id}:{command}"
+        entry = CHANNEL_PAGES.get(channel_no, kind) if arg else None
+
+        if not arg:
+            page = 1
+        elif arg == "next":
+            page = entry.page + 1 if entry else 1
+        elif arg.isdigit():
+            page = int(arg)
+        else:
+            works.send_text_message(
+                channel_no, f"{command} ページ番号 の形式で入力してください。"
+            )
+            return
 
-    def format_friend_info(self, friend: dict) -> str:
-        """Format friend information into a readable message.
+        if entry is None:
+            entry = CHANNEL_PAGES.put(channel_no, kind, fetch())
+        items = entry.items
+        if not items:
+            works.send_text_message(channel_no, "見つかりませんでした。")
+            return
+
+        pages = -(-len(items) // CHANNEL_PAGE_SIZE)
+        if not 1 <= page <= pages:
+            works.send_text_message(
+                channel_no, f"ページは 1〜{pages} で指定してください。"
+            )
+            return
+        entry.page = page
+
+        offset = (page - 1) * CHANNEL_PAGE_SIZE
+        bubbles = [
+            render(item) for item in items[offset : offset + CHANNEL_PAGE_SIZE]
+        ]
+        footer = f"{page}/{pages} ページ ({len(items)}件)"
+        if page < pages:
+            footer += f"\n次のページ: {command} {page + 1}"
+        bubbles[-1]["footer"] = flex.footer(footer)
+
+        works.send_flex_message(
+            channel_no,
+            flex_content=flex.to_flex_content(
+                flex.carousel(bubbles), f"{command} {page}/{pages}"
+            ),
+        )
+
+    @staticmethod
+    def _channel_summary(chat: dict) -> list[dict[str, Any]]:
+        """チャンネル共通の行を作成する.
 
         Args:
-            friend: Friend information dictionary.
+            chat: チャット情報
 
         Returns:
-            Formatted friend information as a string.
+            list[dict[str, Any]]: 行のリスト
         """
-        # チャンネル情報を取得
-        channel_id = friend.get("channelNo", "N/A")
-        visibility = (
-            "Visible" if friend.get("visible", False) else "Not Visible"
-        )
-        join_status = "Joined" if friend.get("joined", False) else "Not Joined"
-        last_message_id = friend.get("lastMessageNo", "N/A")
-        first_message_id = (
-            "No conversation yet"
-            if friend.get("firstMessageNo", 0) == 0
-            else friend.get("firstMessageNo", "N/A")
-        )
-        content = (
-            f"Content:\n{friend.get('content', 'N/A')}"
-            if friend.get("messageTypeCode", 0) == 1
-            and friend.get("content", "").strip() != ""
-            else ""
-        )
-        last_updated_time = friend.get("updateTime", "N/A")
-        service_type = json.loads(friend.get("channelExtras", "{}")).get(
-            "serviceType", "N/A"
-        )
+        try:
+            extras = codec.loads(chat.get("channelExtras") or "{}")
+        except ValueError:
+            extras = {}
+        rows = [
+            flex.row("Channel", chat.get("channelNo", "N/A")),
+            flex.row("Last No", chat.get("lastMessageNo", "N/A")),
+            flex.row("Updated", format_epoch(chat.get("updateTime"))),
+            flex.row("Service", extras.get("serviceType", "N/A")),
+        ]
+        content = str(chat.get("content") or "").strip()
+        if chat.get("messageTypeCode", 0) == 1 and content:
+            rows.append(
+                flex.text(
+                    truncate(content, CONTENT_PREVIEW_LENGTH),
+                    size="xs",
+                    color=flex.VALUE_COLOR,
+                    margin="md",
+                )
+            )
+        return rows
 
-        # フォーマットを組み立てる
-        formatted_friend = (
-            f"Channel ID: {channel_id}\n"
-            f"Visibility: {visibility}\n"
-            f"Join Status: {join_status}\n"
-            f"Last Message ID: {last_message_id}\n"
-            f"First Message ID: {first_message_id}\n"
-            f"{content}\n"  # contentを条件に従って追加
-            f"Last Updated Message Time: {last_updated_time}\n"
-            f"Service Type: {service_type}\n"
+    @classmethod
+    def friend_bubble(cls, friend: dict) -> dict[str, Any]:
+        """友だち1件分のバブルを作成する.
+
+        Args:
+            friend: 友だち (1対1のチャット) の情報
+
+        Returns:
+            dict[str, Any]: バブル
+        """
+        # 自分以外のユーザー名をタイトルにする
+        names = [
+            user.get("name", "N/A")
+            for user in friend.get("userList", [])
+            if user.get("relationStatus") != "me"
+        ]
+        status = "Joined" if friend.get("joined", False) else "Not Joined"
+        if not friend.get("visible", False):
+            status += " / Hidden"
+        return flex.bubble(
+            ", ".join(names) or "N/A",
+            [flex.row("Status", status), *cls._channel_summary(friend)],
+            size="kilo",
         )
 
-        # 自分の情報を除外するために、relationStatusが'me'でないユーザーのみ
-        for user in friend.get("userList", []):
-            if user.get("relationStatus") != "me":  # 自分の情報を除外
-                user_name = user.get("name", "N/A")
-                relation_status = user.get("relationStatus", "N/A")
-                join_time = user.get("joinTime", "N/A")
-                photo_hash = user.get("photoHash", "N/A")
-
-                formatted_friend += (
-                    f"  Name: {user_name}\n"
-                    f"  Relation Status: {relation_status}\n"
-                    f"  Join Time: {join_time}\n"
-                    f"  Photo Hash: {photo_hash}\n"
-                )
+    @classmethod
+    def group_bubble(cls, group: dict) -> dict[str, Any]:
+        """グループ1件分のバブルを作成する.
 
-        # 最後に区切り線を追加
-        formatted_friend += "-" * 30
+        Args:
+            group: グループの情報
 
-        return formatted_friend
+        Returns:
+            dict[str, Any]: バブル
+        """
+        return flex.bubble(
+            group.get("title") or "N/A",
+            [
+                flex.row(
+                    "Members",
+                    f"{group.get('userCount', 'N/A')} users / "
+                    f"{group.get('botCount', 'N/A')} bots",
+                ),
+                flex.row("Unread", group.get("unreadCount", "N/A")),
+                *cls._channel_summary(group),
+            ],
+            size="kilo",
+        )
 
     def system_info(
         self,
@@ -453,29 +749,326 @@ class CommandHandler:
             payload: メッセージペイロード
         """
         try:
-            # システム情報を取得
+            # サンプラーの最新スナップショットからシステム情報を取得
             system_info = get_system_info()
             
             # Flexメッセージを読み込む
             flex_content = load_flex_message(filename="info.json", alt_text="System Info")
             
-            # contentsをJSON文字列に変換
-            flex_message = json.dumps(flex_content.contents, ensure_ascii=False)
-            
             # テンプレートの変数を置換
-            flex_message = flex_message.replace("${os}", system_info["os"])
-            flex_message = flex_message.replace("${windows_version}", system_info["windows_version"])
-            flex_message = flex_message.replace("${language}", system_info["language"])
-            flex_message = flex_message.replace("${cpu}", system_info["cpu"])
-            flex_message = flex_message.replace("${gpu}", system_info["gpu"])
-            flex_message = flex_message.replace("${ram}", system_info["ram"])
-            flex_message = flex_message.replace("${uptime}", system_info["uptime"])
-            
-            # JSON文字列を再度FlexContentのcontentsに変換
-            flex_content.contents = json.loads(flex_message)
-            
+            flex_content.contents = codec.substitute(
+                flex_content.contents,
+                {
+                    f"${{{name}}}": system_info[name]
+                    for name in (
+                        "os",
+                        "windows_version",
+                        "language",
+                        "cpu",
+                        "gpu",
+                        "ram",
+                        "disk",
+                        "network",
+                        "uptime",
+                    )
+                },
+            )
+
             # メッセージを送信
             works.send_flex_message(channel_no, flex_content)
             
         except Exception as e:
             works.send_text_message(channel_no, f"システム情報の取得中にエラーが発生しました。{str(e)}")
+
+    def issues(
+        self, works: LineWorks, channel_no: str, text: str = ISSUES_COMMAND
+    ) -> None:
+        """指定日数分の障害情報をダイジェストで送信する.
+
+        Args:
+            works: LineWorksクライアント
+            channel_no: チャンネル番号
+            text: "!issues" または "!issues:日数"
+        """
+        days_text = text.partition(":")[2].strip()
+        if days_text and not days_text.isdigit():
+            works.send_text_message(
+                channel_no, "!issues:日数 の形式で入力してください。"
+            )
+            return
+        days = int(days_text) if days_text else DEFAULT_ISSUE_DAYS
+        days = max(1, min(days, MAX_ISSUE_DAYS))
+
+        custom_works = CustomLineWorks(
+            works_id=works.works_id, password=works.password
+        )
+        issues_by_day = custom_works.get_issues_range(days=days)
+        works.send_text_message(
+            channel_no, self.format_issue_digest(issues_by_day)
+        )
+
+    @staticmethod
+    def format_issue_digest(
+        issues_by_day: list[tuple[datetime.date, list[Any] | None]],
+    ) -> str:
+        """日付ごとの障害情報をダイジェストに整形する.
+
+        Args:
+            issues_by_day: (日付, 障害情報) のリスト
+
+        Returns:
+            str: 整形されたダイジェスト
+        """
+        if not issues_by_day:
+            return "障害情報はありません。"
+
+        first_day, last_day = issues_by_day[0][0], issues_by_day[-1][0]
+        lines = [f"障害情報 {first_day} 〜 {last_day}"]
+        total = 0
+        failed = 0
+        for day, issues in issues_by_day:
+            if issues is None:
+                failed += 1
+                continue
+            if not issues:
+                continue
+            total += len(issues)
+            lines.append(f"\n{day}: {len(issues)}件")
+            for issue in issues[:3]:
+                title = (
+                    issue.get("title") or issue.get("subject") or "N/A"
+                    if isinstance(issue, dict)
+                    else str(issue)
+                )
+                lines.append(f"  - {title}")
+            if len(issues) > 3:
+                lines.append(f"  ...他{len(issues) - 3}件")
+
+        lines.insert(1, f"合計 : {total}件")
+        if failed:
+            lines.append(f"\n取得できなかった日 : {failed}日")
+        return "\n".join(lines)
+
+    @staticmethod
+    def status(works: LineWorks, channel_no: str) -> None:
+        """キャッシュ済みのサービスステータスを送信する.
+
+        Args:
+            works: LineWorksクライアント
+            channel_no: チャンネル番号
+        """
+        snapshot = get_cached_status()
+        if snapshot is None:
+            works.send_text_message(
+                channel_no, "サービスステータスはまだ取得されていません。"
+            )
+            return
+
+        state = "障害発生中" if snapshot.incident else "正常"
+        queue = get_admission_controller().stats().get(str(channel_no), {})
+        calls = CustomLineWorks.SINGLE_FLIGHT.stats()
+        works.send_text_message(
+            channel_no,
+            f"サービスステータス : {state}\n"
+            f"最終確認 : {format_time(snapshot.checked_at)}\n"
+            f"最終変更 : {format_time(snapshot.changed_at)}\n"
+            f"コマンド待機 : {queue.get('queued', 0)}件 "
+            f"(拒否 {queue.get('rejected', 0)}件 / "
+            f"制限 {queue.get('rate_limited', 0)}件)\n"
+            f"API呼び出し : {calls['executed']}回 "
+            f"(同時リクエストの共有 {calls['coalesced']}回)"
+            + "".join(
+                "\n" + CommandHandler.format_link(m.name, m.stats())
+                for m in get_link_monitors()
+            ),
+        )
+
+    @staticmethod
+    def format_link(name: str, stats: dict[str, Any]) -> str:
+        """MQTT接続の監視結果を1行に整形する.
+
+        Args:
+            name: 接続の名前
+            stats: LinkMonitor.stats の結果
+
+        Returns:
+            str: "MQTT (名前) : 往復 p50/p99 ms ..." 形式の文字列
+        """
+
+        def ms(summary: dict[str, Any]) -> str:
+            if summary["p50"] is None:
+                return "-"
+            return f"{summary['p50']}/{summary['p99']}ms"
+
+        state = "無応答" if stats["stalled"] else "接続中"
+        if not stats["connected"]:
+            state = "切断"
+        idle = stats["idle_seconds"]
+        return (
+            f"MQTT ({name}) : {state} / 往復 {ms(stats['rtt_ms'])} / "
+            f"遅延 {ms(stats['delay_ms'])} / "
+            f"最終受信 {'-' if idle is None else f'{idle:.0f}秒前'}"
+        )
+
+    def activity(
+        self, works: LineWorks, channel_no: str, text: str = ACTIVITY_COMMAND
+    ) -> None:
+        """検索結果のアクティビティを集計してFlexメッセージで送信する.
+
+        Args:
+            works: LineWorksクライアント
+            channel_no: チャンネル番号
+            text: "!activity:キーワード"
+        """
+        keyword = text.partition(":")[2].strip()
+        if not keyword:
+            works.send_text_message(
+                channel_no,
+                "アクティビティを分析するには、\n"
+                "!activity:キーワード の形式で入力してください。",
+            )
+            return
+
+        custom_works = CustomLineWorks(
+            works_id=works.works_id, password=works.password
+        )
+        search_result = custom_works.search_and_fetch_messages(
+            keyword=keyword,
+            start=0,
+            display=10000,
+            channel_no=channel_no,
+        )
+        stats = compute_activity(
+            search_result.get("result", []), top_n=ACTIVITY_TOP_SENDERS
+        )
+        if stats is None:
+            works.send_text_message(
+                channel_no, "検索結果が見つかりませんでした。"
+            )
+            return
+
+        works.send_flex_message(
+            channel_no,
+            flex_content=flex.to_flex_content(
+                self.format_activity(keyword, stats), f"Activity: {keyword}"
+            ),
+        )
+
+    @staticmethod
+    def format_activity(keyword: str, stats: ActivityStats) -> dict[str, Any]:
+        """アクティビティの集計結果をFlexバブルに整形する.
+
+        Args:
+            keyword: 検索キーワード
+            stats: 集計結果
+
+        Returns:
+            dict[str, Any]: Flexバブル
+        """
+        hourly = [int(v) for v in stats.hourly]
+        weekday = [int(v) for v in stats.weekday]
+        top_count = stats.top_senders[0][1] if stats.top_senders else 0
+        others = stats.sender_count - len(stats.top_senders)
+
+        senders = [
+            flex.bar_row(name, count, top_count)
+            for name, count in stats.top_senders
+        ]
+        if others > 0:
+            senders.append(
+                flex.text(f"...他{others}人", size="xs", color="#aaaaaa")
+            )
+
+        return flex.bubble(
+            f"Activity: {keyword}",
+            [
+                flex.section(
+                    "概要",
+                    [
+                        flex.row("合計", f"{stats.total}件"),
+                        flex.row("送信者", f"{stats.sender_count}人"),
+                        flex.row("最初", format_time(stats.first_time)),
+                        flex.row("最後", format_time(stats.last_time)),
+                        flex.row(
+                            "間隔",
+                            f"中央値 {format_duration(stats.gap_median)} / "
+                            f"最大 {format_duration(stats.gap_max)}",
+                        ),
+                    ],
+                ),
+                flex.section(
+                    "時間帯",
+                    [
+                        flex.column_chart(
+                            hourly,
+                            [str(h) if h % 6 == 0 else "" for h in range(24)],
+                        )
+                    ],
+                ),
+                flex.section(
+                    "曜日",
+                    [
+                        flex.bar_row(label, count, max(weekday))
+                        for label, count in zip(
+                            WEEKDAY_LABELS, weekday, strict=True
+                        )
+                    ],
+                ),
+                flex.section("送信者 (上位)", senders),
+            ],
+            size="mega",
+        )
+
+    @staticmethod
+    def profile(
+        works: LineWorks, channel_no: str, text: str = PROFILE_COMMAND
+    ) -> None:
+        """プロファイリングを開始または終了し、結果の要約を送信する.
+
+        Args:
+            works: LineWorksクライアント
+            channel_no: チャンネル番号
+            text: "!profile start [秒] [mem]" または "!profile stop"
+                (mem を付けた場合のみメモリの割り当ても計測する)
+        """
+        profiler = get_profiler()
+        action, _, arg = text.partition(" ")[2].strip().partition(" ")
+
+        if action == "start":
+            words = arg.split()
+            memory = "mem" in words
+            numbers = [word for word in words if word != "mem"]
+            try:
+                duration = float(numbers[0]) if numbers else DEFAULT_DURATION
+            except ValueError:
+                duration = DEFAULT_DURATION
+            duration = min(max(duration, 1.0), MAX_DURATION)
+            started = profiler.start(
+                duration,
+                memory=memory,
+                on_complete=lambda report: works.send_text_message(
+                    channel_no, report.summary()
+                ),
+            )
+            target = "CPU・メモリ" if memory else "CPU"
+            works.send_text_message(
+                channel_no,
+                f"プロファイリングを開始しました ({target}, {duration:.0f}秒)。"
+                if started
+                else "プロファイリングは既に実行中です。",
+            )
+        elif action == "stop":
+            report = profiler.stop()
+            works.send_text_message(
+                channel_no,
+                report.summary()
+                if report
+                else "プロファイリングは実行されていません。",
+            )
+        else:
+            state = "実行中" if profiler.running else "停止中"
+            works.send_text_message(
+                channel_no,
+                f"プロファイリング : {state}\n"
+                "!profile start 秒 [mem] で開始、!profile stop で終了します。",
+            )
@@ -1,33 +1,102 @@
 """メッセージを処理するモジュール."""
 
+import functools
 import logging
 import os
+from collections.abc import Callable, Set
+from typing import Final
 
 from line_works.client import LineWorks
 from line_works.mqtt.enums.notification_type import NotificationType
 from line_works.mqtt.models.payload.message import MessagePayload
 
+from config.config import ADMIN_USER_IDS, ADMISSION_WORKERS
 from core.constants.commands import (
-    ALL_COMMANDS,
-    COMMAND_PREFIX,
+    ACTIVITY_COMMAND,
     FLEX_COMMAND,
     FRIENDS_COMMAND,
     GET_DATA_COMMAND,
     GROUPS_COMMAND,
     HELP_COMMAND,
+    IGNORE_COMMAND,
+    ISSUES_COMMAND,
+    PROFILE_COMMAND,
+    SEARCH_ALL_COMMAND,
     SEARCH_COMMAND,
+    STATUS_COMMAND,
     SYSTEM_INFO_COMMAND,
     TEST_COMMAND,
     USER_INFO_COMMAND,
 )
+from core.debounce import get_reply_debouncer
 from core.handlers.command_handler import DATA_RETRIEVAL_STATE, CommandHandler
+from core.ignore_list import IgnoreList, get_ignore_list
+from core.scheduler import (
+    Admission,
+    AdmissionController,
+    get_admission_controller,
+)
+from core.serializer import PayloadSerializer
 
 logger = logging.getLogger(__name__)
 
+# "!command:引数" の形式で引数を受け取るコマンド
+ARG_COMMANDS: Final[frozenset[str]] = frozenset(
+    {
+        USER_INFO_COMMAND,
+        SEARCH_COMMAND,
+        SEARCH_ALL_COMMAND,
+        ISSUES_COMMAND,
+        ACTIVITY_COMMAND,
+    }
+)
+
+# 受付制御で断った場合の返信
+BUSY_MESSAGES: Final[dict[Admission, str]] = {
+    Admission.RATE_LIMITED: (
+        "コマンドの送信が多すぎます。しばらく待ってから再度お試しください。"
+    ),
+    Admission.CHANNEL_BUSY: (
+        "このトークではコマンドを処理中です。完了後に再度お試しください。"
+    ),
+}
+
+# "!command ページ番号" の形式でページを指定できるコマンド
+PAGED_COMMANDS: Final[frozenset[str]] = frozenset(
+    {FRIENDS_COMMAND, GROUPS_COMMAND}
+)
+
+# ADMIN_USER_IDS のユーザーのみ実行できるコマンド ("!command 引数" の形式)
+ADMIN_COMMANDS: Final[frozenset[str]] = frozenset(
+    {IGNORE_COMMAND, PROFILE_COMMAND}
+)
+
+# !getdata の返信に含めるペイロードの最大長
+GET_DATA_MAX_LENGTH: Final[int] = 1500
+
+# 無視するIDの既定のファイル
+DEFAULT_IGNORED_IDS_PATH: Final[str] = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+    "ignored_ids.txt",
+)
+
 
 class PayloadFormatter:
     """ペイロード情報のフォーマットを管理するクラス."""
 
+    # 個別に整形済みのため追加属性から除外する属性
+    EXCLUDED_ATTRS: Final[frozenset[str]] = frozenset(
+        {
+            "notification_type",
+            "loc_args1",
+            "sticker",
+            "location",
+            "from_user_no",
+            "channel_no",
+            "create_time",
+        }
+    )
+
     @staticmethod
     def format_payload_info(payload: MessagePayload) -> list[str]:
         """ペイロード情報を整形する.
@@ -48,17 +117,10 @@ class PayloadFormatter:
             PayloadFormatter._add_type_specific_info(payload, type_value)
         )
 
-        excluded_attrs = {
-            "notification_type",
-            "loc_args1",
-            "sticker",
-            "location",
-            "from_user_no",
-            "channel_no",
-            "create_time",
-        }
         payload_info.extend(
-            PayloadFormatter._add_additional_attrs(payload, excluded_attrs)
+            PayloadFormatter._add_additional_attrs(
+                payload, PayloadFormatter.EXCLUDED_ATTRS
+            )
         )
 
         return payload_info
@@ -115,7 +177,7 @@ class PayloadFormatter:
 
     @staticmethod
     def _add_additional_attrs(
-        payload: MessagePayload, excluded_attrs: set[str]
+        payload: MessagePayload, excluded_attrs: Set[str]
     ) -> list[str]:
         """追加の属性情報を追加する.
 
@@ -126,80 +188,108 @@ class PayloadFormatter:
         Returns:
             list[str]: 追加の属性情報のリスト
         """
-        info = []
-        for attr in dir(payload):
-            if not attr.startswith("_") and attr not in excluded_attrs:
-                value = getattr(payload, attr)
-                if value is not None and value != "":
-                    info.append(f"{attr}: {value}")
-        return info
+        return PayloadSerializer.to_lines(payload, excluded_attrs)
 
 
 class MessageHandler:
     """メッセージ処理を管理するクラス."""
 
-    def __init__(self) -> None:
-        """初期化."""
+    def __init__(
+        self,
+        ignored_ids_path: str | None = None,
+        commands: Set[str] | None = None,
+        admission: AdmissionController | None = None,
+    ) -> None:
+        """初期化.
+
+        Args:
+            ignored_ids_path: 無視するIDのファイル (省略時は既定のファイル)
+            commands: 有効にするコマンド (省略時は全コマンド)
+            admission: コマンドの受付制御 (省略時は共有の受付制御、
+                ADMISSION_WORKERS=0 の場合はその場で実行)
+        """
         self.command_handler = CommandHandler()
-        self.command_map = {
+        self.ignored_ids_path = ignored_ids_path or DEFAULT_IGNORED_IDS_PATH
+        command_map = {
             HELP_COMMAND: self.command_handler.help,
             TEST_COMMAND: self.command_handler.test,
             FLEX_COMMAND: self.command_handler.flex,
             GET_DATA_COMMAND: self.command_handler.get_data,
             USER_INFO_COMMAND: self.command_handler.user_info,
             SEARCH_COMMAND: self.command_handler.search,
+            SEARCH_ALL_COMMAND: self.command_handler.search_all,
             GROUPS_COMMAND: self.command_handler.groups,
             FRIENDS_COMMAND: self.command_handler.friends,
             SYSTEM_INFO_COMMAND: self.command_handler.system_info,
+            ISSUES_COMMAND: self.command_handler.issues,
+            STATUS_COMMAND: self.command_handler.status,
+            ACTIVITY_COMMAND: self.command_handler.activity,
+            IGNORE_COMMAND: self.ignore,
+            PROFILE_COMMAND: self.command_handler.profile,
         }
+        self.command_map = {
+            command: handler
+            for command, handler in command_map.items()
+            if commands is None or command in commands
+        }
+        if admission is None and ADMISSION_WORKERS > 0:
+            admission = get_admission_controller()
+        self.admission = admission
+        self.debouncer = get_reply_debouncer()
         self.payload_formatter = PayloadFormatter()
-        self.ignored_ids = self._load_ignored_ids()
-
-    def _load_ignored_ids(self) -> set[str]:
-        """無視するIDをテキストファイルから読み込む。ファイルが存在しない場合は新規作成.
+        self.ignore_list: IgnoreList = get_ignore_list(self.ignored_ids_path)
 
-        Returns:
-            set[str]: 無視するIDのセット
-        """
-        ignored_ids_path = os.path.join(
-            os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-            "ignored_ids.txt",
-        )
-
-        # ファイルがない場合は新規作成
-        if not os.path.exists(ignored_ids_path):
-            logger.info(
-                f"{ignored_ids_path} が見つからないため新しく作成します"
-            )
-            with open(ignored_ids_path, "w", encoding="utf-8") as f:
-                f.write(
-                    "# 無視するIDのリスト\n"
-                )  # コメント行としてファイルに書き込む
-            return set()
-
-        try:
-            with open(ignored_ids_path, encoding="utf-8") as f:
-                return {
-                    line.strip()
-                    for line in f
-                    if line.strip() and not line.startswith("#")
-                }
-        except FileNotFoundError:
-            os.makedirs(os.path.dirname(ignored_ids_path), exist_ok=True)
-            with open(ignored_ids_path, "w", encoding="utf-8") as f:
-                f.write("# 無視するIDのリスト\n")
-            return set()
-
-    def _is_ignored_id(self, user_no: str) -> bool:
+    def _is_ignored_id(
+        self, user_no: str, channel_no: str | None = None
+    ) -> bool:
         """指定されたIDが無視リストに含まれているかを確認する.
 
         Args:
             user_no: チェックするユーザーID
+            channel_no: メッセージのチャンネル番号
 
         Returns:
-            bool: IDが無視リストに含まれている場合はTrue
+            bool: ユーザーまたはチャンネルが無視リストに含まれている場合はTrue
         """
-        return user_no in self.ignored_ids
+        return self.ignore_list.is_ignored(user_no, channel_no)
+
+    def ignore(
+        self, works: LineWorks, channel_no: str, text: str = IGNORE_COMMAND
+    ) -> None:
+        """無視リストにエントリを追加または削除する.
+
+        Args:
+            works: LineWorksクライアント
+            channel_no: チャンネル番号
+            text: "!ignore add|remove エントリ"
+        """
+        _, _, args = text.partition(" ")
+        action, _, entry = args.strip().partition(" ")
+        entry = entry.strip()
+        if action not in ("add", "remove") or not entry:
+            works.send_text_message(
+                channel_no,
+                f"無視リスト : {len(self.ignore_list)}件\n"
+                "!ignore add ユーザー番号 の形式で追加、\n"
+                "!ignore remove ユーザー番号 の形式で削除できます。\n"
+                "(範囲は 100-200、チャンネルは channel:番号 で指定)",
+            )
+            return
+
+        try:
+            if action == "add":
+                self.ignore_list.add(entry)
+                reply = f"無視リストに追加しました : {entry}"
+            elif self.ignore_list.remove(entry):
+                reply = f"無視リストから削除しました : {entry}"
+            else:
+                reply = f"無視リストに含まれていません : {entry}"
+        except ValueError:
+            reply = f"エントリの形式が正しくありません : {entry}"
+        except OSError as e:
+            logger.error("Failed to update ignore list: %s", e)
+            reply = "無視リストの保存に失敗しました。"
+        works.send_text_message(channel_no, reply)
 
     def _handle_data_retrieval(
         self, works: LineWorks, payload: MessagePayload, channel_no: str
@@ -238,8 +328,11 @@ class MessageHandler:
         state["data"] = payload
 
         # 取得したデータの詳細を送信
+        dump = PayloadSerializer.to_json(
+            payload, max_length=GET_DATA_MAX_LENGTH
+        )
         works.send_text_message(
-            to=payload.channel_no, text=f"[Get Data] Payload:\n{payload!r}"
+            to=payload.channel_no, text=f"[Get Data] Payload:\n{dump}"
         )
 
         # データ取得状態をリセット
@@ -256,12 +349,12 @@ class MessageHandler:
             works: LineWorksクライアント
             payload: メッセージペイロード
         """
-        # 無視するIDの場合は処理をスキップ
-        if self._is_ignored_id(payload.from_user_no):
-            return
-
         channel_no = payload.channel_no
 
+        # 無視するIDまたはチャンネルの場合は処理をスキップ
+        if self._is_ignored_id(payload.from_user_no, channel_no):
+            return
+
         if not channel_no:
             return
 
@@ -273,6 +366,18 @@ class MessageHandler:
         except (ValueError, TypeError):
             return
 
+        # 種別ごとの集計 (tools/log_rollup.py) に使う
+        try:
+            message_type = NotificationType(type_value).name
+        except ValueError:
+            message_type = str(type_value)
+        logger.info(
+            "Message %s in channel %s",
+            message_type,
+            channel_no,
+            extra={"event": "message", "message_type": message_type},
+        )
+
         if type_value == NotificationType.NOTIFICATION_MESSAGE:
             self._handle_text_message(works, payload, channel_no)
         elif type_value == NotificationType.NOTIFICATION_STICKER:
@@ -298,21 +403,89 @@ class MessageHandler:
         """
         text = payload.loc_args1
 
-        # userinfo コマンドの処理を追加
-        if text.startswith(f"{COMMAND_PREFIX}userinfo:"):
-            self.command_handler.user_info(works, channel_no, text)
+        # 引数付きコマンド (例: "!search:キーワード") の処理
+        call: Callable[[], None] | None = None
+        command, sep, _ = text.partition(":")
+        if sep and command in self.command_map and command in ARG_COMMANDS:
+            call = functools.partial(
+                self.command_map[command], works, channel_no, text
+            )
+        else:
+            # ページ指定付きコマンド (例: "!friends 2") の処理
+            command, sep, _ = text.partition(" ")
+            if (
+                sep
+                and command in self.command_map
+                and (command in PAGED_COMMANDS or command in ADMIN_COMMANDS)
+            ):
+                call = functools.partial(
+                    self.command_map[command], works, channel_no, text
+                )
+            elif text in self.command_map:
+                command = text
+                if text == GET_DATA_COMMAND:
+                    call = functools.partial(
+                        self.command_map[text], works, channel_no, payload
+                    )
+                else:
+                    call = functools.partial(
+                        self.command_map[text], works, channel_no
+                    )
+
+        if call is None:
             return
+        if (
+            command in ADMIN_COMMANDS
+            and str(payload.from_user_no) not in ADMIN_USER_IDS
+        ):
+            works.send_text_message(
+                channel_no, "このコマンドは管理者のみ実行できます。"
+            )
+            return
+        logger.info(
+            "Command %s in channel %s",
+            command,
+            channel_no,
+            extra={"event": "command", "command": command},
+        )
+        self._run_command(works, payload, channel_no, command, call)
+
+    def _run_command(
+        self,
+        works: LineWorks,
+        payload: MessagePayload,
+        channel_no: str,
+        command: str,
+        call: Callable[[], None],
+    ) -> None:
+        """受付制御を通してコマンドを実行する.
 
-        # search コマンドの処理を追加
-        if text.startswith(f"{COMMAND_PREFIX}search:"):
-            self.command_handler.search(works, channel_no, text)
+        Args:
+            works: LineWorksクライアント
+            payload: メッセージペイロード
+            channel_no: チャンネル番号
+            command: コマンド
+            call: コマンドの処理
+        """
+        if self.admission is None:
+            call()
             return
 
-        if text in ALL_COMMANDS:
-            if text == GET_DATA_COMMAND:
-                self.command_map[text](works, channel_no, payload)
-            else:
-                self.command_map[text](works, channel_no)
+        result = self.admission.submit(
+            channel_no, payload.from_user_no, command, call
+        )
+        if result is Admission.ACCEPTED:
+            return
+
+        logger.info(
+            "Command %s in channel %s was not admitted: %s",
+            command,
+            channel_no,
+            result.value,
+            extra={"event": "command_rejected"},
+        )
+        if self.admission.should_reply_busy(channel_no):
+            works.send_text_message(channel_no, BUSY_MESSAGES[result])
 
     def _handle_sticker_message(
         self, works: LineWorks, payload: MessagePayload, channel_no: str
@@ -325,7 +498,12 @@ class MessageHandler:
             channel_no: str
         """
         # works.send_text_message(channel_no, f"Sticker: {payload.sticker}")
-        works.send_sticker_message(channel_no, payload.sticker)
+        # 連続したスタンプは最新の1件にまとめて返信する
+        sticker = payload.sticker
+        self.debouncer.submit(
+            (works.works_id, channel_no),
+            functools.partial(works.send_sticker_message, channel_no, sticker),
+        )
 
     def _handle_unknown_message(
         self, works: LineWorks, payload: MessagePayload, channel_no: str
@@ -0,0 +1,264 @@
+"""チャンネルのメッセージ履歴を走査するモジュール."""
+
+import logging
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Final, Protocol
+
+logger = logging.getLogger(__name__)
+
+# getChannelInfo の direction (Webクライアントの挙動からの想定値)
+DIRECTION_BACKWARD: Final[int] = 1
+DIRECTION_FORWARD: Final[int] = 2
+
+# 1リクエストあたりの既定の取得件数
+DEFAULT_PAGE_SIZE: Final[int] = 50
+
+# 既定の先読みリクエスト数
+DEFAULT_PREFETCH: Final[int] = 4
+
+
+class ChannelInfoClient(Protocol):
+    """get_channel_info を持つクライアント."""
+
+    def get_channel_info(
+        self,
+        channel_no: str,
+        message_no: str,
+        direction: int = ...,
+        recent_message_count: int = ...,
+    ) -> dict[str, Any] | None:
+        """チャンネル情報を取得する."""
+        ...
+
+
+def extract_messages(response: Any) -> list[dict[str, Any]]:
+    """getChannelInfo のレスポンスからメッセージ一覧を取り出す.
+
+    Args:
+        response: getChannelInfo のレスポンス
+
+    Returns:
+        list[dict[str, Any]]: messageNo を持つメッセージのリスト
+    """
+    if not isinstance(response, dict):
+        return []
+    candidates = [response]
+    if isinstance(response.get("result"), dict):
+        candidates.append(response["result"])
+    for container in candidates:
+        for key in ("messageList", "messages"):
+            messages = container.get(key)
+            if isinstance(messages, list):
+                return [
+                    m
+                    for m in messages
+                    if isinstance(m, dict) and "messageNo" in m
+                ]
+    return []
+
+
+class ChannelHistoryIterator:
+    """messageNo を起点にチャンネル履歴をページ単位で走査するイテレーター.
+
+    最大 ``prefetch`` 件のページを並行して先読みし、重なったウィンドウは
+    カーソルより先のメッセージだけを返すことで重複を除く. 保持するのは
+    先読み中のページのみなので、履歴の長さに関わらずメモリは一定に収まる.
+    """
+
+    def __init__(
+        self,
+        client: ChannelInfoClient,
+        channel_no: str,
+        start_message_no: int,
+        direction: int = DIRECTION_BACKWARD,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        prefetch: int = DEFAULT_PREFETCH,
+        stop_message_no: int | None = None,
+        limit: int | None = None,
+    ) -> None:
+        """初期化.
+
+        Args:
+            client: get_channel_info を持つクライアント
+            channel_no: チャンネル番号
+            start_message_no: 走査を始める messageNo (この番号を含む)
+            direction: DIRECTION_BACKWARD または DIRECTION_FORWARD
+            page_size: 1リクエストあたりの取得件数
+            prefetch: 同時に先読みするリクエスト数
+            stop_message_no: 走査を終える messageNo (この番号を含む)
+            limit: 返すメッセージの最大件数
+        """
+        if direction not in (DIRECTION_BACKWARD, DIRECTION_FORWARD):
+            raise ValueError(f"Invalid direction: {direction}")
+        self.client = client
+        self.channel_no = channel_no
+        self.start_message_no = start_message_no
+        self.direction = direction
+        self.page_size = max(1, page_size)
+        self.prefetch = max(1, prefetch)
+        self.stop_message_no = stop_message_no
+        self.limit = limit
+        self.requests = 0
+
+    @property
+    def backward(self) -> bool:
+        """過去方向に走査する場合はTrue."""
+        return self.direction == DIRECTION_BACKWARD
+
+    def _fetch(self, anchor: int) -> list[dict[str, Any]]:
+        """1ページ分のメッセージを取得する.
+
+        Args:
+            anchor: ページの起点となる messageNo
+
+        Returns:
+            list[dict[str, Any]]: 走査方向に並べたメッセージ
+        """
+        response = self.client.get_channel_info(
+            channel_no=self.channel_no,
+            message_no=str(anchor),
+            direction=self.direction,
+            recent_message_count=self.page_size,
+        )
+        messages = extract_messages(response)
+        messages.sort(key=lambda m: int(m["messageNo"]), reverse=self.backward)
+        return messages
+
+    def _in_range(self, anchor: int) -> bool:
+        """起点が走査範囲内かを判定する.
+
+        Args:
+            anchor: ページの起点となる messageNo
+
+        Returns:
+            bool: 範囲内の場合はTrue
+        """
+        if self.backward:
+            return anchor >= max(self.stop_message_no or 1, 1)
+        return self.stop_message_no is None or anchor <= self.stop_message_no
+
+    def _is_new(self, message_no: int, cursor: int | None) -> bool:
+        """カーソルより先のメッセージかを判定する.
+
+        Args:
+            message_no: メッセージ番号
+            cursor: 最後に返したメッセージ番号
+
+        Returns:
+            bool: まだ返していないメッセージの場合はTrue
+        """
+        if self.stop_message_no is not None and (
+            message_no < self.stop_message_no
+            if self.backward
+            else message_no > self.stop_message_no
+        ):
+            return False
+        if cursor is None:
+            return (
+                message_no <= self.start_message_no
+                if self.backward
+                else message_no >= self.start_message_no
+            )
+        return message_no < cursor if self.backward else message_no > cursor
+
+    @staticmethod
+    def _last_no(
+        messages: list[dict[str, Any]], cursor: int | None
+    ) -> int | None:
+        """最後のメッセージ番号を取得する.
+
+        Args:
+            messages: メッセージ
+            cursor: メッセージが無い場合に返す値
+
+        Returns:
+            int | None: メッセージ番号
+        """
+        return int(messages[-1]["messageNo"]) if messages else cursor
+
+    def _skip_gap(self, next_anchor: int, cursor: int | None) -> int:
+        """欠番でカーソルが予定の起点を越えた場合は起点を進める.
+
+        Args:
+            next_anchor: 次に先読みする起点
+            cursor: 最後に返したメッセージ番号
+
+        Returns:
+            int: 次に先読みする起点
+        """
+        if cursor is None:
+            return next_anchor
+        if self.backward:
+            return min(next_anchor, cursor - 1)
+        return max(next_anchor, cursor + 1)
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        """メッセージを走査方向の順に返す.
+
+        サーバーが page_size より少ない件数しか返さない場合 (件数の上限や
+        短いウィンドウ) は、そのページの最後のメッセージの次から起点を
+        取り直し、以降のページの間隔をその件数に合わせる. 間隔が合わなく
+        なった先読みは取り消す.
+
+        Yields:
+            dict[str, Any]: メッセージ
+        """
+        sign = -1 if self.backward else 1
+        stride = self.page_size
+        next_anchor = self.start_message_no
+        cursor: int | None = None
+        yielded = 0
+        # (起点, 取得結果) の先読み
+        pending: deque[tuple[int, Future[list[dict[str, Any]]]]] = deque()
+
+        with ThreadPoolExecutor(
+            max_workers=self.prefetch, thread_name_prefix="history"
+        ) as executor:
+
+            def fill() -> None:
+                nonlocal next_anchor
+                while len(pending) < self.prefetch and self._in_range(
+                    next_anchor
+                ):
+                    future = executor.submit(self._fetch, next_anchor)
+                    pending.append((next_anchor, future))
+                    self.requests += 1
+                    next_anchor += sign * stride
+
+            def discard() -> None:
+                while pending:
+                    pending.popleft()[1].cancel()
+
+            try:
+                fill()
+                while pending:
+                    anchor, future = pending.popleft()
+                    messages = future.result()
+                    if not messages:
+                        # 履歴の端に到達
+                        break
+                    fresh = [
+                        m
+                        for m in messages
+                        if self._is_new(int(m["messageNo"]), cursor)
+                    ]
+                    for message in fresh:
+                        yield message
+                        yielded += 1
+                        if self.limit is not None and yielded >= self.limit:
+                            return
+                    cursor = self._last_no(fresh, cursor)
+
+                    last = int(messages[-1]["messageNo"])
+                    if (last - anchor) * sign + 1 < stride:
+                        # ページが間隔の終わりまで届いていない
+                        stride = max(1, (last - anchor) * sign + 1)
+                        discard()
+                        next_anchor = self._skip_gap(last + sign, cursor)
+                    else:
+                        next_anchor = self._skip_gap(next_anchor, cursor)
+                    fill()
+            finally:
+                discard()
@@ -0,0 +1,458 @@
+"""無視するユーザーとチャンネルを管理するモジュール.
+
+ファイルの1行が1エントリで、次の形式を扱う.
+
+- ``12345``: ユーザー番号の完全一致
+- ``10000-19999``: ユーザー番号の範囲 (両端を含む)
+- ``channel:12345``: チャンネル単位 (そのチャンネルのメッセージをすべて無視)
+- ``#`` で始まる行: コメント
+"""
+
+import bisect
+import logging
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Final
+
+logger = logging.getLogger(__name__)
+
+# チャンネル単位のエントリの接頭辞
+CHANNEL_PREFIX: Final[str] = "channel:"
+
+# ファイルの更新を確認する間隔 (秒)
+DEFAULT_CHECK_INTERVAL: Final[float] = 5.0
+
+# 追記の判定に使う、前回読み込んだ末尾のバイト数
+TAIL_CHECK_BYTES: Final[int] = 64
+
+# 新しく作成するファイルの先頭行
+FILE_HEADER: Final[str] = "# 無視するIDのリスト\n"
+
+
+@dataclass(frozen=True)
+class Entry:
+    """無視リストのエントリ."""
+
+    kind: str  # "user", "range", "channel"
+    value: str
+    start: int = 0
+    end: int = 0
+
+    def __str__(self) -> str:
+        """ファイルに書き込む形式."""
+        if self.kind == "range":
+            return f"{self.start}-{self.end}"
+        if self.kind == "channel":
+            return f"{CHANNEL_PREFIX}{self.value}"
+        return self.value
+
+
+def parse_entry(line: str) -> Entry | None:
+    """1行をエントリに変換する.
+
+    Args:
+        line: ファイルの1行
+
+    Returns:
+        Entry | None: エントリ (空行、コメント、不正な行の場合None)
+    """
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    if line.startswith(CHANNEL_PREFIX):
+        channel_no = line[len(CHANNEL_PREFIX) :].strip()
+        return Entry("channel", channel_no) if channel_no else None
+    start, sep, end = line.partition("-")
+    if sep and start.strip().isdigit() and end.strip().isdigit():
+        low, high = sorted((int(start), int(end)))
+        return Entry("range", line, low, high)
+    if sep:
+        return None
+    return Entry("user", line)
+
+
+class IgnoreList:
+    """無視するユーザーとチャンネルを保持するクラス.
+
+    ファイルは初回のみ全体を解析し、以降は更新を検知したときだけ
+    読み直す. 末尾への追記であれば追記された行のみを解析する.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        check_interval: float = DEFAULT_CHECK_INTERVAL,
+        state: dict[str, Any] | None = None,
+    ) -> None:
+        """初期化.
+
+        Args:
+            path: 無視リストのファイル
+            check_interval: ファイルの更新を確認する間隔 (秒)
+            state: export_state で保存した状態 (ファイルが変わっていなければ
+                解析せずに使う)
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self._users: set[str] = set()
+        self._channels: set[str] = set()
+        self._ranges: list[tuple[int, int]] = []
+        # (開始のリスト, 終了のリスト) を1つの値として差し替える
+        self._range_index: tuple[list[int], list[int]] = ([], [])
+        self._signature: tuple[int, int, int] | None = None
+        self._offset = 0
+        self._tail = b""
+        # 前回の読み込みが改行で終わらない行を含んでいたか
+        self._partial = False
+        self._checked_at = float("-inf")
+        self._lock = threading.RLock()
+        if state is None or not self._restore_state(state):
+            self.reload()
+
+    def __len__(self) -> int:
+        """エントリ数."""
+        return len(self._users) + len(self._channels) + len(self._ranges)
+
+    def is_ignored(self, user_no: Any, channel_no: Any = None) -> bool:
+        """ユーザーまたはチャンネルが無視リストに含まれるかを判定する.
+
+        Args:
+            user_no: 送信者のユーザー番号
+            channel_no: チャンネル番号
+
+        Returns:
+            bool: 無視する場合はTrue
+        """
+        self.refresh()
+        user = str(user_no)
+        if user in self._users:
+            return True
+        if channel_no is not None and str(channel_no) in self._channels:
+            return True
+        starts, ends = self._range_index
+        if starts and user.isdigit():
+            number = int(user)
+            i = bisect.bisect_right(starts, number) - 1
+            if i >= 0 and number <= ends[i]:
+                return True
+        return False
+
+    def export_state(self) -> dict[str, Any] | None:
+        """解析済みの状態を取得する (スナップショット用).
+
+        Returns:
+            dict[str, Any] | None: 状態 (ファイルが無い場合None)
+        """
+        with self._lock:
+            if self._signature is None:
+                return None
+            return {
+                "signature": list(self._signature),
+                "offset": self._offset,
+                "tail": self._tail.hex(),
+                "partial": self._partial,
+                "users": sorted(self._users),
+                "channels": sorted(self._channels),
+                "ranges": [list(r) for r in self._ranges],
+            }
+
+    def _restore_state(self, state: dict[str, Any]) -> bool:
+        """保存した状態を復元する.
+
+        Args:
+            state: export_state で取得した状態
+
+        Returns:
+            bool: 復元した場合はTrue (ファイルが変わっている場合はFalse)
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        if list(signature) != state.get("signature"):
+            return False
+        with self._lock:
+            self._users = set(state["users"])
+            self._channels = set(state["channels"])
+            self._set_ranges([(s, e) for s, e in state["ranges"]])
+            self._offset = int(state["offset"])
+            self._tail = bytes.fromhex(state["tail"])
+            self._partial = bool(state.get("partial", True))
+            self._signature = signature
+        logger.info("Restored %d ignore entries for %s", len(self), self.path)
+        return True
+
+    def refresh(self) -> None:
+        """一定間隔でファイルの更新を確認し、更新されていれば読み直す."""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        self.reload()
+
+    def reload(self) -> None:
+        """ファイルの更新を反映する."""
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                if self._signature is not None:
+                    self._replace([])
+                    self._signature = None
+                return
+            except OSError as e:
+                logger.warning("Failed to stat %s: %s", self.path, e)
+                return
+
+            signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            if signature == self._signature:
+                return
+            try:
+                self._read(stat)
+            except OSError as e:
+                logger.warning("Failed to read %s: %s", self.path, e)
+                return
+            self._signature = signature
+
+    def _read(self, stat: os.stat_result) -> None:
+        """ファイルを読み込む (追記のみの場合は追記部分だけ).
+
+        Args:
+            stat: ファイルの情報
+        """
+        with open(self.path, "rb") as f:
+            appended = (
+                self._signature is not None
+                and stat.st_ino == self._signature[0]
+                and not self._partial
+                and stat.st_size > self._offset
+                and self._tail_matches(f)
+            )
+            if appended:
+                f.seek(self._offset)
+            data = f.read()
+
+        # 改行で終わらない最後の行は解析するが、書き込み途中の可能性が
+        # あるため、次回は追記とみなさずに全体を読み直す (追記として
+        # 読むと途中までの値がエントリに残り続ける)
+        complete = data[: data.rfind(b"\n") + 1]
+        self._partial = len(complete) < len(data)
+        base = self._offset if appended else 0
+        self._offset = base + len(complete)
+        self._tail = ((self._tail if appended else b"") + complete)[
+            -TAIL_CHECK_BYTES:
+        ]
+        entries = [
+            entry
+            for line in data.decode("utf-8", errors="replace").splitlines()
+            if (entry := parse_entry(line)) is not None
+        ]
+        if appended:
+            self._extend(entries)
+            logger.info(
+                "Loaded %d appended ignore entries from %s",
+                len(entries),
+                self.path,
+            )
+        else:
+            self._replace(entries)
+            logger.info(
+                "Loaded %d ignore entries from %s", len(self), self.path
+            )
+
+    def _tail_matches(self, f: Any) -> bool:
+        """前回読み込んだ末尾が変わっていないかを確認する.
+
+        Args:
+            f: 読み込み中のファイル
+
+        Returns:
+            bool: 変わっていない場合はTrue
+        """
+        f.seek(self._offset - len(self._tail))
+        matches = f.read(len(self._tail)) == self._tail
+        f.seek(0)
+        return matches
+
+    def _replace(self, entries: list[Entry]) -> None:
+        """エントリをすべて置き換える.
+
+        Args:
+            entries: エントリ
+        """
+        # 判定中のスレッドが不整合な状態を見ないよう、作成してから差し替える
+        self._users = {e.value for e in entries if e.kind == "user"}
+        self._channels = {e.value for e in entries if e.kind == "channel"}
+        self._set_ranges(
+            [(e.start, e.end) for e in entries if e.kind == "range"]
+        )
+
+    def _extend(self, entries: list[Entry]) -> None:
+        """エントリを追加する.
+
+        Args:
+            entries: エントリ
+        """
+        self._users.update(e.value for e in entries if e.kind == "user")
+        self._channels.update(e.value for e in entries if e.kind == "channel")
+        ranges = [(e.start, e.end) for e in entries if e.kind == "range"]
+        if ranges:
+            self._set_ranges(self._ranges + ranges)
+
+    def _set_ranges(self, ranges: list[tuple[int, int]]) -> None:
+        """範囲を重なりを統合して設定する.
+
+        Args:
+            ranges: (開始, 終了) のリスト
+        """
+        merged: list[tuple[int, int]] = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        self._range_index = (
+            [start for start, _ in merged],
+            [end for _, end in merged],
+        )
+        self._ranges = merged
+
+    def entries(self) -> list[Entry]:
+        """現在のエントリを取得する.
+
+        Returns:
+            list[Entry]: エントリ
+        """
+        with self._lock:
+            return [
+                *(Entry("user", user) for user in sorted(self._users)),
+                *(Entry("range", "", s, e) for s, e in self._ranges),
+                *(Entry("channel", c) for c in sorted(self._channels)),
+            ]
+
+    def add(self, line: str) -> Entry:
+        """エントリを追加してファイルに保存する.
+
+        Args:
+            line: エントリ (例: "12345", "100-200", "channel:12345")
+
+        Returns:
+            Entry: 追加したエントリ
+
+        Raises:
+            ValueError: エントリの形式が不正な場合
+        """
+        entry = parse_entry(line)
+        if entry is None:
+            raise ValueError(f"Invalid ignore entry: {line!r}")
+        with self._lock:
+            self.reload()
+            lines = self._read_lines()
+            if any(
+                str(parsed) == str(entry)
+                for raw in lines
+                if (parsed := parse_entry(raw)) is not None
+            ):
+                return entry
+            self._persist([*lines, f"{entry}\n"])
+            self._extend([entry])
+        return entry
+
+    def remove(self, line: str) -> bool:
+        """エントリを削除してファイルに保存する.
+
+        範囲のエントリは同じ範囲の行のみ削除する (部分的な削除は行わない).
+
+        Args:
+            line: エントリ
+
+        Returns:
+            bool: 削除した場合はTrue
+        """
+        entry = parse_entry(line)
+        if entry is None:
+            return False
+        with self._lock:
+            self.reload()
+            lines = self._read_lines()
+            kept = [
+                raw
+                for raw in lines
+                if (parsed := parse_entry(raw)) is None
+                or str(parsed) != str(entry)
+            ]
+            if len(kept) == len(lines):
+                return False
+            self._persist(kept)
+            self._replace(
+                [e for raw in kept if (e := parse_entry(raw)) is not None]
+            )
+        return True
+
+    def _read_lines(self) -> list[str]:
+        """ファイルの行をコメントを含めて読み込む.
+
+        Returns:
+            list[str]: 行 (ファイルが無い場合はヘッダーのみ)
+        """
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return [FILE_HEADER]
+        if lines and not lines[-1].endswith("\n"):
+            lines[-1] += "\n"
+        return lines
+
+    def _persist(self, lines: list[str]) -> None:
+        """行を一時ファイルに書き込んでから置き換える.
+
+        Args:
+            lines: 書き込む行
+        """
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.writelines(lines)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            os.unlink(tmp_path)
+            raise
+
+        # 自分の書き込みを再度読み込まないよう、読み込み位置を合わせる
+        stat = os.stat(self.path)
+        data = "".join(lines).encode("utf-8")
+        self._signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        self._offset = len(data)
+        self._tail = data[-TAIL_CHECK_BYTES:]
+        self._partial = bool(data) and not data.endswith(b"\n")
+
+
+_lists: dict[str, IgnoreList] = {}
+_lists_lock = threading.Lock()
+
+
+def get_ignore_list(
+    path: str, state: dict[str, Any] | None = None
+) -> IgnoreList:
+    """ファイルごとに共有する IgnoreList を取得する.
+
+    Args:
+        path: 無視リストのファイル
+        state: 作成する場合に使う保存済みの状態 (IgnoreList.export_state)
+
+    Returns:
+        IgnoreList: 共有のインスタンス
+    """
+    key = os.path.abspath(path)
+    with _lists_lock:
+        ignore_list = _lists.get(key)
+        if ignore_list is None:
+            ignore_list = _lists[key] = IgnoreList(path, state=state)
+        return ignore_list
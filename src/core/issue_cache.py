@@ -0,0 +1,131 @@
+"""障害情報 (issueDetail) の日付単位キャッシュを管理するモジュール."""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Final
+
+logger = logging.getLogger(__name__)
+
+# 当日分のキャッシュ有効期間 (秒)
+DEFAULT_TODAY_TTL: Final[float] = 300.0
+
+
+class IssueCache:
+    """日付をキーに障害情報を永続化するキャッシュ.
+
+    過去日の情報は変化しないため、その日が終わった後に取得した
+    エントリは無期限に有効とする. 当日 (またはその日のうちに取得した)
+    エントリは短いTTLで再取得する.
+    """
+
+    def __init__(
+        self, directory: str, today_ttl: float = DEFAULT_TODAY_TTL
+    ) -> None:
+        """初期化.
+
+        Args:
+            directory: キャッシュファイルを保存するディレクトリ
+            today_ttl: 確定していないエントリの有効期間 (秒)
+        """
+        self.directory = directory
+        self.today_ttl = today_ttl
+        self._memory: dict[tuple[date, str], dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, day: date, language: str) -> str:
+        """キャッシュファイルのパスを取得する.
+
+        Args:
+            day: 対象日
+            language: 言語
+
+        Returns:
+            str: ファイルパス
+        """
+        return os.path.join(
+            self.directory, f"{day.isoformat()}_{language}.json"
+        )
+
+    @staticmethod
+    def _is_final(day: date, fetched_at: float) -> bool:
+        """対象日が終わった後に取得したエントリかを判定する.
+
+        Args:
+            day: 対象日
+            fetched_at: 取得時刻 (UNIX秒)
+
+        Returns:
+            bool: 確定済みの場合はTrue
+        """
+        next_day = day + timedelta(days=1)
+        day_end = datetime.combine(next_day, datetime.min.time())
+        return fetched_at >= day_end.timestamp()
+
+    def _load(self, day: date, language: str) -> dict[str, Any] | None:
+        """メモリまたはファイルからエントリを読み込む.
+
+        Args:
+            day: 対象日
+            language: 言語
+
+        Returns:
+            dict[str, Any] | None: エントリ (存在しない場合None)
+        """
+        key = (day, language)
+        with self._lock:
+            entry = self._memory.get(key)
+        if entry is not None:
+            return entry
+        try:
+            with open(self._path(day, language), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            self._memory[key] = entry
+        return entry
+
+    def get(self, day: date, language: str) -> list[Any] | None:
+        """有効なキャッシュを取得する.
+
+        Args:
+            day: 対象日
+            language: 言語
+
+        Returns:
+            list[Any] | None: 障害情報 (無効または未取得の場合None)
+        """
+        entry = self._load(day, language)
+        if entry is None:
+            return None
+        fetched_at = float(entry.get("fetched_at", 0))
+        if self._is_final(day, fetched_at):
+            return entry.get("issues")
+        if time.time() - fetched_at < self.today_ttl:
+            return entry.get("issues")
+        return None
+
+    def put(self, day: date, language: str, issues: list[Any]) -> None:
+        """エントリを保存する (一時ファイルへの書き込み後にリネーム).
+
+        Args:
+            day: 対象日
+            language: 言語
+            issues: 障害情報
+        """
+        entry = {"fetched_at": time.time(), "issues": issues}
+        with self._lock:
+            self._memory[(day, language)] = entry
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(day, language))
+        except OSError as e:
+            logger.warning("Failed to persist issue cache: %s", e)
@@ -0,0 +1,366 @@
+"""MQTT接続の状態と遅延を監視するモジュール.
+
+受信したすべてのパケットの時刻を記録し、次の値を直近の一定件数で
+集計する.
+
+- キープアライブの往復時間 (PINGREQ の送信から PINGRESP の受信まで)
+- PUBLISH の受信間隔
+- メッセージの作成時刻 (createTime) から処理開始までの遅延
+
+接続中にパケットが一定時間届かない場合は、切断を検知できていない
+無応答の状態とみなして警告する.
+"""
+
+import asyncio
+import bisect
+import logging
+import threading
+import time
+from collections import Counter, deque
+from collections.abc import Callable
+from typing import Any, Final
+
+from line_works.mqtt import config as mqtt_config
+from line_works.mqtt import packets
+from line_works.mqtt.enums.packet_type import PacketType
+from line_works.tracer import LineWorksTracer
+from pydantic import PrivateAttr
+
+logger = logging.getLogger(__name__)
+
+# 集計に使う直近のサンプル数
+DEFAULT_WINDOW: Final[int] = 512
+
+# パケットが届かない場合に無応答とみなす時間 (秒)
+DEFAULT_STALL_AFTER: Final[float] = 45.0
+
+# 無応答を確認する間隔 (秒)
+DEFAULT_CHECK_INTERVAL: Final[float] = 5.0
+
+# 集計する百分位
+PERCENTILES: Final[tuple[int, ...]] = (50, 90, 99)
+
+
+class RollingWindow:
+    """直近のサンプルを保持し、百分位を計算するクラス.
+
+    サンプルを到着順と昇順の2つで保持するため、百分位の計算で
+    並べ替えを行わない.
+    """
+
+    def __init__(self, size: int = DEFAULT_WINDOW) -> None:
+        """初期化.
+
+        Args:
+            size: 保持するサンプル数
+        """
+        self.size = size
+        self._order: deque[float] = deque()
+        self._sorted: list[float] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """保持しているサンプル数."""
+        return len(self._order)
+
+    def add(self, value: float) -> None:
+        """サンプルを追加する (上限を超えた場合は最も古いものを捨てる).
+
+        Args:
+            value: サンプル
+        """
+        with self._lock:
+            if len(self._order) >= self.size:
+                oldest = self._order.popleft()
+                del self._sorted[bisect.bisect_left(self._sorted, oldest)]
+            self._order.append(value)
+            bisect.insort(self._sorted, value)
+
+    def percentile(self, q: float) -> float | None:
+        """百分位を計算する (最近傍順位法).
+
+        Args:
+            q: 百分位 (0〜100)
+
+        Returns:
+            float | None: 値 (サンプルが無い場合None)
+        """
+        with self._lock:
+            if not self._sorted:
+                return None
+            rank = max(1, -(-len(self._sorted) * q // 100))
+            return self._sorted[min(int(rank), len(self._sorted)) - 1]
+
+    def summary(self, scale: float = 1.0) -> dict[str, float | None]:
+        """百分位と最大値をまとめて取得する.
+
+        Args:
+            scale: 値に掛ける係数 (秒をミリ秒にする場合は1000)
+
+        Returns:
+            dict[str, float | None]: "p50" などをキーにした値
+        """
+        result: dict[str, float | None] = {}
+        for q in PERCENTILES:
+            value = self.percentile(q)
+            result[f"p{q}"] = None if value is None else round(value * scale)
+        value = self.percentile(100)
+        result["max"] = None if value is None else round(value * scale)
+        return result
+
+
+class LinkMonitor:
+    """1つのMQTT接続の状態と遅延を集計するクラス."""
+
+    def __init__(
+        self,
+        name: str = "tracer",
+        stall_after: float = DEFAULT_STALL_AFTER,
+        window: int = DEFAULT_WINDOW,
+        check_interval: float = DEFAULT_CHECK_INTERVAL,
+        on_stall: Callable[["LinkMonitor", float], None] | None = None,
+    ) -> None:
+        """初期化.
+
+        Args:
+            name: ログに表示する名前
+            stall_after: パケットが届かない場合に無応答とみなす時間 (秒,
+                0 以下で監視しない)
+            window: 集計に使う直近のサンプル数
+            check_interval: 無応答を確認する間隔 (秒)
+            on_stall: 無応答を検知した場合に呼ぶ関数 (経過秒数を渡す)
+        """
+        self.name = name
+        self.stall_after = stall_after
+        self.check_interval = check_interval
+        self.on_stall = on_stall
+        self.rtt = RollingWindow(window)
+        self.publish_gaps = RollingWindow(window)
+        self.delays = RollingWindow(window)
+        self.packets: Counter[str] = Counter()
+        self.stalls = 0
+        self._connected = False
+        self._stalled = False
+        self._last_packet_at: float | None = None
+        self._last_publish_at: float | None = None
+        self._pings: deque[float] = deque()
+        self._lock = threading.Lock()
+        self._watchdog: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def on_connected(self) -> None:
+        """接続の完了 (CONNACK の受信) を記録し、無応答の監視を始める."""
+        with self._lock:
+            self._connected = True
+            self._stalled = False
+            self._last_packet_at = time.monotonic()
+            self._last_publish_at = None
+            self._pings.clear()
+            if self._watchdog is None and self.stall_after > 0:
+                self._watchdog = threading.Thread(
+                    target=self._watch,
+                    name=f"link-monitor-{self.name}",
+                    daemon=True,
+                )
+                self._watchdog.start()
+
+    def on_disconnected(self) -> None:
+        """切断を記録する (再接続まで無応答の監視を止める)."""
+        with self._lock:
+            self._connected = False
+            self._pings.clear()
+
+    def on_ping_sent(self) -> None:
+        """PINGREQ の送信を記録する."""
+        with self._lock:
+            self._pings.append(time.monotonic())
+
+    def on_packet(self, packet_type: int) -> None:
+        """パケットの受信を記録する.
+
+        Args:
+            packet_type: パケット種別
+        """
+        now = time.monotonic()
+        try:
+            label = PacketType(packet_type).name
+        except ValueError:
+            label = str(packet_type)
+        with self._lock:
+            self.packets[label] += 1
+            self._last_packet_at = now
+            recovered = self._stalled
+            self._stalled = False
+            rtt = None
+            if packet_type == PacketType.PINGRESP and self._pings:
+                rtt = now - self._pings.popleft()
+            gap = None
+            if packet_type == PacketType.PUBLISH:
+                if self._last_publish_at is not None:
+                    gap = now - self._last_publish_at
+                self._last_publish_at = now
+        if rtt is not None:
+            self.rtt.add(rtt)
+        if gap is not None:
+            self.publish_gaps.add(gap)
+        if recovered:
+            logger.info(
+                "[%s] MQTT link is receiving packets again",
+                self.name,
+                extra={"event": "link_recovered"},
+            )
+
+    def observe_delay(self, create_time: Any) -> None:
+        """メッセージの作成から処理開始までの遅延を記録する.
+
+        Args:
+            create_time: メッセージの作成時刻 (UNIXミリ秒)
+        """
+        try:
+            created = float(create_time) / 1000
+        except (TypeError, ValueError):
+            return
+        if created <= 0:
+            return
+        # サーバーとの時計のずれで負になった値は0とみなす
+        self.delays.add(max(0.0, time.time() - created))
+
+    def idle_seconds(self) -> float | None:
+        """最後にパケットを受信してからの経過時間.
+
+        Returns:
+            float | None: 経過時間 (秒, 未受信の場合None)
+        """
+        last = self._last_packet_at
+        return None if last is None else time.monotonic() - last
+
+    def _watch(self) -> None:
+        """無応答を監視するループ."""
+        while not self._stop.wait(self.check_interval):
+            self.check_stall()
+
+    def check_stall(self) -> bool:
+        """接続中にパケットが届いていない時間を確認する.
+
+        Returns:
+            bool: 新たに無応答を検知した場合はTrue
+        """
+        idle = self.idle_seconds()
+        with self._lock:
+            if (
+                not self._connected
+                or self._stalled
+                or idle is None
+                or idle < self.stall_after
+            ):
+                return False
+            self._stalled = True
+            self.stalls += 1
+        logger.warning(
+            "[%s] No MQTT packets for %.0fs; the link may be dead",
+            self.name,
+            idle,
+            extra={"event": "link_stall"},
+        )
+        if self.on_stall is not None:
+            try:
+                self.on_stall(self, idle)
+            except Exception as e:
+                logger.error("[%s] Stall callback failed: %s", self.name, e)
+        return True
+
+    def stop(self) -> None:
+        """無応答の監視を止める."""
+        self._stop.set()
+
+    def stats(self) -> dict[str, Any]:
+        """集計結果を取得する.
+
+        Returns:
+            dict[str, Any]: 集計結果 (時間はミリ秒)
+        """
+        idle = self.idle_seconds()
+        with self._lock:
+            packets = dict(self.packets)
+            connected, stalled = self._connected, self._stalled
+        return {
+            "connected": connected,
+            "stalled": stalled,
+            "stalls": self.stalls,
+            "idle_seconds": None if idle is None else round(idle, 1),
+            "packets": packets,
+            "rtt_ms": self.rtt.summary(1000),
+            "publish_gap_ms": self.publish_gaps.summary(1000),
+            "delay_ms": self.delays.summary(1000),
+        }
+
+
+class MonitoredTracer(LineWorksTracer):
+    """受信したすべてのパケットとキープアライブを監視するトレーサー.
+
+    SDK は PINGRESP をトレース関数に渡さず、PINGREQ の送信も内部で
+    行うため、その2箇所を上書きして LinkMonitor に記録する.
+    """
+
+    _monitor: LinkMonitor | None = PrivateAttr(default=None)
+
+    def set_monitor(self, monitor: LinkMonitor) -> None:
+        """記録先を設定する.
+
+        Args:
+            monitor: 記録先
+        """
+        self._monitor = monitor
+
+    async def _MQTTClient__send_pingreq(self) -> None:  # noqa: N802
+        """キープアライブを送信し、送信時刻を記録する."""
+        while True:
+            await asyncio.sleep(mqtt_config.KEEPALIVE_INTERVAL_SEC)
+            if self._monitor is not None:
+                self._monitor.on_ping_sent()
+            await self._ws.send(packets.PINGREQ_PACKET)
+
+    async def _MQTTClient__handle_binary_message(  # noqa: N802
+        self, message: bytes
+    ) -> None:
+        """パケットの受信を記録してから SDK の処理に渡す.
+
+        Args:
+            message: 受信したバイト列
+        """
+        if self._monitor is not None and message:
+            self._monitor.on_packet(message[0] >> 4)
+        await super()._MQTTClient__handle_binary_message(message)
+
+
+_monitors: dict[str, LinkMonitor] = {}
+_monitors_lock = threading.Lock()
+
+
+def get_link_monitor(
+    name: str, stall_after: float = DEFAULT_STALL_AFTER
+) -> LinkMonitor:
+    """接続ごとに共有する LinkMonitor を取得する.
+
+    Args:
+        name: 接続の名前 (アカウント名など)
+        stall_after: 作成する場合の無応答とみなす時間 (秒)
+
+    Returns:
+        LinkMonitor: 共有のインスタンス
+    """
+    with _monitors_lock:
+        monitor = _monitors.get(name)
+        if monitor is None:
+            monitor = _monitors[name] = LinkMonitor(name, stall_after)
+        return monitor
+
+
+def get_link_monitors() -> list[LinkMonitor]:
+    """作成済みの LinkMonitor を取得する.
+
+    Returns:
+        list[LinkMonitor]: 作成した順の LinkMonitor
+    """
+    with _monitors_lock:
+        return list(_monitors.values())
@@ -0,0 +1,270 @@
+"""ノンブロッキングな構造化ログの設定を管理するモジュール.
+
+ログの書き込みは QueueListener のスレッドで行い、呼び出し元 (トレーサーの
+スレッドなど) ではレコードをキューに積むだけにする.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Final
+
+from config.config import (
+    LOG_BACKUP_COUNT,
+    LOG_FILE,
+    LOG_LEVEL,
+    LOG_MAX_BYTES,
+    LOG_MAX_FIELD_LENGTH,
+    LOG_SAMPLING,
+)
+from core import codec
+from core.serializer import truncate
+
+# LogRecordの標準属性 (これ以外は extra として出力する)
+_RECORD_ATTRS: Final[frozenset[str]] = frozenset(
+    vars(logging.LogRecord("", 0, "", 0, "", (), None))
+) | {"message", "asctime", "taskName"}
+
+_listener: QueueListener | None = None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """レコードを1行のJSONに整形するフォーマッター."""
+
+    def __init__(self, max_field_length: int) -> None:
+        """初期化.
+
+        Args:
+            max_field_length: メッセージや付加情報の最大長
+        """
+        super().__init__()
+        self.max_field_length = max_field_length
+
+    def format(self, record: logging.LogRecord) -> str:
+        """レコードをJSON文字列に変換する.
+
+        Args:
+            record: ログレコード
+
+        Returns:
+            str: JSON文字列
+        """
+        data: dict[str, Any] = {
+            "ts": datetime.fromtimestamp(
+                record.created, tz=timezone.utc
+            ).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": truncate(record.getMessage(), self.max_field_length),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                data[key] = self._cap(value)
+        if record.exc_info:
+            data["exc"] = truncate(
+                self.formatException(record.exc_info), self.max_field_length
+            )
+        return codec.dumps(data, default=str)
+
+    def _cap(self, value: Any) -> Any:
+        """付加情報の値を最大長に収める.
+
+        Args:
+            value: 値
+
+        Returns:
+            Any: JSONに変換可能な値
+        """
+        if isinstance(value, bool | int | float) or value is None:
+            return value
+        if not isinstance(value, str):
+            value = codec.dumps(value, default=str)
+        return truncate(value, self.max_field_length)
+
+
+class SamplingFilter(logging.Filter):
+    """ロガーごとにDEBUGレコードを間引くフィルター."""
+
+    def __init__(self, rates: dict[str, float]) -> None:
+        """初期化.
+
+        Args:
+            rates: ロガー名 (前方一致) と通過させる割合 (0.0-1.0)
+        """
+        super().__init__()
+        self.rates = rates
+        self._resolved: dict[str, float] = {}
+
+    def _rate_for(self, name: str) -> float:
+        """ロガー名に適用する割合を階層をたどって求める.
+
+        Args:
+            name: ロガー名
+
+        Returns:
+            float: 通過させる割合
+        """
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate = 1.0
+            parts = name.split(".")
+            for i in range(len(parts), 0, -1):
+                prefix = ".".join(parts[:i])
+                if prefix in self.rates:
+                    rate = self.rates[prefix]
+                    break
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """レコードを通過させるかを判定する.
+
+        Args:
+            record: ログレコード
+
+        Returns:
+            bool: 通過させる場合はTrue
+        """
+        if record.levelno > logging.DEBUG:
+            return True
+        rate = self._rate_for(record.name)
+        return rate >= 1.0 or random.random() < rate  # noqa: S311
+
+
+class DeferredQueueHandler(QueueHandler):
+    """メッセージの整形をリスナー側に任せる QueueHandler.
+
+    標準の QueueHandler は enqueue 前に format を行うため、呼び出し元の
+    スレッドで文字列化のコストが発生する. ここではレコードをそのまま渡す.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """レコードをそのまま返す.
+
+        Args:
+            record: ログレコード
+
+        Returns:
+            logging.LogRecord: 同じレコード
+        """
+        return record
+
+
+def parse_sampling(spec: str) -> dict[str, float]:
+    """「logger=rate,logger=rate」形式の設定を解析する.
+
+    Args:
+        spec: 設定文字列
+
+    Returns:
+        dict[str, float]: ロガー名と割合の辞書
+    """
+    rates: dict[str, float] = {}
+    for item in spec.split(","):
+        name, sep, rate = item.strip().partition("=")
+        if not sep:
+            continue
+        try:
+            rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+        except ValueError:
+            continue
+    return rates
+
+
+def setup_logging(
+    log_file: str,
+    level: str = "INFO",
+    max_bytes: int = 5 * 1024 * 1024,
+    backup_count: int = 5,
+    max_field_length: int = 1000,
+    sampling: dict[str, float] | None = None,
+) -> QueueListener:
+    """ルートロガーにキュー経由のJSON Linesログを設定する.
+
+    Args:
+        log_file: 出力先のファイルパス
+        level: ログレベル
+        max_bytes: ローテーションするファイルサイズ
+        backup_count: 保持する世代数
+        max_field_length: メッセージや付加情報の最大長
+        sampling: ロガーごとのDEBUGレコードの通過割合
+
+    Returns:
+        QueueListener: 開始済みのリスナー
+    """
+    global _listener
+
+    if _listener is None:
+        atexit.register(shutdown_logging)
+    else:
+        _listener.stop()
+
+    directory = os.path.dirname(log_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    file_handler = RotatingFileHandler(
+        log_file,
+        maxBytes=max_bytes,
+        backupCount=backup_count,
+        encoding="utf-8",
+    )
+    file_handler.setFormatter(JsonLinesFormatter(max_field_length))
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setLevel(logging.INFO)
+    stream_handler.setFormatter(
+        logging.Formatter(
+            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+        )
+    )
+
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    if sampling:
+        queue_handler.addFilter(SamplingFilter(sampling))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper())
+
+    _listener = QueueListener(
+        log_queue, file_handler, stream_handler, respect_handler_level=True
+    )
+    _listener.start()
+    return _listener
+
+
+def configure_logging(log_file: str = LOG_FILE) -> QueueListener:
+    """環境変数の設定に従ってログを設定する.
+
+    Args:
+        log_file: 出力先のファイルパス
+
+    Returns:
+        QueueListener: 開始済みのリスナー
+    """
+    return setup_logging(
+        log_file,
+        level=LOG_LEVEL,
+        max_bytes=LOG_MAX_BYTES,
+        backup_count=LOG_BACKUP_COUNT,
+        max_field_length=LOG_MAX_FIELD_LENGTH,
+        sampling=parse_sampling(LOG_SAMPLING),
+    )
+
+
+def shutdown_logging() -> None:
+    """キューに残ったレコードを書き出してリスナーを停止する."""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,316 @@
+"""複数アカウントを1プロセスで動かすモジュール.
+
+各アカウントはそれぞれのトレーサーをスレッドで動かし、受信した
+メッセージの処理は共有のスレッドプールに渡す. テンプレートやキャッシュは
+モジュール単位で共有されるため、アカウントごとに重複して読み込まない.
+"""
+
+import atexit
+import functools
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Final
+
+from line_works.client import LineWorks
+from line_works.mqtt.enums.packet_type import PacketType
+from line_works.mqtt.models.packet import MQTTPacket
+
+from config.accounts import AccountConfig, AccountsConfig
+from config.config import (
+    CACHE_DIR,
+    CATCH_UP,
+    CATCH_UP_MAX_MESSAGES,
+    CATCH_UP_WORKERS,
+    LINK_STALL_SECONDS,
+    RECONNECT_BASE_DELAY,
+    RECONNECT_MAX_DELAY,
+)
+from core.catchup import CatchUp, HighWaterMarks
+from core.handlers.message_handler import MessageHandler
+from core.link_monitor import get_link_monitor
+from core.supervisor import TracerSupervisor
+from custom_line_works import CustomLineWorks
+
+logger = logging.getLogger(__name__)
+
+# メトリクスをログに出力する間隔 (秒)
+DEFAULT_METRICS_INTERVAL: Final[float] = 300.0
+
+
+@dataclass
+class AccountMetrics:
+    """アカウントごとの処理メトリクス."""
+
+    received: int = 0
+    handled: int = 0
+    errors: int = 0
+    handle_seconds: float = 0.0
+    last_received_at: float | None = None
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    def record_received(self) -> None:
+        """メッセージの受信を記録する."""
+        with self._lock:
+            self.received += 1
+            self.last_received_at = time.time()
+
+    def record_handled(self, elapsed: float, error: bool = False) -> None:
+        """メッセージの処理結果を記録する.
+
+        Args:
+            elapsed: 処理時間 (秒)
+            error: 処理中に例外が発生した場合はTrue
+        """
+        with self._lock:
+            self.handled += 1
+            self.handle_seconds += elapsed
+            if error:
+                self.errors += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        """メトリクスを辞書に変換する.
+
+        Returns:
+            dict[str, Any]: メトリクス
+        """
+        with self._lock:
+            return {
+                "received": self.received,
+                "handled": self.handled,
+                "pending": self.received - self.handled,
+                "errors": self.errors,
+                "avg_handle_ms": (
+                    round(self.handle_seconds / self.handled * 1000, 1)
+                    if self.handled
+                    else 0.0
+                ),
+                "last_received_at": self.last_received_at,
+            }
+
+
+class BotAccount:
+    """1アカウント分のトレーサーとメッセージハンドラー."""
+
+    def __init__(
+        self,
+        config: AccountConfig,
+        executor: Executor,
+        extract_payload: Callable[[MQTTPacket], Any | None],
+    ) -> None:
+        """初期化.
+
+        Args:
+            config: アカウント設定
+            executor: メッセージ処理に使う共有のExecutor
+            extract_payload: パケットから処理対象のペイロードを取り出す関数
+        """
+        self.config = config
+        self.executor = executor
+        self.extract_payload = extract_payload
+        self.handler = MessageHandler(
+            ignored_ids_path=config.ignore_file, commands=config.commands
+        )
+        self.metrics = AccountMetrics()
+        self.monitor = get_link_monitor(config.name, LINK_STALL_SECONDS)
+        self.works: LineWorks | None = None
+        self.supervisor: TracerSupervisor | None = None
+        self.catch_up: CatchUp | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def name(self) -> str:
+        """アカウント名."""
+        return self.config.name
+
+    def receive_publish_packet(
+        self, works: LineWorks, packet: MQTTPacket
+    ) -> None:
+        """パブリッシュパケットを受信し、処理を共有プールに渡す.
+
+        Args:
+            works: LineWorksクライアント
+            packet: 受信したMQTTパケット
+        """
+        payload = self.extract_payload(packet)
+        if payload is None:
+            return
+        if self.catch_up is not None:
+            self.catch_up.observe(payload)
+        self.metrics.record_received()
+        self.executor.submit(self._handle, works, payload)
+
+    def _handle(self, works: LineWorks, payload: Any) -> None:
+        """メッセージを処理し、メトリクスを記録する.
+
+        Args:
+            works: LineWorksクライアント
+            payload: メッセージペイロード
+        """
+        self.monitor.observe_delay(getattr(payload, "create_time", None))
+        start = time.perf_counter()
+        error = False
+        try:
+            self.handler.handle_message(works, payload)
+        except Exception as e:
+            error = True
+            logger.error("[%s] Error handling message: %s", self.name, e)
+        finally:
+            self.metrics.record_handled(time.perf_counter() - start, error)
+
+    def run(self) -> None:
+        """ログインしてトレーサーを動かす (切断されるまで戻らない)."""
+        self.works = LineWorks(
+            works_id=self.config.works_id, password=self.config.password
+        )
+        if CATCH_UP:
+            self.catch_up = self._start_catch_up(self.works)
+        self.supervisor = TracerSupervisor(
+            self.works,
+            {PacketType.PUBLISH: self.receive_publish_packet},
+            base_delay=RECONNECT_BASE_DELAY,
+            max_delay=RECONNECT_MAX_DELAY,
+            name=self.name,
+            monitor=self.monitor,
+        )
+        logger.info("[%s] Tracer started", self.name)
+        self.supervisor.run()
+
+    def _start_catch_up(self, works: LineWorks) -> CatchUp:
+        """取りこぼしたメッセージの処理をバックグラウンドで開始する.
+
+        Args:
+            works: ログイン済みのLineWorksクライアント
+
+        Returns:
+            CatchUp: ライブ受信の記録にも使うキャッチアップ
+        """
+        marks = HighWaterMarks(
+            os.path.join(CACHE_DIR, f"high_water_marks_{self.name}.json")
+        )
+        atexit.register(marks.save)
+        catch_up = CatchUp(
+            # ログインはライブ受信を遅らせないよう別スレッドで行う
+            functools.partial(
+                CustomLineWorks,
+                works_id=self.config.works_id,
+                password=self.config.password,
+            ),
+            works,
+            self.handler.handle_message,
+            marks,
+            max_messages=CATCH_UP_MAX_MESSAGES,
+            workers=CATCH_UP_WORKERS,
+        )
+        catch_up.start()
+        return catch_up
+
+    def _run_safely(self) -> None:
+        """スレッドのエントリポイント."""
+        try:
+            self.run()
+        except Exception as e:
+            logger.error("[%s] Tracer stopped: %s", self.name, e)
+
+    def start(self) -> threading.Thread:
+        """トレーサーをスレッドで開始する.
+
+        Returns:
+            threading.Thread: トレーサーのスレッド
+        """
+        self._thread = threading.Thread(
+            target=self._run_safely,
+            name=f"tracer-{self.name}",
+            daemon=True,
+        )
+        self._thread.start()
+        return self._thread
+
+    def is_alive(self) -> bool:
+        """トレーサーのスレッドが動作中かを判定する.
+
+        Returns:
+            bool: 動作中の場合はTrue
+        """
+        return bool(self._thread and self._thread.is_alive())
+
+    def join(self, timeout: float | None = None) -> None:
+        """トレーサーのスレッドの終了を待つ.
+
+        Args:
+            timeout: 最大待ち時間 (秒)
+        """
+        if self._thread:
+            self._thread.join(timeout)
+
+
+class MultiAccountBot:
+    """複数のアカウントを共有のスレッドプールで動かすクラス."""
+
+    def __init__(
+        self,
+        config: AccountsConfig,
+        extract_payload: Callable[[MQTTPacket], Any | None],
+        metrics_interval: float = DEFAULT_METRICS_INTERVAL,
+    ) -> None:
+        """初期化.
+
+        Args:
+            config: 複数アカウントモードの設定
+            extract_payload: パケットから処理対象のペイロードを取り出す関数
+            metrics_interval: メトリクスをログに出力する間隔 (秒)
+        """
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, config.dispatch_workers),
+            thread_name_prefix="dispatch",
+        )
+        self.accounts = [
+            BotAccount(account, self.executor, extract_payload)
+            for account in config.accounts
+        ]
+        self.metrics_interval = metrics_interval
+
+    def metrics(self) -> dict[str, dict[str, Any]]:
+        """全アカウントのメトリクスを取得する.
+
+        Returns:
+            dict[str, dict[str, Any]]: アカウント名ごとのメトリクス
+        """
+        result = {}
+        for account in self.accounts:
+            metrics = account.metrics.as_dict()
+            if account.supervisor:
+                metrics.update(account.supervisor.stats.as_dict())
+            metrics["link"] = account.monitor.stats()
+            result[account.name] = metrics
+        return result
+
+    def log_metrics(self) -> None:
+        """全アカウントのメトリクスをログに出力する."""
+        for name, metrics in self.metrics().items():
+            logger.info(
+                "[%s] %s",
+                name,
+                metrics,
+                extra={"event": "account_metrics", "account": name},
+            )
+
+    def run(self) -> None:
+        """全アカウントのトレーサーを開始し、全て停止するまで待つ."""
+        for account in self.accounts:
+            account.start()
+        try:
+            while any(a.is_alive() for a in self.accounts):
+                deadline = time.monotonic() + self.metrics_interval
+                for account in self.accounts:
+                    account.join(max(0.0, deadline - time.monotonic()))
+                self.log_metrics()
+        finally:
+            self.executor.shutdown(wait=True)
+            self.log_metrics()
@@ -0,0 +1,104 @@
+"""ページ送りするコマンドの結果をチャンネル単位で保持するモジュール."""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Final
+
+# 取得結果を使い回す期間 (秒)
+DEFAULT_TTL: Final[float] = 300.0
+
+
+@dataclass
+class PageEntry:
+    """取得済みの一覧と最後に表示したページ."""
+
+    items: list[Any]
+    fetched_at: float
+    page: int = 0
+
+
+class PageCache:
+    """(チャンネル, 種類) ごとに一覧とページカーソルを保持するクラス."""
+
+    def __init__(self, ttl: float = DEFAULT_TTL) -> None:
+        """初期化.
+
+        Args:
+            ttl: 取得結果を使い回す期間 (秒)
+        """
+        self.ttl = ttl
+        self._entries: dict[tuple[str, str], PageEntry] = {}
+        self._lock = threading.Lock()
+
+    def get(self, channel_no: Any, kind: str) -> PageEntry | None:
+        """有効なエントリを取得する.
+
+        Args:
+            channel_no: チャンネル番号
+            kind: 一覧の種類 (例: "friends")
+
+        Returns:
+            PageEntry | None: エントリ (期限切れまたは未取得の場合None)
+        """
+        key = (str(channel_no), kind)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry.fetched_at >= self.ttl:
+                del self._entries[key]
+                return None
+            return entry
+
+    def put(self, channel_no: Any, kind: str, items: list[Any]) -> PageEntry:
+        """取得した一覧を保存する.
+
+        Args:
+            channel_no: チャンネル番号
+            kind: 一覧の種類
+            items: 取得した一覧
+
+        Returns:
+            PageEntry: 保存したエントリ
+        """
+        entry = PageEntry(items=items, fetched_at=time.monotonic())
+        with self._lock:
+            self._entries[(str(channel_no), kind)] = entry
+        return entry
+
+    def export(self) -> list[list[Any]]:
+        """有効なエントリを取得する (スナップショット用).
+
+        Returns:
+            list[list[Any]]: [チャンネル番号, 種類, 取得時刻 (UNIX秒),
+                ページ, 一覧] のリスト
+        """
+        now, offset = time.monotonic(), time.time() - time.monotonic()
+        with self._lock:
+            return [
+                [
+                    channel_no,
+                    kind,
+                    entry.fetched_at + offset,
+                    entry.page,
+                    entry.items,
+                ]
+                for (channel_no, kind), entry in self._entries.items()
+                if now - entry.fetched_at < self.ttl
+            ]
+
+    def restore(self, entries: list[list[Any]]) -> None:
+        """エントリを復元する (スナップショット用, 期限切れは除く).
+
+        Args:
+            entries: export で取得したエントリ
+        """
+        offset = time.time() - time.monotonic()
+        with self._lock:
+            for channel_no, kind, fetched_at, page, items in entries:
+                entry = PageEntry(
+                    items=items, fetched_at=fetched_at - offset, page=page
+                )
+                if time.monotonic() - entry.fetched_at < self.ttl:
+                    self._entries.setdefault((channel_no, kind), entry)
@@ -0,0 +1,124 @@
+"""ユーザーのプロフィール (contact/v4/users) を保持するモジュール."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Final
+
+# プロフィールを使い回す期間 (秒)
+DEFAULT_TTL: Final[float] = 3600.0
+
+# 保持するプロフィールの上限 (超えた場合は古く使われたものから捨てる)
+DEFAULT_MAX_ENTRIES: Final[int] = 5000
+
+
+class ProfileCache:
+    """ユーザーIDごとにプロフィールを期限付きで保持するクラス."""
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        """初期化.
+
+        Args:
+            ttl: プロフィールを使い回す期間 (秒)
+            max_entries: 保持するプロフィールの上限
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # キー -> (取得時刻 (UNIX秒), プロフィール)
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(user_id: Any, domain_id: Any) -> str:
+        """キーを作成する.
+
+        Args:
+            user_id: ユーザーID
+            domain_id: ドメインID
+
+        Returns:
+            str: キー
+        """
+        return f"{domain_id}:{user_id}"
+
+    def __len__(self) -> int:
+        """保持しているプロフィール数."""
+        return len(self._entries)
+
+    def get(self, user_id: Any, domain_id: Any = 0) -> dict[str, Any] | None:
+        """有効なプロフィールを取得する.
+
+        Args:
+            user_id: ユーザーID
+            domain_id: ドメインID
+
+        Returns:
+            dict[str, Any] | None: プロフィール (期限切れや未取得の場合None)
+        """
+        key = self._key(user_id, domain_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry[0] >= self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(
+        self,
+        user_id: Any,
+        domain_id: Any,
+        profile: dict[str, Any],
+        fetched_at: float | None = None,
+    ) -> None:
+        """プロフィールを保存する.
+
+        Args:
+            user_id: ユーザーID
+            domain_id: ドメインID
+            profile: プロフィール
+            fetched_at: 取得時刻 (UNIX秒, 省略時は現在時刻)
+        """
+        key = self._key(user_id, domain_id)
+        entry = (time.time() if fetched_at is None else fetched_at, profile)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def export(self) -> list[list[Any]]:
+        """有効なエントリを取得する (スナップショット用).
+
+        Returns:
+            list[list[Any]]: [キー, 取得時刻, プロフィール] のリスト
+        """
+        now = time.time()
+        with self._lock:
+            return [
+                [key, fetched_at, profile]
+                for key, (fetched_at, profile) in self._entries.items()
+                if now - fetched_at < self.ttl
+            ]
+
+    def restore(self, entries: list[list[Any]]) -> None:
+        """エントリを復元する (スナップショット用, 期限切れは除く).
+
+        Args:
+            entries: export で取得したエントリ
+        """
+        now = time.time()
+        with self._lock:
+            for key, fetched_at, profile in entries:
+                if now - fetched_at < self.ttl and key not in self._entries:
+                    self._entries[key] = (fetched_at, profile)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
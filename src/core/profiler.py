@@ -0,0 +1,415 @@
+"""稼働中のボットを一定期間だけプロファイリングするモジュール.
+
+``sys._current_frames`` で各スレッドのスタックを定期的に採取する
+サンプリング方式のため、計測対象のコードにフックを入れない. 停止中は
+採取スレッドも存在しないので、通常時の処理には一切影響しない.
+"""
+
+import concurrent.futures.thread
+import logging
+import logging.handlers
+import os
+import queue
+import selectors
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import CodeType, FrameType
+from typing import Final
+
+from config.config import CACHE_DIR
+from core.timer_wheel import TimerWheel
+
+logger = logging.getLogger(__name__)
+
+# 既定のサンプリング間隔 (秒)
+DEFAULT_INTERVAL: Final[float] = 0.005
+
+# 既定の計測期間と上限 (秒)
+DEFAULT_DURATION: Final[float] = 60.0
+MAX_DURATION: Final[float] = 600.0
+
+# レポートに載せる関数と割り当て箇所の件数
+DEFAULT_TOP_N: Final[int] = 20
+
+# 返信の要約に載せる件数
+SUMMARY_TOP_N: Final[int] = 5
+
+# レポートの保存先
+DEFAULT_PROFILE_DIR: Final[str] = os.path.join(CACHE_DIR, "profiles")
+
+# 末端がこれらのモジュールのスレッドは待機中とみなし、集計しない
+IDLE_FILES: Final[frozenset[str]] = frozenset(
+    {threading.__file__, selectors.__file__, queue.__file__}
+)
+
+# 末端がこれらの関数のスレッドも待機中とみなす. C で実装された待機
+# (SimpleQueue.get, time.sleep) は呼び出し元の関数が末端に見えるため、
+# その待機を繰り返すだけのループを列挙する
+IDLE_CODES: Final[frozenset[CodeType]] = frozenset(
+    {
+        # ThreadPoolExecutor のワーカー (作業キューの get)
+        concurrent.futures.thread._worker.__code__,
+        # ログのキューの受け取り (QueueListener)
+        logging.handlers.QueueListener.dequeue.__code__,
+        # タイマーホイールの刻み (time.sleep)
+        TimerWheel._run.__code__,
+    }
+)
+
+# 関数の識別子 (ファイル名, 定義行, 関数名)
+FunctionKey = tuple[str, int, str]
+
+
+@dataclass
+class ProfileReport:
+    """プロファイリングの結果."""
+
+    started_at: float
+    duration: float
+    samples: int
+    # 末端で実行中だった回数 (自身の処理時間に比例)
+    self_counts: Counter[FunctionKey] = field(default_factory=Counter)
+    # スタックに含まれていた回数 (呼び出し先を含む処理時間に比例)
+    total_counts: Counter[FunctionKey] = field(default_factory=Counter)
+    allocations: list[tracemalloc.StatisticDiff] = field(default_factory=list)
+    path: str | None = None
+
+    @staticmethod
+    def _label(key: FunctionKey) -> str:
+        """関数の表示名を作成する.
+
+        Args:
+            key: 関数の識別子
+
+        Returns:
+            str: "関数名 (ファイル名:行)"
+        """
+        filename, lineno, name = key
+        return f"{name} ({os.path.basename(filename)}:{lineno})"
+
+    def _ratio(self, count: int) -> float:
+        """サンプル数に対する割合 (%) を計算する.
+
+        Args:
+            count: 回数
+
+        Returns:
+            float: 割合
+        """
+        return 100 * count / self.samples if self.samples else 0.0
+
+    def format(self, top_n: int = DEFAULT_TOP_N) -> str:
+        """ファイルに保存する形式で結果を整形する.
+
+        Args:
+            top_n: 載せる件数
+
+        Returns:
+            str: 整形した結果
+        """
+        started = datetime.fromtimestamp(self.started_at)
+        lines = [
+            f"started: {started:%Y-%m-%d %H:%M:%S}",
+            f"duration: {self.duration:.1f}s, samples: {self.samples}",
+            "ratios are per sample and summed over busy threads",
+            "",
+            f"top {top_n} functions by self samples:",
+        ]
+        lines += [
+            f"  {self._ratio(count):6.2f}%  {count:7d}  {self._label(key)}"
+            for key, count in self.self_counts.most_common(top_n)
+        ]
+        lines += ["", f"top {top_n} functions by total samples:"]
+        lines += [
+            f"  {self._ratio(count):6.2f}%  {count:7d}  {self._label(key)}"
+            for key, count in self.total_counts.most_common(top_n)
+        ]
+        if self.allocations:
+            lines += ["", f"top {top_n} allocation sites (growth):"]
+            lines += [
+                f"  {stat.size_diff / 1024:+10.1f} KiB "
+                f"{stat.count_diff:+8d} blocks  {stat.traceback[0]}"
+                for stat in self.allocations[:top_n]
+            ]
+        return "\n".join(lines) + "\n"
+
+    def summary(self, top_n: int = SUMMARY_TOP_N) -> str:
+        """チャンネルに送る要約を作成する.
+
+        Args:
+            top_n: 載せる件数
+
+        Returns:
+            str: 要約
+        """
+        lines = [
+            f"[Profile] {self.duration:.1f}秒 / {self.samples}サンプル",
+            "処理時間の多い関数 :",
+        ]
+        lines += [
+            f"{self._ratio(count):.1f}% {self._label(key)}"
+            for key, count in self.self_counts.most_common(top_n)
+        ]
+        if self.allocations:
+            lines.append("メモリの増加が多い箇所 :")
+            lines += [
+                f"{stat.size_diff / 1024:+.1f} KiB "
+                f"{os.path.basename(stat.traceback[0].filename)}"
+                f":{stat.traceback[0].lineno}"
+                for stat in self.allocations[:top_n]
+            ]
+        if self.path:
+            lines.append(f"詳細 : {self.path}")
+        return "\n".join(lines)
+
+
+class Profiler:
+    """期間を区切ってサンプリングプロファイリングを行うクラス."""
+
+    def __init__(
+        self,
+        interval: float = DEFAULT_INTERVAL,
+        top_n: int = DEFAULT_TOP_N,
+        profile_dir: str = DEFAULT_PROFILE_DIR,
+    ) -> None:
+        """初期化.
+
+        Args:
+            interval: サンプリング間隔 (秒)
+            top_n: レポートに載せる件数
+            profile_dir: レポートの保存先
+        """
+        self.interval = interval
+        self.top_n = top_n
+        self.profile_dir = profile_dir
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._report: ProfileReport | None = None
+        self._snapshot: tracemalloc.Snapshot | None = None
+        self._started_tracemalloc = False
+        self._on_complete: Callable[[ProfileReport], None] | None = None
+
+    @property
+    def running(self) -> bool:
+        """計測中の場合はTrue."""
+        return self._thread is not None
+
+    def start(
+        self,
+        duration: float = DEFAULT_DURATION,
+        memory: bool = False,
+        on_complete: Callable[[ProfileReport], None] | None = None,
+    ) -> bool:
+        """計測を開始する.
+
+        Args:
+            duration: 計測期間 (秒, MAX_DURATION で打ち切る)
+            memory: tracemalloc でメモリの割り当ても計測する場合はTrue
+                (割り当てが多い処理を遅くし CPU の計測を歪めるため既定は無効)
+            on_complete: 期間の満了時に結果を受け取る関数
+
+        Returns:
+            bool: 開始した場合はTrue (計測中の場合はFalse)
+        """
+        with self._lock:
+            if self._thread is not None:
+                return False
+            if memory and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            self._snapshot = tracemalloc.take_snapshot() if memory else None
+            self._report = ProfileReport(
+                started_at=time.time(), duration=0.0, samples=0
+            )
+            self._on_complete = on_complete
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(min(max(duration, self.interval), MAX_DURATION),),
+                name="profiler",
+                daemon=True,
+            )
+            self._thread.start()
+        logger.info(
+            "Profiling started for %.0fs",
+            duration,
+            extra={"event": "profile_start"},
+        )
+        return True
+
+    def stop(self) -> ProfileReport | None:
+        """計測を終了し、結果を保存する.
+
+        Returns:
+            ProfileReport | None: 結果 (計測中でない場合、または期間の満了で
+                終了処理中の場合None)
+        """
+        with self._lock:
+            thread = self._thread
+            report = self._report
+            # 期間の満了と同時の場合は満了側が結果を通知する
+            if thread is None or self._stop.is_set():
+                return None
+            self._stop.set()
+        if thread is not threading.current_thread():
+            thread.join()
+        return report
+
+    def _run(self, duration: float) -> None:
+        """サンプリングのループ.
+
+        Args:
+            duration: 計測期間 (秒)
+        """
+        report = self._report
+        if report is None:
+            return
+        own = threading.get_ident()
+        started = time.monotonic()
+        deadline = started + duration
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    self._sample(report, frame)
+            report.samples += 1
+            if time.monotonic() >= deadline:
+                break
+        report.duration = time.monotonic() - started
+        # stop と同時の場合に結果を二重に通知しないよう、ロック内で確定する
+        with self._lock:
+            expired = not self._stop.is_set()
+            self._stop.set()
+        self._finish(report, expired)
+
+    @staticmethod
+    def _sample(report: ProfileReport, frame: FrameType | None) -> None:
+        """1スレッドのスタックを集計する (待機中のスレッドは除く).
+
+        Args:
+            report: 集計先
+            frame: スレッドの実行中のフレーム
+        """
+        if (
+            frame is None
+            or frame.f_code in IDLE_CODES
+            or frame.f_code.co_filename in IDLE_FILES
+        ):
+            return
+        leaf = True
+        seen: set[FunctionKey] = set()
+        while frame is not None:
+            code = frame.f_code
+            key = (code.co_filename, code.co_firstlineno, code.co_name)
+            if leaf:
+                report.self_counts[key] += 1
+                leaf = False
+            # 再帰呼び出しを重複して数えない
+            if key not in seen:
+                seen.add(key)
+                report.total_counts[key] += 1
+            frame = frame.f_back
+
+    def _finish(self, report: ProfileReport, expired: bool) -> None:
+        """結果を確定して保存し、期間の満了であれば終了を通知する.
+
+        stop で終了した場合は呼び出し元が結果を受け取るため通知しない.
+
+        Args:
+            report: 結果
+            expired: 期間の満了で終了した場合はTrue
+        """
+        with self._lock:
+            if self._snapshot is not None:
+                # プロファイラー自身の割り当ては除く
+                current = tracemalloc.take_snapshot().filter_traces(
+                    [
+                        tracemalloc.Filter(False, tracemalloc.__file__),
+                        tracemalloc.Filter(False, __file__),
+                    ]
+                )
+                report.allocations = current.compare_to(
+                    self._snapshot, "lineno"
+                )[: self.top_n]
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+            self._snapshot = None
+            on_complete = self._on_complete
+            self._thread = None
+
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            started = datetime.fromtimestamp(report.started_at)
+            path = os.path.join(
+                self.profile_dir, f"profile-{started:%Y%m%d-%H%M%S}.txt"
+            )
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(report.format(self.top_n))
+            report.path = path
+        except OSError as e:
+            logger.warning("Failed to write profile report: %s", e)
+
+        logger.info(
+            "Profiling finished: %d samples in %.1fs (%s)",
+            report.samples,
+            report.duration,
+            report.path,
+            extra={"event": "profile_stop"},
+        )
+        if expired and on_complete is not None:
+            try:
+                on_complete(report)
+            except Exception as e:
+                logger.error("Failed to deliver profile report: %s", e)
+
+
+_profiler: Profiler | None = None
+_profiler_lock = threading.Lock()
+
+
+def get_profiler() -> Profiler:
+    """プロセス共有のプロファイラーを取得する.
+
+    Returns:
+        Profiler: 共有のプロファイラー
+    """
+    global _profiler
+
+    with _profiler_lock:
+        if _profiler is None:
+            _profiler = Profiler()
+        return _profiler
+
+
+def install_signal_handler(duration: float = DEFAULT_DURATION) -> bool:
+    """SIGUSR1 で計測の開始と終了を切り替えられるようにする.
+
+    メインスレッドから呼ぶこと. 結果はファイルとログに出力する.
+
+    Args:
+        duration: 計測期間 (秒)
+
+    Returns:
+        bool: 登録した場合はTrue (SIGUSR1 が無い環境ではFalse)
+    """
+    if not hasattr(signal, "SIGUSR1"):
+        return False
+
+    def toggle(signum: int, frame: FrameType | None) -> None:
+        profiler = get_profiler()
+        if profiler.running:
+            # シグナルハンドラー内で join しないよう別スレッドで止める
+            threading.Thread(target=profiler.stop, daemon=True).start()
+        else:
+            profiler.start(duration)
+
+    signal.signal(signal.SIGUSR1, toggle)
+    return True
@@ -0,0 +1,392 @@
+"""コマンド実行の受付制御とチャンネル間の公平なスケジューリングを行うモジュール.
+
+チャンネルごとのキューを Deficit Round Robin で巡回し、1つのチャンネルが
+大量のコマンドを送っても他のチャンネルの処理が待たされないようにする.
+"""
+
+import enum
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass, field
+from typing import Any, Final
+
+from config.config import (
+    ADMISSION_USER_BURST,
+    ADMISSION_USER_RATE,
+    ADMISSION_WORKERS,
+    CHANNEL_MAX_INFLIGHT,
+    CHANNEL_MAX_QUEUE,
+)
+from core.constants.commands import HEAVY_COMMANDS
+
+logger = logging.getLogger(__name__)
+
+# 既定のワーカースレッド数
+DEFAULT_WORKERS: Final[int] = 4
+
+# チャンネルごとの同時実行数の上限
+DEFAULT_CHANNEL_MAX_INFLIGHT: Final[int] = 1
+
+# チャンネルごとの待機数の上限
+DEFAULT_CHANNEL_MAX_QUEUE: Final[int] = 5
+
+# ユーザーごとの平均実行回数 (回/分) とバースト
+DEFAULT_USER_RATE_PER_MINUTE: Final[float] = 10.0
+DEFAULT_USER_BURST: Final[int] = 5
+
+# 1回の巡回でチャンネルに与えるクレジット
+DEFAULT_QUANTUM: Final[int] = 1
+
+# 重いコマンドのコスト
+HEAVY_COMMAND_COST: Final[int] = 3
+
+# 混雑時の返信を同じチャンネルに送らない期間 (秒)
+BUSY_REPLY_COOLDOWN: Final[float] = 10.0
+
+# 満タンまで回復したユーザーのトークンバケットを破棄する間隔 (秒)
+USER_SWEEP_INTERVAL: Final[float] = 60.0
+
+
+class Admission(enum.Enum):
+    """受付結果."""
+
+    ACCEPTED = "accepted"
+    RATE_LIMITED = "rate_limited"
+    CHANNEL_BUSY = "channel_busy"
+
+
+class TokenBucket:
+    """トークンバケットによるレート制限."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        """初期化.
+
+        Args:
+            rate: 1秒あたりに補充するトークン数
+            burst: トークンの最大数
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self, now: float | None = None) -> bool:
+        """トークンを1つ消費する.
+
+        Args:
+            now: 現在時刻 (time.monotonic)
+
+        Returns:
+            bool: 消費できた場合はTrue
+        """
+        now = time.monotonic() if now is None else now
+        self.tokens = self._available(now)
+        self.updated = max(self.updated, now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def _available(self, now: float) -> float:
+        """現在のトークン数を計算する.
+
+        呼び出し元が作成前に取得した時刻を渡すことがあるため、経過時間が
+        負の場合は補充しない.
+
+        Args:
+            now: 現在時刻 (time.monotonic)
+
+        Returns:
+            float: トークン数
+        """
+        elapsed = max(0.0, now - self.updated)
+        return min(self.burst, self.tokens + elapsed * self.rate)
+
+    def full(self, now: float) -> bool:
+        """トークンが最大数まで回復しているかを判定する.
+
+        Args:
+            now: 現在時刻 (time.monotonic)
+
+        Returns:
+            bool: 回復している場合はTrue (新しいバケットと区別できない)
+        """
+        return self._available(now) >= self.burst
+
+
+@dataclass
+class _Job:
+    """待機中のコマンド."""
+
+    fn: Callable[[], None]
+    cost: int
+    command: str
+    submitted_at: float
+
+
+@dataclass
+class _ChannelState:
+    """チャンネルごとのキューと統計."""
+
+    queue: deque[_Job] = field(default_factory=deque)
+    deficit: int = 0
+    inflight: int = 0
+    served: int = 0
+    rejected: int = 0
+    rate_limited: int = 0
+    busy_replied_at: float = float("-inf")
+
+
+class AdmissionController:
+    """チャンネルごとのキューを Deficit Round Robin で処理するクラス.
+
+    各チャンネルは巡回のたびに ``quantum`` のクレジットを得て、先頭の
+    コマンドのコストに達すると実行される. 重いコマンドほどコストを高く
+    設定することで、チャンネル間の処理量を均等に近づける.
+    """
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_WORKERS,
+        channel_max_inflight: int = DEFAULT_CHANNEL_MAX_INFLIGHT,
+        channel_max_queue: int = DEFAULT_CHANNEL_MAX_QUEUE,
+        user_rate_per_minute: float = DEFAULT_USER_RATE_PER_MINUTE,
+        user_burst: int = DEFAULT_USER_BURST,
+        quantum: int = DEFAULT_QUANTUM,
+        costs: Mapping[str, int] | None = None,
+    ) -> None:
+        """初期化.
+
+        Args:
+            workers: ワーカースレッド数
+            channel_max_inflight: チャンネルごとの同時実行数の上限
+            channel_max_queue: チャンネルごとの待機数の上限
+            user_rate_per_minute: ユーザーごとの平均実行回数 (回/分)
+            user_burst: ユーザーごとに連続で実行できる回数
+            quantum: 1回の巡回でチャンネルに与えるクレジット
+            costs: コマンドごとのコスト (未指定のコマンドは1)
+        """
+        self.workers = max(1, workers)
+        self.channel_max_inflight = max(1, channel_max_inflight)
+        self.channel_max_queue = max(0, channel_max_queue)
+        self.user_rate = user_rate_per_minute / 60
+        self.user_burst = max(1, user_burst)
+        self.quantum = max(1, quantum)
+        self.costs = dict(costs or {})
+        self._channels: dict[str, _ChannelState] = {}
+        self._ring: deque[str] = deque()
+        self._users: dict[str, TokenBucket] = {}
+        self._swept_at = time.monotonic()
+        self._cond = threading.Condition()
+        self._threads: list[threading.Thread] = []
+        self._stopped = False
+
+    def start(self) -> None:
+        """ワーカースレッドを開始する."""
+        with self._cond:
+            if self._threads:
+                return
+            self._stopped = False
+            for i in range(self.workers):
+                thread = threading.Thread(
+                    target=self._work, name=f"admission-{i}", daemon=True
+                )
+                self._threads.append(thread)
+                thread.start()
+
+    def stop(self) -> None:
+        """ワーカースレッドを停止する (待機中のコマンドは破棄する)."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+
+    def submit(
+        self,
+        channel_no: Any,
+        user_no: Any,
+        command: str,
+        fn: Callable[[], None],
+    ) -> Admission:
+        """コマンドを受け付ける.
+
+        Args:
+            channel_no: チャンネル番号
+            user_no: 送信者のユーザー番号
+            command: コマンド (コストの算出と統計に使う)
+            fn: 実行する処理
+
+        Returns:
+            Admission: 受付結果
+        """
+        self.start()
+        channel = str(channel_no)
+        now = time.monotonic()
+        with self._cond:
+            state = self._channels.setdefault(channel, _ChannelState())
+            self._sweep_users(now)
+
+            # 実行中と待機中の合計がチャンネルの枠を超える場合は断る
+            # (実行しないコマンドでユーザーのトークンを消費しないよう先に判定)
+            if (
+                state.inflight + len(state.queue)
+                >= self.channel_max_inflight + self.channel_max_queue
+            ):
+                state.rejected += 1
+                return Admission.CHANNEL_BUSY
+
+            bucket = self._users.get(str(user_no))
+            if bucket is None:
+                bucket = TokenBucket(self.user_rate, self.user_burst)
+                self._users[str(user_no)] = bucket
+            if not bucket.take(now):
+                state.rate_limited += 1
+                return Admission.RATE_LIMITED
+
+            state.queue.append(
+                _Job(fn, self.costs.get(command, 1), command, now)
+            )
+            if channel not in self._ring:
+                self._ring.append(channel)
+            self._cond.notify()
+        return Admission.ACCEPTED
+
+    def _sweep_users(self, now: float) -> None:
+        """回復済みのトークンバケットを破棄する (ロック取得済みで呼ぶこと).
+
+        Args:
+            now: 現在時刻 (time.monotonic)
+        """
+        if now - self._swept_at < USER_SWEEP_INTERVAL:
+            return
+        self._swept_at = now
+        self._users = {
+            user: bucket
+            for user, bucket in self._users.items()
+            if not bucket.full(now)
+        }
+
+    def should_reply_busy(self, channel_no: Any) -> bool:
+        """混雑時の返信を送るべきかを判定する (チャンネルごとに間引く).
+
+        Args:
+            channel_no: チャンネル番号
+
+        Returns:
+            bool: 返信を送る場合はTrue
+        """
+        now = time.monotonic()
+        with self._cond:
+            state = self._channels.setdefault(str(channel_no), _ChannelState())
+            if now - state.busy_replied_at < BUSY_REPLY_COOLDOWN:
+                return False
+            state.busy_replied_at = now
+            return True
+
+    def _next_job(self) -> tuple[str, _Job] | None:
+        """次に実行するコマンドを選ぶ (ロック取得済みで呼ぶこと).
+
+        Returns:
+            tuple[str, _Job] | None: (チャンネル, コマンド) (無い場合None)
+        """
+        while True:
+            eligible = False
+            for _ in range(len(self._ring)):
+                channel = self._ring[0]
+                state = self._channels[channel]
+                if not state.queue:
+                    # 空になったチャンネルはクレジットを持ち越さない
+                    self._ring.popleft()
+                    state.deficit = 0
+                    continue
+                self._ring.rotate(-1)
+                if state.inflight >= self.channel_max_inflight:
+                    continue
+                eligible = True
+                job = state.queue[0]
+                if state.deficit < job.cost:
+                    state.deficit += self.quantum
+                if state.deficit >= job.cost:
+                    state.queue.popleft()
+                    state.deficit -= job.cost
+                    state.inflight += 1
+                    return channel, job
+            if not eligible:
+                return None
+
+    def _work(self) -> None:
+        """ワーカースレッドのループ."""
+        while True:
+            with self._cond:
+                picked = None
+                while not self._stopped:
+                    picked = self._next_job()
+                    if picked:
+                        break
+                    self._cond.wait()
+                if picked is None:
+                    return
+            channel, job = picked
+            try:
+                job.fn()
+            except Exception as e:
+                logger.error(
+                    "Command %s failed in channel %s: %s",
+                    job.command,
+                    channel,
+                    e,
+                )
+            finally:
+                with self._cond:
+                    state = self._channels[channel]
+                    state.inflight -= 1
+                    state.served += 1
+                    self._cond.notify_all()
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """チャンネルごとの統計を取得する.
+
+        Returns:
+            dict[str, dict[str, int]]: チャンネル番号ごとの統計
+        """
+        with self._cond:
+            return {
+                channel: {
+                    "queued": len(state.queue),
+                    "inflight": state.inflight,
+                    "served": state.served,
+                    "rejected": state.rejected,
+                    "rate_limited": state.rate_limited,
+                }
+                for channel, state in self._channels.items()
+            }
+
+
+_controller: AdmissionController | None = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> AdmissionController:
+    """プロセス共有の受付制御を取得する.
+
+    Returns:
+        AdmissionController: 共有の受付制御
+    """
+    global _controller
+
+    with _controller_lock:
+        if _controller is None:
+            _controller = AdmissionController(
+                workers=ADMISSION_WORKERS,
+                channel_max_inflight=CHANNEL_MAX_INFLIGHT,
+                channel_max_queue=CHANNEL_MAX_QUEUE,
+                user_rate_per_minute=ADMISSION_USER_RATE,
+                user_burst=ADMISSION_USER_BURST,
+                costs=dict.fromkeys(HEAVY_COMMANDS, HEAVY_COMMAND_COST),
+            )
+        return _controller
@@ -0,0 +1,133 @@
+"""複数のチャンネルを並行して検索するモジュール.
+
+チャンネルごとの検索を件数を制限したスレッドプールで実行し、完了した
+順に件数と最初・最後の時刻へ集約する. 検索結果の本文は保持しないため、
+チャンネル数や件数が多くてもメモリの使用量は増えない.
+"""
+
+import logging
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import (
+    Future,
+    ThreadPoolExecutor,
+    TimeoutError,
+    as_completed,
+)
+from dataclasses import dataclass, field
+from typing import Any, Final
+
+logger = logging.getLogger(__name__)
+
+# 既定の同時実行数と待ち時間 (秒)
+DEFAULT_WORKERS: Final[int] = 8
+DEFAULT_TIMEOUT: Final[float] = 20.0
+
+
+@dataclass
+class CrossSearchResult:
+    """複数チャンネルの検索結果の集計."""
+
+    # チャンネル番号ごとの件数 (完了した順)
+    counts: dict[str, int] = field(default_factory=dict)
+    first_time: Any = None
+    last_time: Any = None
+    # 失敗したチャンネルと待ち時間内に完了しなかったチャンネル
+    failed: list[str] = field(default_factory=list)
+    pending: list[str] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def total(self) -> int:
+        """全チャンネルの合計件数."""
+        return sum(self.counts.values())
+
+    @property
+    def partial(self) -> bool:
+        """一部のチャンネルの結果が欠けている場合はTrue."""
+        return bool(self.failed or self.pending)
+
+    def add(self, channel_no: str, hits: list[dict[str, Any]]) -> None:
+        """1チャンネル分の検索結果を集計に加える.
+
+        Args:
+            channel_no: チャンネル番号
+            hits: 検索結果のメッセージ
+        """
+        times = [
+            hit["messageUnixTime"]
+            for hit in hits
+            if hit.get("messageUnixTime") is not None
+        ]
+        if times:
+            first, last = min(times), max(times)
+            if self.first_time is None or first < self.first_time:
+                self.first_time = first
+            if self.last_time is None or last > self.last_time:
+                self.last_time = last
+        if hits:
+            self.counts[channel_no] = len(hits)
+
+
+def search_channels(
+    fetch: Callable[[str], list[dict[str, Any]]],
+    channel_nos: Iterable[str],
+    workers: int = DEFAULT_WORKERS,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> CrossSearchResult:
+    """チャンネルごとの検索を並行して実行し、結果を集計する.
+
+    待ち時間を過ぎた時点で完了していないチャンネルは pending に記録し、
+    それまでの結果を返す. 実行中の検索は中断できないため、バックグラウンド
+    で完了させて結果は破棄する.
+
+    Args:
+        fetch: 1チャンネルを検索して結果のメッセージを返す関数
+        channel_nos: 検索するチャンネル番号
+        workers: 同時に検索するチャンネル数
+        timeout: 全体の待ち時間 (秒)
+
+    Returns:
+        CrossSearchResult: 集計結果
+    """
+    channel_nos = list(dict.fromkeys(str(c) for c in channel_nos))
+    result = CrossSearchResult()
+    if not channel_nos:
+        return result
+
+    started = time.monotonic()
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, min(workers, len(channel_nos))),
+        thread_name_prefix="search",
+    )
+    futures: dict[Future[list[dict[str, Any]]], str] = {
+        executor.submit(fetch, channel_no): channel_no
+        for channel_no in channel_nos
+    }
+    try:
+        for future in as_completed(futures, timeout=timeout):
+            channel_no = futures.pop(future)
+            try:
+                result.add(channel_no, future.result())
+            except Exception as e:
+                logger.warning(
+                    "Search in channel %s failed: %s", channel_no, e
+                )
+                result.failed.append(channel_no)
+    except TimeoutError:
+        result.pending = list(futures.values())
+    finally:
+        # 未開始の検索は取り消し、実行中の検索の完了は待たない
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    result.elapsed = time.monotonic() - started
+    logger.info(
+        "Searched %d channels in %.1fs: %d hits, %d failed, %d pending",
+        len(channel_nos),
+        result.elapsed,
+        result.total,
+        len(result.failed),
+        len(result.pending),
+        extra={"event": "search_all"},
+    )
+    return result
@@ -0,0 +1,206 @@
+"""ペイロードのシリアライズを管理するモジュール."""
+
+from collections.abc import Callable, Set
+from operator import attrgetter
+from typing import Any, ClassVar, Final
+
+from core import codec
+
+# テキスト出力の既定の最大長
+DEFAULT_MAX_LENGTH: Final[int] = 2000
+
+# 切り詰め時に末尾へ付与する記号
+TRUNCATION_MARK: Final[str] = "…"
+
+FieldPlan = tuple[tuple[str, Callable[[Any], Any]], ...]
+
+
+def truncate(text: str, max_length: int = DEFAULT_MAX_LENGTH) -> str:
+    """文字列を指定の長さで切り詰める.
+
+    Args:
+        text: 対象の文字列
+        max_length: 最大長 (0以下の場合は切り詰めない)
+
+    Returns:
+        str: 切り詰めた文字列
+    """
+    if max_length <= 0 or len(text) <= max_length:
+        return text
+    return text[: max_length - len(TRUNCATION_MARK)] + TRUNCATION_MARK
+
+
+class PayloadSerializer:
+    """ペイロードのクラスごとにフィールド構成をキャッシュしてシリアライズするクラス.
+
+    初めて見たクラスでのみフィールド一覧を組み立て、以降は属性を直接参照する.
+    """
+
+    _plans: ClassVar[dict[type, FieldPlan]] = {}
+
+    @classmethod
+    def field_plan(cls, payload_type: type) -> FieldPlan:
+        """クラスのフィールド構成を取得する.
+
+        Args:
+            payload_type: ペイロードのクラス
+
+        Returns:
+            FieldPlan: (フィールド名, 取得関数) のタプル
+        """
+        plan = cls._plans.get(payload_type)
+        if plan is None:
+            plan = tuple(
+                (name, attrgetter(name))
+                for name in cls._field_names(payload_type)
+            )
+            cls._plans[payload_type] = plan
+        return plan
+
+    @staticmethod
+    def _field_names(payload_type: type) -> list[str]:
+        """クラスに定義されたデータフィールド名を列挙する.
+
+        pydanticモデル、dataclass、__slots__の順に判定する.
+        プロパティは副作用や例外の可能性があるため含めない.
+
+        Args:
+            payload_type: ペイロードのクラス
+
+        Returns:
+            list[str]: フィールド名のリスト
+        """
+        model_fields = getattr(payload_type, "model_fields", None)
+        if isinstance(model_fields, dict):
+            return list(model_fields)
+
+        fields = getattr(payload_type, "__dataclass_fields__", None)
+        if isinstance(fields, dict):
+            return list(fields)
+
+        names: list[str] = []
+        for klass in payload_type.__mro__:
+            slots = klass.__dict__.get("__slots__", ())
+            if isinstance(slots, str):
+                slots = (slots,)
+            names.extend(s for s in slots if not s.startswith("_"))
+        if names:
+            return names
+
+        annotations: dict[str, Any] = {}
+        for klass in reversed(payload_type.__mro__):
+            annotations.update(klass.__dict__.get("__annotations__", {}))
+        return [name for name in annotations if not name.startswith("_")]
+
+    @classmethod
+    def to_dict(
+        cls, payload: Any, exclude: Set[str] = frozenset()
+    ) -> dict[str, Any]:
+        """ペイロードを空でない値のみの辞書に変換する.
+
+        Args:
+            payload: 変換するペイロード
+            exclude: 除外するフィールド名
+
+        Returns:
+            dict[str, Any]: フィールド名と値の辞書
+        """
+        result: dict[str, Any] = {}
+        for name, getter in cls.field_plan(type(payload)):
+            if name in exclude:
+                continue
+            try:
+                value = getter(payload)
+            except AttributeError:
+                continue
+            if value is not None and value != "":
+                result[name] = value
+        return result
+
+    @classmethod
+    def to_json(
+        cls,
+        payload: Any,
+        exclude: Set[str] = frozenset(),
+        max_length: int = DEFAULT_MAX_LENGTH,
+    ) -> str:
+        """ペイロードをコンパクトなJSON文字列に変換する.
+
+        Args:
+            payload: 変換するペイロード
+            exclude: 除外するフィールド名
+            max_length: 最大長 (0以下の場合は切り詰めない)
+
+        Returns:
+            str: JSON文字列
+        """
+        data = {"type": type(payload).__name__}
+        data.update(cls.to_dict(payload, exclude))
+        text = codec.dumps(data, default=str)
+        return truncate(text, max_length)
+
+    @classmethod
+    def to_lines(
+        cls, payload: Any, exclude: Set[str] = frozenset()
+    ) -> list[str]:
+        """ペイロードを "名前: 値" 形式の行リストに変換する.
+
+        Args:
+            payload: 変換するペイロード
+            exclude: 除外するフィールド名
+
+        Returns:
+            list[str]: 整形された行のリスト
+        """
+        return [
+            f"{name}: {value}"
+            for name, value in cls.to_dict(payload, exclude).items()
+        ]
+
+    @classmethod
+    def to_text(
+        cls,
+        payload: Any,
+        exclude: Set[str] = frozenset(),
+        max_length: int = DEFAULT_MAX_LENGTH,
+    ) -> str:
+        """ペイロードを長さ制限付きのテキストに変換する.
+
+        Args:
+            payload: 変換するペイロード
+            exclude: 除外するフィールド名
+            max_length: 最大長 (0以下の場合は切り詰めない)
+
+        Returns:
+            str: 整形されたテキスト
+        """
+        lines = [type(payload).__name__, *cls.to_lines(payload, exclude)]
+        return truncate("\n".join(lines), max_length)
+
+
+class LazyPayload:
+    """ログ出力時にのみシリアライズするためのラッパー.
+
+    ``logger.debug("%s", LazyPayload(payload))`` のように使うと、
+    ログレベルが無効な場合は変換処理が行われない.
+    """
+
+    __slots__ = ("payload", "max_length")
+
+    def __init__(
+        self, payload: Any, max_length: int = DEFAULT_MAX_LENGTH
+    ) -> None:
+        """初期化.
+
+        Args:
+            payload: 対象のペイロード
+            max_length: 最大長
+        """
+        self.payload = payload
+        self.max_length = max_length
+
+    def __str__(self) -> str:
+        """JSON形式の文字列を返す."""
+        return PayloadSerializer.to_json(
+            self.payload, max_length=self.max_length
+        )
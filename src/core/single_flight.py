@@ -0,0 +1,118 @@
+"""同一リクエストの同時実行をまとめるモジュール."""
+
+import copy
+import threading
+from collections.abc import Callable, Hashable, Mapping, Set
+from typing import Any, Final, TypeVar
+from urllib.parse import parse_qsl, urlsplit
+
+from core import codec
+
+T = TypeVar("T")
+
+# キーの比較から除外する、呼び出しごとに変わるパラメーター
+VOLATILE_PARAMS: Final[frozenset[str]] = frozenset({"timeStamp", "timestamp"})
+
+
+def make_key(
+    *parts: Any,
+    endpoint: str,
+    params: Mapping[str, Any] | None = None,
+    exclude: Set[str] = VOLATILE_PARAMS,
+) -> Hashable:
+    """エンドポイントと正規化したパラメーターからキーを作成する.
+
+    クエリ文字列とパラメーターはキー順に並べ、``exclude`` のキーは除く.
+
+    Args:
+        *parts: キーの先頭に加える値 (アカウントやメソッドなど)
+        endpoint: エンドポイント (クエリ文字列を含んでもよい)
+        params: リクエストのパラメーター
+        exclude: キーから除外するパラメーター名
+
+    Returns:
+        Hashable: キー
+    """
+    url = urlsplit(endpoint)
+    query = sorted((k, v) for k, v in parse_qsl(url.query) if k not in exclude)
+    body = codec.dumps(
+        {k: v for k, v in (params or {}).items() if k not in exclude},
+        sort_keys=True,
+        default=str,
+    )
+    return (*parts, url.path, tuple(query), body)
+
+
+class _Call:
+    """実行中の呼び出し."""
+
+    def __init__(self) -> None:
+        """初期化."""
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """同じキーの呼び出しが実行中の場合、その結果を待って共有するクラス."""
+
+    def __init__(self) -> None:
+        """初期化."""
+        self._calls: dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """キーごとに1回だけ fn を実行する.
+
+        同じキーの呼び出しが実行中の場合は完了を待ち、その結果
+        (のコピー) を返す. 例外も同様に共有する.
+
+        Args:
+            key: 呼び出しのキー
+            fn: 実行する関数
+
+        Returns:
+            T: fn の結果
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            # 呼び出し元ごとに変更できるようコピーを返す
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                self.executed += 1
+            call.done.set()
+
+    def stats(self) -> dict[str, int]:
+        """実行回数とまとめた回数を取得する.
+
+        Returns:
+            dict[str, int]: 統計
+        """
+        with self._lock:
+            return {
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+            }
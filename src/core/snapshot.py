@@ -0,0 +1,372 @@
+"""起動時の状態を復元するスナップショットを管理するモジュール.
+
+終了時に一覧やプロフィールのキャッシュなどをセクションごとに1つの
+ファイルへ書き出し、次回の起動時にメモリマップで読み込む. セクションは
+必要になるまでデコードせず、保存時刻と元データの指紋で個別に鮮度を
+判定するため、古くなったセクションだけを捨てて残りを使える.
+
+ファイルの形式::
+
+    MAGIC (8バイト) | バージョン (u32) | 索引の長さ (u32) | 索引 (JSON)
+    | セクション本体 (JSON) ...
+
+索引にはセクションごとの位置 (本体の先頭から)、長さ、CRC32、保存時刻、
+指紋を記録する.
+"""
+
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import Any, Final
+
+from core import codec
+
+logger = logging.getLogger(__name__)
+
+# ファイルの先頭の識別子
+MAGIC: Final[bytes] = b"NZWSNAP\x00"
+
+# 形式を変えた場合に上げる (異なるバージョンのファイルは読み込まない)
+SNAPSHOT_VERSION: Final[int] = 1
+
+# MAGIC の後のヘッダー (バージョン, 索引の長さ)
+_HEADER: Final[struct.Struct] = struct.Struct("<II")
+
+
+def fingerprint(*parts: Any) -> str:
+    """元データの指紋を作成する.
+
+    Args:
+        parts: 元データを識別する値 (ファイルの更新時刻など)
+
+    Returns:
+        str: 指紋
+    """
+    return hashlib.sha1(
+        codec.dumpb(parts, default=str), usedforsecurity=False
+    ).hexdigest()
+
+
+def file_fingerprint(paths: Iterable[str | os.PathLike[str]]) -> str:
+    """ファイルの名前、サイズ、更新時刻から指紋を作成する.
+
+    Args:
+        paths: ファイル
+
+    Returns:
+        str: 指紋 (存在しないファイルは欠落として扱う)
+    """
+    parts = []
+    for path in sorted(os.fspath(p) for p in paths):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            parts.append((path, None))
+            continue
+        parts.append((path, stat.st_size, stat.st_mtime_ns))
+    return fingerprint(*parts)
+
+
+class Snapshot:
+    """メモリマップで開いたスナップショット."""
+
+    def __init__(
+        self, mapped: mmap.mmap, index: dict[str, Any], base: int
+    ) -> None:
+        """初期化 (open から呼ぶ).
+
+        Args:
+            mapped: ファイルのメモリマップ
+            index: 索引
+            base: セクション本体の開始位置
+        """
+        self._mmap = mapped
+        self._base = base
+        self.created_at = float(index.get("created_at", 0))
+        self.sections: dict[str, dict[str, Any]] = index.get("sections", {})
+
+    @classmethod
+    def open(cls, path: str) -> "Snapshot | None":
+        """スナップショットを開く.
+
+        Args:
+            path: ファイルのパス
+
+        Returns:
+            Snapshot | None: スナップショット (無い、または読めない場合None)
+        """
+        try:
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            # 空のファイルはマップできない (ValueError)
+            logger.warning("Failed to open snapshot %s: %s", path, e)
+            return None
+
+        start = len(MAGIC) + _HEADER.size
+        try:
+            if mapped[: len(MAGIC)] != MAGIC:
+                raise ValueError("not a snapshot file")
+            version, index_length = _HEADER.unpack_from(mapped, len(MAGIC))
+            if version != SNAPSHOT_VERSION:
+                raise ValueError(f"unsupported version {version}")
+            index = codec.loads(mapped[start : start + index_length])
+        except (ValueError, struct.error) as e:
+            logger.warning("Ignoring snapshot %s: %s", path, e)
+            mapped.close()
+            return None
+        return cls(mapped, index, start + index_length)
+
+    def close(self) -> None:
+        """メモリマップを閉じる."""
+        self._mmap.close()
+
+    def __enter__(self) -> "Snapshot":
+        """コンテキストマネージャーの開始."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """コンテキストマネージャーの終了."""
+        self.close()
+
+    def get(
+        self,
+        name: str,
+        max_age: float | None = None,
+        expected_fingerprint: str | None = None,
+    ) -> Any | None:
+        """セクションをデコードして取得する.
+
+        Args:
+            name: セクション名
+            max_age: 有効期間 (秒, None の場合は無期限)
+            expected_fingerprint: 元データの現在の指紋 (一致しない場合は無効)
+
+        Returns:
+            Any | None: セクションの値 (無い、古い、壊れている場合None)
+        """
+        entry = self.sections.get(name)
+        if entry is None:
+            return None
+        age = time.time() - float(entry.get("saved_at", 0))
+        if max_age is not None and age > max_age:
+            logger.info("Snapshot section %s is stale (%.0fs)", name, age)
+            return None
+        if (
+            expected_fingerprint is not None
+            and entry.get("fingerprint") != expected_fingerprint
+        ):
+            logger.info("Snapshot section %s is out of date", name)
+            return None
+
+        offset = self._base + int(entry["offset"])
+        length = int(entry["length"])
+        # memoryview のまま渡してコピーせずにデコードする
+        with memoryview(self._mmap) as view:
+            data = view[offset : offset + length]
+            try:
+                if len(data) != length or zlib.crc32(data) != entry["crc32"]:
+                    raise ValueError("checksum mismatch")
+                return codec.loads(data)
+            except ValueError as e:
+                logger.warning("Snapshot section %s is corrupt: %s", name, e)
+                return None
+            finally:
+                data.release()
+
+
+def write_snapshot(
+    path: str, sections: Iterable[tuple[str, Any, str | None]]
+) -> int:
+    """スナップショットを書き出す (一時ファイルへの書き込み後にリネーム).
+
+    Args:
+        path: ファイルのパス
+        sections: (セクション名, 値, 指紋) の列
+
+    Returns:
+        int: 書き出したセクション数
+    """
+    now = time.time()
+    bodies: list[bytes] = []
+    entries: dict[str, dict[str, Any]] = {}
+    offset = 0
+    for name, value, source in sections:
+        body = codec.dumpb(value, default=str)
+        entries[name] = {
+            "offset": offset,
+            "length": len(body),
+            "crc32": zlib.crc32(body),
+            "saved_at": now,
+            "fingerprint": source,
+        }
+        bodies.append(body)
+        offset += len(body)
+
+    index = codec.dumpb({"created_at": now, "sections": entries})
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(_HEADER.pack(SNAPSHOT_VERSION, len(index)))
+            f.write(index)
+            f.writelines(bodies)
+        os.replace(tmp_path, path)
+    except OSError:
+        os.unlink(tmp_path)
+        raise
+    return len(entries)
+
+
+@dataclass(frozen=True)
+class SnapshotSection:
+    """スナップショットに保存する状態の登録内容."""
+
+    name: str
+    # 保存する値を作成する関数 (None を返した場合は保存しない)
+    dump: Callable[[], Any]
+    # 読み込んだ値で状態を復元する関数
+    restore: Callable[[Any], None]
+    # 保存してからの有効期間 (秒, None の場合は無期限)
+    max_age: float | None = None
+    # 元データの現在の指紋を返す関数 (保存時と異なれば復元しない)
+    fingerprint: Callable[[], str] | None = None
+
+
+class SnapshotRegistry:
+    """スナップショットに含めるセクションを管理するクラス."""
+
+    def __init__(self) -> None:
+        """初期化."""
+        self._sections: dict[str, SnapshotSection] = {}
+        self._lock = threading.Lock()
+
+    def register(self, section: SnapshotSection) -> None:
+        """セクションを登録する (同名の登録は置き換える).
+
+        Args:
+            section: セクション
+        """
+        with self._lock:
+            self._sections[section.name] = section
+
+    def load(self, path: str) -> list[str]:
+        """スナップショットから登録済みのセクションを復元する.
+
+        Args:
+            path: ファイルのパス
+
+        Returns:
+            list[str]: 復元したセクション名
+        """
+        started = time.perf_counter()
+        snapshot = Snapshot.open(path)
+        if snapshot is None:
+            return []
+        with self._lock:
+            sections = list(self._sections.values())
+
+        restored = []
+        with snapshot:
+            for section in sections:
+                try:
+                    value = snapshot.get(
+                        section.name,
+                        max_age=section.max_age,
+                        expected_fingerprint=(
+                            section.fingerprint()
+                            if section.fingerprint
+                            else None
+                        ),
+                    )
+                    if value is None:
+                        continue
+                    section.restore(value)
+                except Exception as e:
+                    logger.warning(
+                        "Failed to restore snapshot section %s: %s",
+                        section.name,
+                        e,
+                    )
+                    continue
+                restored.append(section.name)
+
+        logger.info(
+            "Restored %d/%d snapshot sections in %.1fms: %s",
+            len(restored),
+            len(sections),
+            (time.perf_counter() - started) * 1000,
+            ", ".join(restored) or "-",
+            extra={"event": "snapshot_load"},
+        )
+        return restored
+
+    def save(self, path: str) -> None:
+        """登録済みのセクションを書き出す.
+
+        Args:
+            path: ファイルのパス
+        """
+        with self._lock:
+            sections = list(self._sections.values())
+
+        def collect() -> Iterable[tuple[str, Any, str | None]]:
+            for section in sections:
+                try:
+                    value = section.dump()
+                    if value is None:
+                        continue
+                    source = (
+                        section.fingerprint() if section.fingerprint else None
+                    )
+                except Exception as e:
+                    logger.warning(
+                        "Failed to dump snapshot section %s: %s",
+                        section.name,
+                        e,
+                    )
+                    continue
+                yield section.name, value, source
+
+        try:
+            count = write_snapshot(path, collect())
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning("Failed to write snapshot %s: %s", path, e)
+            return
+        logger.info(
+            "Saved %d snapshot sections to %s",
+            count,
+            path,
+            extra={"event": "snapshot_save"},
+        )
+
+
+_registry: SnapshotRegistry | None = None
+_registry_lock = threading.Lock()
+
+
+def get_snapshot_registry() -> SnapshotRegistry:
+    """プロセス共有のセクション登録を取得する.
+
+    Returns:
+        SnapshotRegistry: 共有の登録
+    """
+    global _registry
+
+    with _registry_lock:
+        if _registry is None:
+            _registry = SnapshotRegistry()
+        return _registry
@@ -0,0 +1,319 @@
+"""サービスステータスを監視するモジュール."""
+
+import datetime
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import Any, Final
+
+from line_works import LineWorks
+
+from core import codec
+from core.utils import load_flex_message
+
+logger = logging.getLogger(__name__)
+
+# 正常時のポーリング間隔 (秒)
+DEFAULT_HEALTHY_INTERVAL: Final[float] = 300.0
+
+# 障害発生中のポーリング間隔 (秒)
+DEFAULT_INCIDENT_INTERVAL: Final[float] = 30.0
+
+# 正常を表すステータス値
+HEALTHY_VALUES: Final[frozenset[str]] = frozenset(
+    {"", "0", "normal", "ok", "good", "none", "operational", "available"}
+)
+
+# ステータスを表すキー
+STATUS_KEYS: Final[frozenset[str]] = frozenset(
+    {"status", "state", "level", "serviceStatus"}
+)
+
+# 障害やお知らせの一覧を表すキー
+INCIDENT_LIST_KEYS: Final[frozenset[str]] = frozenset(
+    {"incidents", "issues", "notices", "maintenances"}
+)
+
+# 差分の比較から除外する、呼び出しごとに変わる値のキー
+VOLATILE_KEYS: Final[frozenset[str]] = frozenset(
+    {"timestamp", "timeStamp", "serverTime", "currentTime", "now"}
+)
+
+# アラートに含める変更箇所の最大数
+MAX_ALERT_CHANGES: Final[int] = 10
+
+
+@dataclass(frozen=True)
+class StatusSnapshot:
+    """取得したサービスステータス."""
+
+    status: Any
+    incident: bool
+    checked_at: float
+    changed_at: float
+
+
+def flatten(value: Any, prefix: str = "") -> dict[str, Any]:
+    """ネストした値をドット区切りのパスと値の辞書に展開する.
+
+    Args:
+        value: 展開する値
+        prefix: パスの接頭辞
+
+    Returns:
+        dict[str, Any]: パスと値の辞書
+    """
+    if isinstance(value, dict):
+        result: dict[str, Any] = {}
+        for key, child in value.items():
+            if key in VOLATILE_KEYS:
+                continue
+            result.update(flatten(child, f"{prefix}.{key}" if prefix else key))
+        return result
+    if isinstance(value, list):
+        result = {}
+        for i, child in enumerate(value):
+            result.update(flatten(child, f"{prefix}[{i}]"))
+        return result or {prefix: []}
+    return {prefix: value}
+
+
+def has_incident(status: Any) -> bool:
+    """ステータスに障害が含まれるかを判定する.
+
+    ステータスを表すキーに正常以外の値がある場合、または障害一覧の
+    キーが空でない場合に障害ありとみなす.
+
+    Args:
+        status: サービスステータスのレスポンス
+
+    Returns:
+        bool: 障害ありの場合はTrue
+    """
+    if isinstance(status, dict):
+        for key, value in status.items():
+            if key in INCIDENT_LIST_KEYS and isinstance(value, list) and value:
+                return True
+            if (
+                key in STATUS_KEYS
+                and isinstance(value, str | int)
+                and str(value).strip().lower() not in HEALTHY_VALUES
+            ):
+                return True
+            if has_incident(value):
+                return True
+    elif isinstance(status, list):
+        return any(has_incident(item) for item in status)
+    return False
+
+
+def diff_status(old: Any, new: Any) -> list[str]:
+    """2つのステータスの差分を列挙する.
+
+    Args:
+        old: 前回のステータス
+        new: 今回のステータス
+
+    Returns:
+        list[str]: 変更箇所の説明のリスト
+    """
+    before, after = flatten(old), flatten(new)
+    changes = []
+    for path in sorted(before.keys() | after.keys()):
+        if before.get(path) != after.get(path):
+            changes.append(
+                f"{path or '(root)'}: {before.get(path)} → {after.get(path)}"
+            )
+    return changes
+
+
+class ServiceStatusWatcher:
+    """サービスステータスをポーリングし、変化時のみ通知するクラス.
+
+    正常時はゆっくり、障害発生中は短い間隔でポーリングする.
+    最新のステータスはキャッシュされ、コマンドから無料で参照できる.
+    """
+
+    def __init__(
+        self,
+        fetch_status: Callable[[], Any],
+        works: LineWorks | None = None,
+        alert_channels: Iterable[int] = (),
+        healthy_interval: float = DEFAULT_HEALTHY_INTERVAL,
+        incident_interval: float = DEFAULT_INCIDENT_INTERVAL,
+    ) -> None:
+        """初期化.
+
+        Args:
+            fetch_status: ステータスを取得する関数
+            works: アラートの送信に使うLineWorksクライアント
+            alert_channels: アラートを送信するチャンネル番号
+            healthy_interval: 正常時のポーリング間隔 (秒)
+            incident_interval: 障害発生中のポーリング間隔 (秒)
+        """
+        self.fetch_status = fetch_status
+        self.works = works
+        self.alert_channels = list(alert_channels)
+        self.healthy_interval = healthy_interval
+        self.incident_interval = incident_interval
+        self._snapshot: StatusSnapshot | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def snapshot(self) -> StatusSnapshot | None:
+        """最新のステータス (未取得の場合None)."""
+        return self._snapshot
+
+    def start(self) -> None:
+        """監視スレッドを開始する."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="status-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """監視スレッドを停止する."""
+        self._stop.set()
+
+    def next_interval(self) -> float:
+        """現在の状態に応じた次のポーリング間隔を取得する.
+
+        Returns:
+            float: ポーリング間隔 (秒)
+        """
+        if self._snapshot and self._snapshot.incident:
+            return self.incident_interval
+        return self.healthy_interval
+
+    def _run(self) -> None:
+        """ポーリングループ."""
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error("Failed to poll service status: %s", e)
+            self._stop.wait(self.next_interval())
+
+    def poll(self) -> list[str]:
+        """ステータスを1回取得し、変化があればアラートを送信する.
+
+        Returns:
+            list[str]: 前回からの変更箇所 (初回は空)
+        """
+        status = self.fetch_status()
+        now = time.time()
+        previous = self._snapshot
+        changes = diff_status(previous.status, status) if previous else []
+        self._snapshot = StatusSnapshot(
+            status=status,
+            incident=has_incident(status),
+            checked_at=now,
+            changed_at=(
+                now if previous is None or changes else previous.changed_at
+            ),
+        )
+        if changes:
+            logger.info(
+                "Service status changed: %d change(s)",
+                len(changes),
+                extra={"event": "status_change"},
+            )
+            self._send_alert(self._snapshot, changes)
+        return changes
+
+    def _send_alert(
+        self, snapshot: StatusSnapshot, changes: list[str]
+    ) -> None:
+        """設定されたチャンネルにFlexアラートを送信する.
+
+        Args:
+            snapshot: 最新のステータス
+            changes: 変更箇所
+        """
+        if not self.works or not self.alert_channels:
+            return
+
+        shown = changes[:MAX_ALERT_CHANGES]
+        if len(changes) > len(shown):
+            shown.append(f"...他{len(changes) - len(shown)}件")
+        flex_content = load_flex_message("status_alert.json", "Service Status")
+        flex_content.contents = codec.substitute(
+            flex_content.contents,
+            {
+                "${state}": "障害発生中" if snapshot.incident else "正常",
+                "${time}": format_time(snapshot.checked_at),
+                "${changes}": "\n".join(shown),
+            },
+        )
+
+        for channel_no in self.alert_channels:
+            try:
+                self.works.send_flex_message(channel_no, flex_content)
+            except Exception as e:
+                logger.error(
+                    "Failed to send status alert to %s: %s", channel_no, e
+                )
+
+
+def format_time(timestamp: float) -> str:
+    """UNIX秒を表示用の文字列に変換する.
+
+    Args:
+        timestamp: UNIX秒
+
+    Returns:
+        str: "%Y-%m-%d %H:%M:%S" 形式の文字列
+    """
+    return datetime.datetime.fromtimestamp(timestamp).strftime(
+        "%Y-%m-%d %H:%M:%S"
+    )
+
+
+def format_epoch(value: Any) -> str:
+    """UNIX秒またはUNIXミリ秒を表示用の文字列に変換する.
+
+    Args:
+        value: UNIX秒またはUNIXミリ秒
+
+    Returns:
+        str: "%Y-%m-%d %H:%M:%S" 形式の文字列 (変換できない場合は "N/A")
+    """
+    try:
+        timestamp = float(value)
+    except (TypeError, ValueError):
+        return "N/A"
+    if timestamp <= 0:
+        return "N/A"
+    # 1e11 を超える値はミリ秒とみなす
+    if timestamp > 1e11:
+        timestamp /= 1000
+    return format_time(timestamp)
+
+
+_watcher: ServiceStatusWatcher | None = None
+
+
+def set_status_watcher(watcher: ServiceStatusWatcher | None) -> None:
+    """プロセス共有のウォッチャーを登録する.
+
+    Args:
+        watcher: 登録するウォッチャー
+    """
+    global _watcher
+
+    _watcher = watcher
+
+
+def get_cached_status() -> StatusSnapshot | None:
+    """キャッシュ済みのサービスステータスを取得する.
+
+    Returns:
+        StatusSnapshot | None: 最新のステータス (未監視の場合None)
+    """
+    return _watcher.snapshot if _watcher else None
@@ -0,0 +1,247 @@
+"""トレーサーの切断を検知して再接続するモジュール."""
+
+import logging
+import random
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, Final
+
+from line_works.client import LineWorks
+from line_works.mqtt.enums.packet_type import PacketType
+from line_works.mqtt.models.packet import MQTTPacket
+from line_works.tracer import LineWorksTracer
+
+from core.link_monitor import LinkMonitor, MonitoredTracer
+
+logger = logging.getLogger(__name__)
+
+TraceFunc = Callable[[LineWorks, MQTTPacket], None]
+
+# 再接続待ちの初期値と上限 (秒)
+DEFAULT_BASE_DELAY: Final[float] = 1.0
+DEFAULT_MAX_DELAY: Final[float] = 60.0
+
+# 待ち時間に加えるゆらぎの割合
+DEFAULT_JITTER: Final[float] = 0.5
+
+# この時間以上接続が続いた場合はバックオフをリセットする (秒)
+DEFAULT_HEALTHY_AFTER: Final[float] = 60.0
+
+# 連続でこの回数接続に失敗した場合のみ再ログインする
+DEFAULT_RELOGIN_AFTER: Final[int] = 5
+
+
+@dataclass
+class SupervisorStats:
+    """接続状態の統計."""
+
+    connects: int = 0
+    reconnects: int = 0
+    disconnects: int = 0
+    relogins: int = 0
+    consecutive_failures: int = 0
+    total_downtime: float = 0.0
+    connected_at: float | None = None
+    down_since: float | None = None
+    last_error: str | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        """統計を辞書に変換する.
+
+        Returns:
+            dict[str, Any]: 統計 (切断中の時間を含む)
+        """
+        downtime = self.total_downtime
+        if self.down_since is not None:
+            downtime += time.time() - self.down_since
+        return {
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+            "disconnects": self.disconnects,
+            "relogins": self.relogins,
+            "downtime_seconds": round(downtime, 1),
+            "connected": self.down_since is None
+            and self.connected_at is not None,
+            "last_error": self.last_error,
+        }
+
+
+class TracerSupervisor:
+    """LineWorksTracer を監視し、切断時に再接続するクラス.
+
+    再接続ではログイン済みの LineWorks をそのまま使い、新しい
+    トレーサーだけを作り直す. トレース関数は同じものを登録し直すため、
+    ハンドラーやキャッシュは再接続後もそのまま使われる.
+    """
+
+    def __init__(
+        self,
+        works: LineWorks,
+        trace_funcs: dict[PacketType, TraceFunc],
+        base_delay: float = DEFAULT_BASE_DELAY,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        jitter: float = DEFAULT_JITTER,
+        healthy_after: float = DEFAULT_HEALTHY_AFTER,
+        relogin_after: int = DEFAULT_RELOGIN_AFTER,
+        name: str = "tracer",
+        monitor: LinkMonitor | None = None,
+    ) -> None:
+        """初期化.
+
+        Args:
+            works: ログイン済みのLineWorksクライアント
+            trace_funcs: パケット種別ごとのトレース関数
+            base_delay: 再接続待ちの初期値 (秒)
+            max_delay: 再接続待ちの上限 (秒)
+            jitter: 待ち時間に加えるゆらぎの割合
+            healthy_after: バックオフをリセットする接続継続時間 (秒)
+            relogin_after: 再ログインするまでの連続失敗回数
+            name: ログに表示する名前
+            monitor: 受信パケットとキープアライブの記録先
+        """
+        self.works = works
+        self.trace_funcs = dict(trace_funcs)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.healthy_after = healthy_after
+        self.relogin_after = relogin_after
+        self.name = name
+        self.monitor = monitor
+        self.stats = SupervisorStats()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def _on_connack(self, works: LineWorks, packet: MQTTPacket) -> None:
+        """CONNACKを受信した時点を接続完了として記録する.
+
+        Args:
+            works: LineWorksクライアント
+            packet: 受信したMQTTパケット
+        """
+        now = time.time()
+        with self._lock:
+            stats = self.stats
+            if stats.down_since is not None:
+                downtime = now - stats.down_since
+                stats.total_downtime += downtime
+                stats.reconnects += 1
+                stats.down_since = None
+                logger.info(
+                    "[%s] Reconnected after %.1fs",
+                    self.name,
+                    downtime,
+                    extra={"event": "tracer_reconnect"},
+                )
+            stats.connects += 1
+            stats.connected_at = now
+        if self.monitor is not None:
+            self.monitor.on_connected()
+        if f := self.trace_funcs.get(PacketType.CONNACK):
+            f(works, packet)
+
+    def build_tracer(self) -> LineWorksTracer:
+        """トレース関数を登録したトレーサーを作成する.
+
+        Returns:
+            LineWorksTracer: 新しいトレーサー
+        """
+        if self.monitor is not None:
+            tracer = MonitoredTracer(works=self.works)
+            tracer.set_monitor(self.monitor)
+        else:
+            tracer = LineWorksTracer(works=self.works)
+        for packet_type, f in self.trace_funcs.items():
+            tracer.add_trace_func(packet_type, f)
+        tracer.add_trace_func(PacketType.CONNACK, self._on_connack)
+        return tracer
+
+    def next_delay(self, failures: int) -> float:
+        """連続失敗回数に応じた再接続待ち時間を計算する.
+
+        Args:
+            failures: 連続失敗回数 (1以上)
+
+        Returns:
+            float: 待ち時間 (秒)
+        """
+        delay = min(self.max_delay, self.base_delay * 2 ** (failures - 1))
+        spread = random.uniform(-self.jitter, self.jitter)  # noqa: S311
+        return delay * (1 + spread)
+
+    def _record_disconnect(self, started: float, error: str | None) -> int:
+        """切断を記録する.
+
+        Args:
+            started: トレーサーを開始した時刻
+            error: 切断の原因
+
+        Returns:
+            int: 連続失敗回数
+        """
+        now = time.time()
+        with self._lock:
+            stats = self.stats
+            stats.disconnects += 1
+            stats.last_error = error
+            if stats.down_since is None:
+                stats.down_since = now
+            # 十分長く接続できていた場合は新しい障害として数え直す
+            connected_at = stats.connected_at
+            if (
+                connected_at
+                and connected_at >= started
+                and now - connected_at >= self.healthy_after
+            ):
+                stats.consecutive_failures = 0
+            stats.consecutive_failures += 1
+            return stats.consecutive_failures
+
+    def _relogin(self) -> None:
+        """セッションが失効している可能性があるため再ログインする."""
+        try:
+            self.works.login_with_id()
+            # 返信に使う API クライアントのクッキーは初期化時に一度だけ
+            # 設定されるため、新しいセッションのものに差し替える
+            self.works.api_client.set_default_header(
+                "Cookie", self.works.cookie_str
+            )
+            self.stats.relogins += 1
+            logger.info("[%s] Logged in again", self.name)
+        except Exception as e:
+            logger.error("[%s] Failed to log in again: %s", self.name, e)
+
+    def run(self) -> None:
+        """stop() が呼ばれるまでトレーサーを動かし続ける."""
+        while not self._stop.is_set():
+            started = time.time()
+            error: str | None = None
+            try:
+                self.build_tracer().trace()
+            except Exception as e:
+                error = repr(e)
+            if self.monitor is not None:
+                self.monitor.on_disconnected()
+            if self._stop.is_set():
+                break
+
+            failures = self._record_disconnect(started, error)
+            if failures >= self.relogin_after and (
+                failures % self.relogin_after == 0
+            ):
+                self._relogin()
+            delay = self.next_delay(failures)
+            logger.warning(
+                "[%s] Tracer disconnected (%s), reconnecting in %.1fs",
+                self.name,
+                error or "closed",
+                delay,
+                extra={"event": "tracer_disconnect"},
+            )
+            self._stop.wait(delay)
+
+    def stop(self) -> None:
+        """再接続を止める (接続中のトレーサーは切断時に終了する)."""
+        self._stop.set()
@@ -0,0 +1,250 @@
+"""システムメトリクスをバックグラウンドで収集するモジュール."""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import Any, Final, TypeVar
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# サンプリング間隔 (秒)
+DEFAULT_INTERVAL: Final[float] = float(
+    os.getenv("SYSTEM_SAMPLER_INTERVAL", "5")
+)
+
+# 保持する履歴の件数
+DEFAULT_HISTORY_SIZE: Final[int] = int(
+    os.getenv("SYSTEM_SAMPLER_HISTORY", "120")
+)
+
+# 各プローブのタイムアウト (秒)
+DEFAULT_PROBE_TIMEOUT: Final[float] = 2.0
+
+# cpu_percentの初回値は基準点が無いため、最初のサンプルまで待つ時間 (秒)
+WARMUP_SECONDS: Final[float] = 0.2
+
+# ディスク使用率を取得するパス
+DEFAULT_DISK_PATH: Final[str] = os.path.abspath(os.sep)
+
+
+@dataclass(frozen=True)
+class SystemSnapshot:
+    """ある時点のシステムメトリクス."""
+
+    timestamp: float
+    cpu_percent: float
+    memory_percent: float
+    memory_total: int
+    memory_available: int
+    disk_percent: float
+    disk_total: int
+    disk_used: int
+    net_bytes_sent: int
+    net_bytes_recv: int
+    net_send_rate: float
+    net_recv_rate: float
+    uptime_seconds: float
+
+
+@dataclass(frozen=True)
+class MetricStats:
+    """履歴ウィンドウ内の統計値."""
+
+    minimum: float
+    average: float
+    maximum: float
+    samples: int
+
+
+class SystemSampler:
+    """一定間隔でシステムメトリクスを収集するクラス.
+
+    収集結果はイミュータブルなスナップショットとして公開し、
+    直近の履歴をリングバッファで保持する.
+    """
+
+    def __init__(
+        self,
+        interval: float = DEFAULT_INTERVAL,
+        history_size: int = DEFAULT_HISTORY_SIZE,
+        probe_timeout: float = DEFAULT_PROBE_TIMEOUT,
+        disk_path: str = DEFAULT_DISK_PATH,
+    ) -> None:
+        """初期化.
+
+        Args:
+            interval: サンプリング間隔 (秒)
+            history_size: 保持する履歴の件数
+            probe_timeout: 各プローブのタイムアウト (秒)
+            disk_path: ディスク使用率を取得するパス
+        """
+        self.interval = interval
+        self.probe_timeout = probe_timeout
+        self.disk_path = disk_path
+        self._history: deque[SystemSnapshot] = deque(maxlen=history_size)
+        self._latest: SystemSnapshot | None = None
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=4, thread_name_prefix="system-probe"
+        )
+
+    def start(self) -> None:
+        """サンプリングスレッドを開始する."""
+        if self._thread and self._thread.is_alive():
+            return
+        # cpu_percent(interval=None) の基準点を作る
+        psutil.cpu_percent(interval=None)
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="system-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """サンプリングスレッドを停止する."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def snapshot(self, wait: float = 0.0) -> SystemSnapshot | None:
+        """最新のスナップショットを取得する.
+
+        Args:
+            wait: 初回サンプルが未取得の場合に待機する最大秒数
+
+        Returns:
+            SystemSnapshot | None: 最新のスナップショット (未取得の場合None)
+        """
+        if wait > 0:
+            self._ready.wait(wait)
+        return self._latest
+
+    def history(self) -> tuple[SystemSnapshot, ...]:
+        """保持している履歴を古い順に取得する.
+
+        Returns:
+            tuple[SystemSnapshot, ...]: スナップショットのタプル
+        """
+        with self._lock:
+            return tuple(self._history)
+
+    def stats(self, field: str) -> MetricStats | None:
+        """履歴ウィンドウ内の最小・平均・最大を計算する.
+
+        Args:
+            field: SystemSnapshotのフィールド名
+
+        Returns:
+            MetricStats | None: 統計値 (履歴が空の場合None)
+        """
+        values = [getattr(s, field) for s in self.history()]
+        if not values:
+            return None
+        return MetricStats(
+            minimum=min(values),
+            average=sum(values) / len(values),
+            maximum=max(values),
+            samples=len(values),
+        )
+
+    def _run(self) -> None:
+        """サンプリングループ."""
+        self._stop.wait(WARMUP_SECONDS)
+        while not self._stop.is_set():
+            try:
+                self._sample()
+            except Exception as e:
+                logger.error("System sampling failed: %s", e)
+            self._stop.wait(self.interval)
+
+    def _probe(self, func: Callable[[], T], default: T) -> T:
+        """タイムアウト付きでプローブを実行する.
+
+        Args:
+            func: 実行するプローブ
+            default: 失敗時に返す値
+
+        Returns:
+            T: プローブの結果
+        """
+        future = self._executor.submit(func)
+        try:
+            return future.result(timeout=self.probe_timeout)
+        except FutureTimeoutError:
+            logger.warning("Probe timed out: %s", func)
+        except Exception as e:
+            logger.warning("Probe failed: %s (%s)", func, e)
+        return default
+
+    def _sample(self) -> None:
+        """各プローブを実行してスナップショットを更新する."""
+        now = time.time()
+        previous = self._latest
+
+        mem = self._probe(psutil.virtual_memory, None)
+        disk = self._probe(lambda: psutil.disk_usage(self.disk_path), None)
+        net: Any = self._probe(psutil.net_io_counters, None)
+        boot_time = self._probe(psutil.boot_time, now)
+
+        sent = net.bytes_sent if net else 0
+        recv = net.bytes_recv if net else 0
+        send_rate = recv_rate = 0.0
+        if previous and now > previous.timestamp:
+            elapsed = now - previous.timestamp
+            send_rate = max(sent - previous.net_bytes_sent, 0) / elapsed
+            recv_rate = max(recv - previous.net_bytes_recv, 0) / elapsed
+
+        snapshot = SystemSnapshot(
+            timestamp=now,
+            cpu_percent=self._probe(
+                lambda: psutil.cpu_percent(interval=None), 0.0
+            ),
+            memory_percent=mem.percent if mem else 0.0,
+            memory_total=mem.total if mem else 0,
+            memory_available=mem.available if mem else 0,
+            disk_percent=disk.percent if disk else 0.0,
+            disk_total=disk.total if disk else 0,
+            disk_used=disk.used if disk else 0,
+            net_bytes_sent=sent,
+            net_bytes_recv=recv,
+            net_send_rate=send_rate,
+            net_recv_rate=recv_rate,
+            uptime_seconds=max(now - boot_time, 0.0),
+        )
+        with self._lock:
+            self._history.append(snapshot)
+            self._latest = snapshot
+        self._ready.set()
+
+
+_sampler: SystemSampler | None = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler() -> SystemSampler:
+    """プロセス共有のサンプラーを取得する (未開始の場合は開始する).
+
+    Returns:
+        SystemSampler: 共有のサンプラー
+    """
+    global _sampler
+
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = SystemSampler()
+            _sampler.start()
+        return _sampler
@@ -0,0 +1,141 @@
+"""多数のタイマーを1スレッドで扱うハッシュタイマーホイールのモジュール."""
+
+import logging
+import math
+import threading
+import time
+from collections.abc import Callable
+from typing import Final
+
+logger = logging.getLogger(__name__)
+
+# 1目盛りの長さ (秒)
+DEFAULT_TICK: Final[float] = 0.05
+
+# ホイールの目盛り数
+DEFAULT_SLOTS: Final[int] = 512
+
+
+class Timer:
+    """スケジュール済みのタイマー."""
+
+    __slots__ = ("callback", "rounds", "cancelled")
+
+    def __init__(self, callback: Callable[[], None], rounds: int) -> None:
+        """初期化.
+
+        Args:
+            callback: 期限に呼び出す関数
+            rounds: 発火までにホイールが残り何周するか
+        """
+        self.callback = callback
+        self.rounds = rounds
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        """タイマーを取り消す."""
+        self.cancelled = True
+
+
+class TimerWheel:
+    """ハッシュタイマーホイール.
+
+    タイマーは期限の目盛りに対応するスロットに置かれ、登録と取り消しは
+    O(1)、1目盛りごとの処理はそのスロットのタイマー数に比例する.
+    タイマーが無い間はスレッドを止めておく.
+    """
+
+    def __init__(
+        self, tick: float = DEFAULT_TICK, slots: int = DEFAULT_SLOTS
+    ) -> None:
+        """初期化.
+
+        Args:
+            tick: 1目盛りの長さ (秒)
+            slots: ホイールの目盛り数
+        """
+        self.tick = tick
+        self._slots: list[list[Timer]] = [[] for _ in range(slots)]
+        self._cursor = 0
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._stopped = False
+
+    def __len__(self) -> int:
+        """登録中のタイマー数."""
+        return self._pending
+
+    def schedule(self, delay: float, callback: Callable[[], None]) -> Timer:
+        """delay 秒後に callback を呼び出すタイマーを登録する.
+
+        Args:
+            delay: 遅延 (秒, 目盛り単位に切り上げる)
+            callback: 呼び出す関数 (ホイールのスレッドで実行される)
+
+        Returns:
+            Timer: 取り消しに使うタイマー
+        """
+        ticks = max(1, math.ceil(delay / self.tick))
+        slots = len(self._slots)
+        with self._cond:
+            timer = Timer(callback, (ticks - 1) // slots)
+            self._slots[(self._cursor + ticks) % slots].append(timer)
+            self._pending += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped = False
+                self._thread = threading.Thread(
+                    target=self._run, name="timer-wheel", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify()
+        return timer
+
+    def stop(self) -> None:
+        """スレッドを停止する (未発火のタイマーは呼び出さない)."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def _advance(self) -> list[Timer]:
+        """1目盛り進め、期限になったタイマーを取り出す.
+
+        Returns:
+            list[Timer]: 期限になったタイマー
+        """
+        with self._cond:
+            self._cursor = (self._cursor + 1) % len(self._slots)
+            slot = self._slots[self._cursor]
+            expired, remaining = [], []
+            for timer in slot:
+                if timer.cancelled:
+                    self._pending -= 1
+                elif timer.rounds > 0:
+                    timer.rounds -= 1
+                    remaining.append(timer)
+                else:
+                    self._pending -= 1
+                    expired.append(timer)
+            self._slots[self._cursor] = remaining
+            return expired
+
+    def _run(self) -> None:
+        """ホイールを回すループ."""
+        next_tick = time.monotonic() + self.tick
+        while True:
+            with self._cond:
+                while not self._stopped and self._pending == 0:
+                    self._cond.wait()
+                    # 休止明けは現在時刻から数え直す
+                    next_tick = time.monotonic() + self.tick
+                if self._stopped:
+                    return
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            next_tick += self.tick
+            for timer in self._advance():
+                try:
+                    timer.callback()
+                except Exception as e:
+                    logger.error("Timer callback failed: %s", e)
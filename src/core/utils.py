@@ -1,10 +1,30 @@
 """ユーティリティ関数を提供するモジュール."""
 
-import json
+import copy
+import functools
 from pathlib import Path
+from typing import Any
 
 from line_works.requests.send_message import FlexContent
 
+from core import codec
+
+# Flexメッセージのテンプレートを置くディレクトリ
+FLEX_DIR = Path(__file__).parent.parent / "flex_messages"
+
+
+@functools.cache
+def _load_template(filename: str) -> Any:
+    """テンプレートを読み込み、プロセス内で共有する.
+
+    Args:
+        filename: 読み込むJSONファイルの名前
+
+    Returns:
+        Any: 読み込んだテンプレート (変更しないこと)
+    """
+    return codec.load_file(FLEX_DIR / filename)
+
 
 def load_flex_message(
     filename: str, alt_text: str = "Flex Message"
@@ -18,7 +38,5 @@ def load_flex_message(
     Returns:
         読み込んだFlexメッセージの内容
     """
-    flex_dir = Path(__file__).parent.parent / "flex_messages"
-    with open(flex_dir / filename, encoding="utf-8") as f:
-        content = json.load(f)
+    content = copy.deepcopy(_load_template(filename))
     return FlexContent(alt_text=alt_text, contents=content)
@@ -11,15 +11,34 @@ Using sdk Link(line-works-sdk v3.4):
 """
 
 import logging
+import os
 import time
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
 from typing import Any, ClassVar, TypedDict
+from urllib.parse import urlsplit
 
 from line_works import (
     LineWorks,  # Importing the existing line-works-sdk library
 )
+from line_works.openapi.talk.configuration import Configuration
 from requests.exceptions import HTTPError
 
+from config.config import CACHE_DIR, USER_INFO_CACHE_TTL
+from core import codec
+from core.contacts import ContactDirectory
+from core.history import (
+    DEFAULT_PAGE_SIZE,
+    DEFAULT_PREFETCH,
+    DIRECTION_BACKWARD,
+    ChannelHistoryIterator,
+)
+from core.issue_cache import IssueCache
+from core.profile_cache import ProfileCache
+from core.single_flight import SingleFlight, make_key
+
+logger = logging.getLogger(__name__)
+
 
 class Name(TypedDict):
     """Name of the user."""
@@ -77,6 +96,41 @@ class CustomLineWorks(LineWorks):
     """Extended library for Line Works."""
 
     BASE_URL: ClassVar[str] = "https://talk.worksmobile.com"
+    ISSUE_CACHE: ClassVar[IssueCache] = IssueCache(
+        os.path.join(CACHE_DIR, "issues")
+    )
+    # ユーザー情報 (アカウント間で共有)
+    PROFILE_CACHE: ClassVar[ProfileCache] = ProfileCache(
+        ttl=USER_INFO_CACHE_TTL
+    )
+    # 名前で検索する連絡先 (チャット一覧とユーザー情報から集める)
+    CONTACTS: ClassVar[ContactDirectory] = ContactDirectory()
+    # 期間指定で障害情報を取得する際の同時リクエスト数
+    ISSUE_FETCH_WORKERS: ClassVar[int] = 8
+
+    # 同時に発行された同一リクエストをまとめる (アカウント間で共有)
+    SINGLE_FLIGHT: ClassVar[SingleFlight] = SingleFlight()
+    # 副作用が無く、まとめても安全なPOSTエンドポイント
+    COALESCED_POST_ENDPOINTS: ClassVar[frozenset[str]] = frozenset(
+        {
+            "/p/oneapp/client/chat/getVisibleUserChannelList",
+            "/p/oneapp/client/chat/getChannelInfo",
+            "/p/oneapp/client/search/searchChannel",
+        }
+    )
+
+    @classmethod
+    def use_base_url(cls, base_url: str) -> None:
+        """Sends all talk API requests, including the SDK's, to base_url.
+
+        Must be called before the first client is created, since the SDK
+        binds the host when its API client is constructed.
+        """
+        cls.BASE_URL = base_url.rstrip("/")
+        Configuration.set_default(Configuration(host=cls.BASE_URL))
+        # 代替サーバーの応答が実サービスのキャッシュに混ざらないようにする
+        host = urlsplit(cls.BASE_URL).netloc.replace(":", "_")
+        cls.ISSUE_CACHE = IssueCache(os.path.join(CACHE_DIR, f"issues-{host}"))
 
     def custom_request(
         self,
@@ -84,7 +138,27 @@ class CustomLineWorks(LineWorks):
         method: str = "GET",
         data: dict[str, Any] | None = None,
     ) -> dict[str, Any]:
-        """Executes a custom API request."""
+        """Executes a custom API request.
+
+        Identical read requests issued concurrently for the same account
+        share a single backend round trip.
+        """
+        if method == "GET" or endpoint in self.COALESCED_POST_ENDPOINTS:
+            key = make_key(
+                self.works_id, method, endpoint=endpoint, params=data
+            )
+            return self.SINGLE_FLIGHT.do(
+                key, lambda: self._send_request(endpoint, method, data)
+            )
+        return self._send_request(endpoint, method, data)
+
+    def _send_request(
+        self,
+        endpoint: str,
+        method: str,
+        data: dict[str, Any] | None,
+    ) -> dict[str, Any]:
+        """Sends the request without coalescing."""
         try:
             response = self.session.request(
                 method=method,
@@ -93,9 +167,10 @@ class CustomLineWorks(LineWorks):
                 headers=self.session.headers,
             )
             response.raise_for_status()
-            return response.json()
+            # 本文のバイト列を文字列にせずそのまま解析する
+            return codec.loads(response.content)
         except HTTPError as e:
-            logging.error(f"Custom request error: {e}")
+            logger.error("Custom request error: %s", e)
             raise
 
     @staticmethod
@@ -106,13 +181,25 @@ class CustomLineWorks(LineWorks):
     def get_user_info(
         self, user_id: str, domain_id: int = 0, client: str = "PC_WEB"
     ) -> dict[str, Any] | None:
-        """Fetches specific user information."""
+        """Fetches specific user information.
+
+        Profiles are served from PROFILE_CACHE for USER_INFO_CACHE_TTL
+        seconds after they are fetched, and fresh ones are added to
+        CONTACTS.
+        """
+        cached = self.PROFILE_CACHE.get(user_id, domain_id)
+        if cached is not None:
+            return cached
         endpoint = (
             f"/p/contact/v4/users/{user_id}?"
             f"domainId={domain_id}&"
             f"client={client}"
         )
-        return self.custom_request(endpoint)
+        user_info = self.custom_request(endpoint)
+        if isinstance(user_info, dict) and user_info.get("userId"):
+            self.PROFILE_CACHE.put(user_id, domain_id, user_info)
+            self.CONTACTS.add_profile(user_info)
+        return user_info
 
     def get_channel_info(
         self,
@@ -131,38 +218,115 @@ class CustomLineWorks(LineWorks):
         }
         return self.custom_request(endpoint, method="POST", data=data)
 
+    def iter_channel_history(
+        self,
+        channel_no: str,
+        start_message_no: int,
+        direction: int = DIRECTION_BACKWARD,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        prefetch: int = DEFAULT_PREFETCH,
+        stop_message_no: int | None = None,
+        limit: int | None = None,
+    ) -> ChannelHistoryIterator:
+        """Streams channel messages page by page from start_message_no.
+
+        Up to ``prefetch`` getChannelInfo requests are kept in flight and
+        overlapping windows are de-duplicated by messageNo.
+        """
+        return ChannelHistoryIterator(
+            self,
+            channel_no,
+            start_message_no,
+            direction=direction,
+            page_size=page_size,
+            prefetch=prefetch,
+            stop_message_no=stop_message_no,
+            limit=limit,
+        )
+
+    @staticmethod
+    def _parse_issue_date(date_str: str) -> date:
+        """Parses YYYYMMDD or YYYY-MM-DD into a date."""
+        # 日付をYYYY-MM-DD形式に変換
+        if len(date_str) == 8:  # YYYYMMDD形式の場合
+            date_str = f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:]}"
+        return datetime.strptime(date_str, "%Y-%m-%d").date()
+
+    def _fetch_issue(self, day: date, language: str) -> list[Any] | None:
+        """Fetches bug information for one day, bypassing the cache."""
+        timestamp_ms = int(
+            datetime.combine(day, datetime.min.time()).timestamp() * 1000
+        )
+        endpoint = (
+            f"/api/v2/issueDetail?date={timestamp_ms}&language={language}"
+        )
+        response = self.custom_request(endpoint)
+        # レスポンスをログに記録 (本文の長さはフォーマッターで制限)
+        logger.debug("API response: %s", response)
+        if not isinstance(response, list):
+            return None
+        # 未来の日付は内容が変わり得るためキャッシュしない
+        if day <= date.today():
+            self.ISSUE_CACHE.put(day, language, response)
+        return response
+
     def get_issue(
         self, date_str: str, language: str = "ja_JP"
-    ) -> dict[str, Any] | str:
+    ) -> dict[str, Any] | list[Any]:
         """Fetches bug information for the specified date."""
         try:
-            # 日付をYYYY-MM-DD形式に変換
-            if len(date_str) == 8:  # YYYYMMDD形式の場合
-                date = f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:]}"
-            else:
-                date = date_str  # 既にYYYY-MM-DD形式の場合そのまま使用
-
-            timestamp_ms = int(
-                datetime.strptime(date, "%Y-%m-%d").timestamp() * 1000
-            )
-            endpoint = (
-                f"/api/v2/issueDetail?date={timestamp_ms}&language={language}"
-            )
-            response = self.custom_request(endpoint)
-            # レスポンスをログに記録
-            logging.info(f"API response: {response}")
+            day = self._parse_issue_date(date_str)
+            cached = self.ISSUE_CACHE.get(day, language)
+            if cached is not None:
+                return cached
 
             # 取得したバグ情報を整形
-            if isinstance(response, list):
+            response = self._fetch_issue(day, language)
+            if response is not None:
                 return response
             return {"error": "Unexpected response format"}
         except ValueError as e:
-            logging.error(f"Date format error: {e}")
+            logger.error("Date format error: %s", e)
             return {"error": "YYYY-MM-DD"}
         except Exception as e:
-            logging.error(f"Error during get_issue execution: {e}")
+            logger.error("Error during get_issue execution: %s", e)
         return {"error": "An error occurred."}
 
+    def get_issues_range(
+        self,
+        days: int = 30,
+        end: date | None = None,
+        language: str = "ja_JP",
+    ) -> list[tuple[date, list[Any] | None]]:
+        """Fetches bug information for the last ``days`` days up to ``end``.
+
+        Cached days are served locally; missing days are fetched
+        concurrently. Results are returned in ascending date order and a
+        day that could not be fetched has ``None``.
+        """
+        end = end or date.today()
+        targets = [end - timedelta(days=i) for i in range(days - 1, -1, -1)]
+        results: dict[date, list[Any] | None] = {
+            day: self.ISSUE_CACHE.get(day, language) for day in targets
+        }
+        missing = [day for day, issues in results.items() if issues is None]
+
+        def fetch(day: date) -> list[Any] | None:
+            try:
+                return self._fetch_issue(day, language)
+            except Exception as e:
+                logger.error("Failed to fetch issues for %s: %s", day, e)
+                return None
+
+        if missing:
+            workers = min(self.ISSUE_FETCH_WORKERS, len(missing))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for day, issues in zip(
+                    missing, executor.map(fetch, missing), strict=True
+                ):
+                    results[day] = issues
+        return [(day, results[day]) for day in targets]
+
     def get_service_status(self) -> dict[str, Any] | str:
         """Fetches the current service status."""
         return self.custom_request("/p/oneapp/client/status")
@@ -196,7 +360,10 @@ class CustomLineWorks(LineWorks):
         )
 
     def get_all_chats(self, domain_id: int, user_no: int) -> dict[str, Any]:
-        """Fetches all chat information."""
+        """Fetches all chat information.
+
+        Members listed in the chats are added to CONTACTS.
+        """
         data = {
             "serviceId": "works",
             "userKey": {"domainId": domain_id, "userNo": user_no},
@@ -209,11 +376,15 @@ class CustomLineWorks(LineWorks):
             "isPin": False,
             "requestAgain": False,
         }
-        return self.custom_request(
+        response = self.custom_request(
             "/p/oneapp/client/chat/getVisibleUserChannelList",
             method="POST",
             data=data,
         )
+        chats = response.get("result") if isinstance(response, dict) else None
+        if isinstance(chats, list):
+            self.CONTACTS.add_chat_list(chats)
+        return response
 
     def get_all_friends(self, domain_id: int, user_no: int) -> list[dict]:
         """Fetches all information of friends (1-on-1 chats)."""
@@ -241,9 +412,9 @@ class CustomLineWorks(LineWorks):
                 "result", []
             )
             if not isinstance(all_chats, list):
-                logging.error(
-                    "Unexpected structure in get_all_chats response: "
-                    f"{all_chats}"
+                logger.error(
+                    "Unexpected structure in get_all_chats response: %s",
+                    all_chats,
                 )
                 return []
 
@@ -254,8 +425,9 @@ class CustomLineWorks(LineWorks):
             ]
 
         except Exception as e:
-            logging.error(
-                "Error fetching channel information for type "
-                f"{target_channel_type}: {e}"
+            logger.error(
+                "Error fetching channel information for type %s: %s",
+                target_channel_type,
+                e,
             )
             return []
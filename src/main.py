@@ -13,17 +13,63 @@ Using sdk Link(line-works-sdk v3.4):
 https://github.com/nanato12/line-works-sdk/releases/tag/v3.4
 """
 
+import atexit
+import functools
 import logging
+import os
+import signal
+import sys
+from types import FrameType
 from typing import Any
 
 from line_works.client import LineWorks
 from line_works.mqtt.enums.notification_type import NotificationType
 from line_works.mqtt.enums.packet_type import PacketType
 from line_works.mqtt.models.packet import MQTTPacket
-from line_works.tracer import LineWorksTracer
 
-from config.config import PASSWORD, WORKS_ID
-from core.handlers.message_handler import MessageHandler
+from config.accounts import load_accounts
+from config.config import (
+    ACCOUNTS_FILE,
+    CACHE_DIR,
+    CATCH_UP,
+    CATCH_UP_MAX_MESSAGES,
+    CATCH_UP_WORKERS,
+    DISPATCH_WORKERS,
+    LINE_WORKS_BASE_URL,
+    LINK_STALL_SECONDS,
+    PASSWORD,
+    PROFILE_ON_START,
+    RECONNECT_BASE_DELAY,
+    RECONNECT_MAX_DELAY,
+    SNAPSHOT_FILE,
+    STATUS_ALERT_CHANNELS,
+    STATUS_HEALTHY_INTERVAL,
+    STATUS_INCIDENT_INTERVAL,
+    STATUS_WATCH,
+    WORKS_ID,
+)
+from core.catchup import CatchUp, HighWaterMarks
+from core.get_info import warm_up
+from core.handlers.command_handler import CHANNEL_PAGES
+from core.handlers.message_handler import (
+    DEFAULT_IGNORED_IDS_PATH,
+    MessageHandler,
+)
+from core.ignore_list import get_ignore_list
+from core.link_monitor import LinkMonitor, get_link_monitor
+from core.logging_config import configure_logging
+from core.multi_account import MultiAccountBot
+from core.profiler import get_profiler, install_signal_handler
+from core.serializer import LazyPayload
+from core.snapshot import (
+    SnapshotSection,
+    file_fingerprint,
+    fingerprint,
+    get_snapshot_registry,
+)
+from core.status_watcher import ServiceStatusWatcher, set_status_watcher
+from core.supervisor import TracerSupervisor
+from custom_line_works import CustomLineWorks
 
 logger = logging.getLogger(__name__)
 
@@ -102,59 +148,294 @@ class PayloadValidator:
         return cls.is_valid_notification_type(payload.notification_type)
 
 
-def receive_publish_packet(works: LineWorks, packet: MQTTPacket) -> None:
+def extract_payload(packet: MQTTPacket) -> Any | None:
+    """パブリッシュパケットから処理対象のペイロードを取り出す.
+
+    Args:
+        packet: 受信したMQTTパケット
+
+    Returns:
+        Any | None: 処理対象のペイロード (対象外の場合None)
+    """
+    if not packet or not hasattr(packet, "payload"):
+        logger.warning("Invalid packet received: packet or payload is None")
+        return None
+
+    payload = packet.payload
+
+    # ペイロードのバリデーション
+    if not PayloadValidator.is_valid_message_payload(payload):
+        notification_type = getattr(payload, "notification_type", None)
+        if notification_type:
+            logger.debug(
+                "処理する通知タイプ: %s %s",
+                notification_type,
+                LazyPayload(payload),
+            )
+        else:
+            logger.warning("Invalid payload type: %s", type(payload))
+        return None
+
+    logger.debug("受信ペイロード: %s", LazyPayload(payload))
+
+    if not payload.channel_no:
+        logger.warning("No channel number in payload")
+        return None
+
+    return payload
+
+
+def receive_publish_packet(
+    works: LineWorks,
+    packet: MQTTPacket,
+    handler: MessageHandler | None = None,
+    catch_up: CatchUp | None = None,
+    monitor: LinkMonitor | None = None,
+) -> None:
     """パブリッシュパケットを受信して処理する関数.
 
     Args:
         works: LineWorksクライアント
         packet: 受信したMQTTパケット
+        handler: 使い回すメッセージハンドラー (省略時は新規作成)
+        catch_up: 受信したメッセージを記録するキャッチアップ
+        monitor: 作成から処理開始までの遅延の記録先
     """
     try:
-        if not packet or not hasattr(packet, "payload"):
-            logger.warning(
-                "Invalid packet received: packet or payload is None"
-            )
+        payload = extract_payload(packet)
+        if payload is None:
             return
 
-        payload = packet.payload
-
-        # ペイロードのバリデーション
-        if not PayloadValidator.is_valid_message_payload(payload):
-            notification_type = getattr(payload, "notification_type", None)
-            if notification_type:
-                logger.debug(f"処理する通知タイプ: {notification_type}")
-            else:
-                logger.warning(f"Invalid payload type: {type(payload)}")
-            return
+        # ハイウォーターマークを進める
+        if catch_up is not None:
+            catch_up.observe(payload)
 
-        if not payload.channel_no:
-            logger.warning("No channel number in payload")
-            return
+        # メッセージの作成から処理開始までの遅延を記録
+        if monitor is not None:
+            monitor.observe_delay(getattr(payload, "create_time", None))
 
         # メッセージハンドラーを作成
-        handler = MessageHandler()
+        if handler is None:
+            handler = MessageHandler()
 
         # メッセージを処理
         handler.handle_message(works, payload)
 
     except Exception as e:
-        logger.error(f"Error processing packet: {str(e)}")
+        logger.error("Error processing packet: %s", e)
         return
 
 
+def start_catch_up(
+    works: LineWorks, handler: MessageHandler, marks_path: str
+) -> CatchUp:
+    """取りこぼしたメッセージの処理をバックグラウンドで開始する.
+
+    Args:
+        works: LineWorksクライアント
+        handler: メッセージハンドラー
+        marks_path: ハイウォーターマークの保存先
+
+    Returns:
+        CatchUp: ライブ受信の記録にも使うキャッチアップ
+    """
+    marks = HighWaterMarks(marks_path)
+    atexit.register(marks.save)
+    catch_up = CatchUp(
+        # ログインはライブ受信を遅らせないようキャッチアップのスレッドで行う
+        functools.partial(
+            CustomLineWorks, works_id=works.works_id, password=works.password
+        ),
+        works,
+        handler.handle_message,
+        marks,
+        max_messages=CATCH_UP_MAX_MESSAGES,
+        workers=CATCH_UP_WORKERS,
+    )
+    catch_up.start()
+    return catch_up
+
+
+def start_status_watcher(
+    works_id: str, password: str, works: LineWorks
+) -> None:
+    """サービスステータスの監視を開始する.
+
+    Args:
+        works_id: ステータス取得に使うアカウントのID
+        password: ステータス取得に使うアカウントのパスワード
+        works: アラートの送信に使うLineWorksクライアント
+    """
+    custom_works = CustomLineWorks(works_id=works_id, password=password)
+    watcher = ServiceStatusWatcher(
+        fetch_status=custom_works.get_service_status,
+        works=works,
+        alert_channels=STATUS_ALERT_CHANNELS,
+        healthy_interval=STATUS_HEALTHY_INTERVAL,
+        incident_interval=STATUS_INCIDENT_INTERVAL,
+    )
+    set_status_watcher(watcher)
+    watcher.start()
+
+
+def restore_snapshot(path: str) -> None:
+    """前回の終了時の状態を復元し、終了時に保存するよう登録する.
+
+    接続先ごとに内容が異なるセクションは、接続先が変わった場合に捨てる.
+
+    Args:
+        path: スナップショットのファイル
+    """
+    registry = get_snapshot_registry()
+    host = fingerprint(CustomLineWorks.BASE_URL)
+    registry.register(
+        SnapshotSection(
+            name="channels",
+            dump=CHANNEL_PAGES.export,
+            restore=CHANNEL_PAGES.restore,
+            max_age=CHANNEL_PAGES.ttl,
+            fingerprint=lambda: host,
+        )
+    )
+    registry.register(
+        SnapshotSection(
+            name="profiles",
+            dump=CustomLineWorks.PROFILE_CACHE.export,
+            restore=CustomLineWorks.PROFILE_CACHE.restore,
+            max_age=CustomLineWorks.PROFILE_CACHE.ttl,
+            fingerprint=lambda: host,
+        )
+    )
+    # 連絡先は復元しても未更新として扱い、見つからない名前で取り直す
+    registry.register(
+        SnapshotSection(
+            name="contacts",
+            dump=CustomLineWorks.CONTACTS.export,
+            restore=CustomLineWorks.CONTACTS.restore,
+            fingerprint=lambda: host,
+        )
+    )
+    registry.register(
+        SnapshotSection(
+            name="ignore_list",
+            dump=lambda: get_ignore_list(
+                DEFAULT_IGNORED_IDS_PATH
+            ).export_state(),
+            restore=lambda state: get_ignore_list(
+                DEFAULT_IGNORED_IDS_PATH, state
+            ),
+            fingerprint=lambda: file_fingerprint([DEFAULT_IGNORED_IDS_PATH]),
+        )
+    )
+    registry.load(path)
+    atexit.register(registry.save, path)
+
+
+def install_shutdown_handler() -> None:
+    """SIGTERM でも atexit に登録した保存処理が行われるようにする.
+
+    既定の SIGTERM は atexit を実行せずにプロセスを終了するため、
+    スナップショット、ハイウォーターマーク、ログのキューが保存されない.
+    SystemExit を送出して通常の終了と同じ経路で終える.
+    メインスレッドから呼ぶこと.
+    """
+
+    def terminate(signum: int, frame: FrameType | None) -> None:
+        # 保存中に再度受け取った場合は既定の動作で即座に終了する
+        signal.signal(signum, signal.SIG_DFL)
+        sys.exit(128 + signum)
+
+    signal.signal(signal.SIGTERM, terminate)
+
+
+def run_multi_account(path: str) -> None:
+    """設定ファイルの全アカウントを1プロセスで動かす.
+
+    Args:
+        path: 複数アカウントの設定ファイル (YAML)
+    """
+    config = load_accounts(path, dispatch_workers=DISPATCH_WORKERS)
+    logger.info("Starting %d account(s) from %s", len(config.accounts), path)
+
+    # サービスステータスは先頭のアカウントで監視する
+    if STATUS_WATCH:
+        first = config.accounts[0]
+        works = CustomLineWorks(
+            works_id=first.works_id, password=first.password
+        )
+        start_status_watcher(first.works_id, first.password, works)
+
+    MultiAccountBot(config, extract_payload).run()
+
+
 def main() -> None:
     """メイン関数."""
-    # LineWorksクライアントを作成
-    works = LineWorks(works_id=WORKS_ID, password=PASSWORD)
+    # ログ出力をキュー経由に設定
+    configure_logging()
+
+    # システムメトリクスのバックグラウンド収集を開始
+    warm_up()
+
+    # SIGUSR1 でプロファイリングを切り替えられるようにする
+    install_signal_handler()
+    if PROFILE_ON_START > 0:
+        get_profiler().start(PROFILE_ON_START)
+
+    # 代替サーバーを使う場合はSDKのリクエストも含めて向け先を変える
+    if LINE_WORKS_BASE_URL:
+        CustomLineWorks.use_base_url(LINE_WORKS_BASE_URL)
 
-    # トレーサーを作成
-    tracer = LineWorksTracer(works=works)
+    # SIGTERM (docker stop など) でも終了時の保存を行う
+    install_shutdown_handler()
 
-    # パケット受信時のコールバックを設定
-    tracer.add_trace_func(PacketType.PUBLISH, receive_publish_packet)
+    # 前回の終了時のキャッシュを復元
+    if SNAPSHOT_FILE:
+        restore_snapshot(SNAPSHOT_FILE)
 
-    # トレーサーを開始
-    tracer.trace()
+    # 複数アカウントモード
+    if ACCOUNTS_FILE:
+        run_multi_account(ACCOUNTS_FILE)
+        return
+
+    # LineWorksクライアントを作成
+    works = LineWorks(works_id=WORKS_ID, password=PASSWORD)
+
+    # サービスステータスの監視を開始
+    if STATUS_WATCH:
+        start_status_watcher(WORKS_ID, PASSWORD, works)
+
+    # 再接続後もハンドラーとキャッシュを使い回す
+    handler = MessageHandler()
+
+    # 前回の実行から今回の接続までに届いたメッセージを処理
+    catch_up = (
+        start_catch_up(
+            works, handler, os.path.join(CACHE_DIR, "high_water_marks.json")
+        )
+        if CATCH_UP
+        else None
+    )
+
+    # 接続の状態とキープアライブの往復時間を監視
+    monitor = get_link_monitor("tracer", LINK_STALL_SECONDS)
+
+    supervisor = TracerSupervisor(
+        works,
+        {
+            PacketType.PUBLISH: functools.partial(
+                receive_publish_packet,
+                handler=handler,
+                catch_up=catch_up,
+                monitor=monitor,
+            )
+        },
+        base_delay=RECONNECT_BASE_DELAY,
+        max_delay=RECONNECT_MAX_DELAY,
+        monitor=monitor,
+    )
+
+    # トレーサーを開始 (切断時は自動で再接続)
+    supervisor.run()
 
 
 if __name__ == "__main__":
@@ -1,47 +1,97 @@
 """Line WORKS Notification System.
 
-This module provides functionality to send notifications to specific users
-using the LINE WORKS API.
+This module provides functionality to send notifications to users and
+channels using the LINE WORKS API.
 """
 
-import json
+import argparse
+import copy
+import functools
+import ipaddress
 import logging
 import os
 import platform
+import signal
 import socket
+import socketserver
 import sys
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict
+from typing import Any, Dict, List
 
 import psutil
 from dotenv import load_dotenv
 from line_works.openapi.talk.models.flex_content import FlexContent
 
+from core import codec
+from core.logging_config import configure_logging
+from core.system_sampler import get_sampler
 from custom_line_works import CustomLineWorks
 
-# Logger setup
+# Logger setup (handlers are attached in main() via configure_logging)
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-
-file_handler = logging.FileHandler('notify.log', encoding='utf-8')
-file_handler.setLevel(logging.DEBUG)
-file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
-
-stream_handler = logging.StreamHandler()
-stream_handler.setLevel(logging.DEBUG)
-stream_handler.setFormatter(formatter)
-logger.addHandler(stream_handler)
 
 # Load environment variables from .env file
 load_dotenv()
 
 # Environment variables
 NOTIFY_USER_ID = os.getenv('NOTIFY_USER_ID', '307463507')
+# Comma separated recipients, e.g. "user:307463507,channel:123456789"
+NOTIFY_RECIPIENTS = os.getenv('NOTIFY_RECIPIENTS', '')
+NOTIFY_LOG_FILE = os.getenv('NOTIFY_LOG_FILE', 'logs/notify.jsonl')
 WORKS_ID = os.getenv('WORKS_ID')
 PASSWORD = os.getenv('WORKS_PASSWORD')
 
+# Upper bound for a single system-info probe (seconds)
+PROBE_TIMEOUT = float(os.getenv('NOTIFY_PROBE_TIMEOUT', '2'))
+# Maximum number of concurrent sends
+MAX_SEND_WORKERS = int(os.getenv('NOTIFY_MAX_WORKERS', '8'))
+# Unix domain socket of the notification daemon
+NOTIFY_SOCKET = os.getenv('NOTIFY_SOCKET') or os.path.join(
+    os.getenv('XDG_RUNTIME_DIR') or tempfile.gettempdir(),
+    'nezu-works-notify.sock',
+)
+# Requests arriving within this window are merged into one digest (seconds)
+DEBOUNCE_SECONDS = float(os.getenv('NOTIFY_DEBOUNCE_SECONDS', '3'))
+
+RECIPIENT_KINDS = ("user", "channel")
+
+
+@dataclass(frozen=True)
+class Recipient:
+    """A notification destination."""
+
+    kind: str
+    id: int
+
+    @classmethod
+    def parse(cls, spec: str) -> "Recipient":
+        """Parses "user:<id>", "channel:<id>" or a bare user id."""
+        kind, _, value = spec.strip().rpartition(":")
+        kind = kind or "user"
+        if kind not in RECIPIENT_KINDS:
+            raise ValueError(f"Unknown recipient kind: {spec}")
+        return cls(kind=kind, id=int(value))
+
+    def __str__(self) -> str:
+        return f"{self.kind}:{self.id}"
+
+
+@dataclass(frozen=True)
+class DeliveryResult:
+    """Result of sending a notification to one recipient."""
+
+    recipient: Recipient
+    ok: bool
+    elapsed: float
+    error: str = ""
+
+
 class SystemInfo:
     """Retrieves system information."""
 
@@ -51,7 +101,11 @@ class SystemInfo:
 
     @staticmethod
     def cpu_usage() -> str:
-        return f"{psutil.cpu_percent(interval=1):.1f}%"
+        # The background sampler avoids blocking in cpu_percent(interval=1)
+        snapshot = get_sampler().snapshot(wait=PROBE_TIMEOUT)
+        if snapshot is None:
+            return "N/A"
+        return f"{snapshot.cpu_percent:.1f}%"
 
     @staticmethod
     def memory_usage() -> str:
@@ -59,9 +113,25 @@ class SystemInfo:
 
     @staticmethod
     def ip_address() -> str:
-        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
-            s.connect(("8.8.8.8", 80))
-            return s.getsockname()[0]
+        """Returns the first global IPv4 address of an interface that is up.
+
+        Reads the local interface table instead of opening a socket.
+        """
+        stats = psutil.net_if_stats()
+        fallback = "N/A"
+        for name, addrs in psutil.net_if_addrs().items():
+            if name in stats and not stats[name].isup:
+                continue
+            for addr in addrs:
+                if addr.family != socket.AF_INET:
+                    continue
+                ip = ipaddress.ip_address(addr.address)
+                if ip.is_loopback or ip.is_link_local:
+                    continue
+                if ip.is_global:
+                    return addr.address
+                fallback = addr.address
+        return fallback
 
     @staticmethod
     def disk_usage() -> str:
@@ -75,87 +145,313 @@ class NotificationTemplate:
         self.template: Dict = {}
 
     def load_template(self) -> None:
-        with open(self.template_path, "r", encoding="utf-8") as f:
-            self.template = json.load(f)
+        self.template = codec.load_file(self.template_path)
 
     def replace_variables(self, variables: Dict[str, str]) -> Dict:
-        def replace_text(obj: Dict, variables: Dict) -> Dict:
+        def replace_text(obj: Any) -> Any:
+            if isinstance(obj, str):
+                # ${}形式の変数を置換
+                for var_name, var_value in variables.items():
+                    obj = obj.replace(f"${{{var_name}}}", var_value)
+                return obj
             if isinstance(obj, dict):
-                for key, value in obj.items():
-                    if isinstance(value, str):
-                        # ${}形式の変数を置換
-                        for var_name, var_value in variables.items():
-                            value = value.replace(f"${{{var_name}}}", var_value)
-                        obj[key] = value
-                    elif isinstance(value, dict):
-                        replace_text(value, variables)
+                return {key: replace_text(value) for key, value in obj.items()}
+            if isinstance(obj, list):
+                return [replace_text(value) for value in obj]
             return obj
 
-        return replace_text(self.template.copy(), variables)
+        return replace_text(copy.deepcopy(self.template))
 
 def load_flex_message(filename: str, alt_text: str) -> FlexContent:
-    with open(f"src/flex_messages/{filename}", "r", encoding="utf-8") as f:
-        flex_content = json.load(f)
+    flex_content = codec.load_file(f"src/flex_messages/{filename}")
     return FlexContent(altText=alt_text, contents=flex_content)
 
-def get_system_info() -> Dict[str, str]:
-    """Returns a dictionary of system information."""
-    return {
-        "$os": SystemInfo.os_info(),
-        "$cpu": SystemInfo.cpu_usage(),
-        "$memory": SystemInfo.memory_usage(),
-        "$ip": SystemInfo.ip_address(),
-        "$disk": SystemInfo.disk_usage()
+def get_system_info(timeout: float = PROBE_TIMEOUT) -> Dict[str, str]:
+    """Returns a dictionary of system information.
+
+    All probes run in parallel; a probe that does not finish within
+    ``timeout`` seconds is reported as "N/A".
+    """
+    probes: Dict[str, Callable[[], str]] = {
+        "os": SystemInfo.os_info,
+        "cpu": SystemInfo.cpu_usage,
+        "memory": SystemInfo.memory_usage,
+        "ip": SystemInfo.ip_address,
+        "disk": SystemInfo.disk_usage,
     }
+    executor = ThreadPoolExecutor(max_workers=len(probes))
+    futures = {name: executor.submit(probe) for name, probe in probes.items()}
+    wait(futures.values(), timeout=timeout)
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    info = {}
+    for name, future in futures.items():
+        if future.done() and future.exception() is None:
+            info[name] = future.result()
+        else:
+            logger.warning("System info probe failed or timed out: %s", name)
+            info[name] = "N/A"
+    return info
 
 def get_github_info() -> Dict[str, str]:
     """Returns GitHub Actions information."""
     return {
-        "$github_url": os.getenv('GITHUB_SERVER_URL', '') + '/' + 
-                       os.getenv('GITHUB_REPOSITORY', '') + '/' + 
+        "$github_url": os.getenv('GITHUB_SERVER_URL', '') + '/' +
+                       os.getenv('GITHUB_REPOSITORY', '') + '/' +
                        os.getenv('GITHUB_RUN_ID', '')
     }
 
-def send_flex_notification(result: str) -> None:
-    """LINE WORKS APIを使用して通知メッセージを送信します。"""
-    # 変数の値を設定
+def get_recipients(specs: List[str] | None = None) -> List[Recipient]:
+    """Resolves recipients from args, NOTIFY_RECIPIENTS or NOTIFY_USER_ID."""
+    if not specs:
+        specs = [s for s in NOTIFY_RECIPIENTS.split(',') if s.strip()]
+    if not specs:
+        specs = [NOTIFY_USER_ID]
+    # 重複を除きつつ順序を保つ
+    return list(dict.fromkeys(Recipient.parse(spec) for spec in specs))
+
+def render_notification(result: str, status: str = "完了") -> FlexContent:
+    """Renders the notification template once for all recipients."""
     variables = {
-        "status": "完了",  # 実際のワークフロー状態
+        "status": status,  # 実際のワークフロー状態
         "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),  # 実行時間
         "result": result,  # 実行結果
         **get_system_info()  # システム情報
     }
 
-    # Flexメッセージを読み込む
-    flex_content = load_flex_message(
-        filename="notification.json",
-        alt_text="ワークフロー実行結果通知"
+    # Flexメッセージを構造を保ったまま変数置換
+    return FlexContent(
+        altText="ワークフロー実行結果通知",
+        contents=get_template().replace_variables(variables),
     )
 
-    # 変数を置換
-    flex_content_str = json.dumps(flex_content.contents, ensure_ascii=False)
-    for var_name, var_value in variables.items():
-        flex_content_str = flex_content_str.replace(f"${{{var_name}}}", var_value)
-    
-    # JSON文字列を再度パース
-    flex_content.contents = json.loads(flex_content_str)
+@functools.cache
+def get_template() -> NotificationTemplate:
+    """Loads the notification template once per process."""
+    template = NotificationTemplate("src/flex_messages/notification.json")
+    template.load_template()
+    return template
+
+def send_to_recipients(
+    line_works: CustomLineWorks,
+    flex_content: FlexContent,
+    recipients: List[Recipient],
+    max_workers: int = MAX_SEND_WORKERS,
+) -> List[DeliveryResult]:
+    """Sends the same message to all recipients concurrently.
+
+    All sends share the session of ``line_works``.
+    """
+    def deliver(recipient: Recipient) -> DeliveryResult:
+        started = time.monotonic()
+        try:
+            line_works.send_flex_message(
+                to=recipient.id, flex_content=flex_content
+            )
+        except Exception as e:
+            return DeliveryResult(
+                recipient, False, time.monotonic() - started, str(e)
+            )
+        return DeliveryResult(recipient, True, time.monotonic() - started)
+
+    if not recipients:
+        return []
+    workers = max(1, min(max_workers, len(recipients)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(deliver, recipients))
+
+def send_flex_notification(
+    result: str,
+    recipients: List[Recipient] | None = None,
+    line_works: CustomLineWorks | None = None,
+    status: str = "完了",
+) -> List[DeliveryResult]:
+    """LINE WORKS APIを使用して通知メッセージを送信します。"""
+    flex_content = render_notification(result, status)
 
     # LINE WORKS APIを使用して通知を送信
-    line_works = CustomLineWorks(
-        works_id=WORKS_ID,
-        password=PASSWORD
-    )
-    line_works.send_flex_message(
-        to=int(NOTIFY_USER_ID),
-        flex_content=flex_content
+    if line_works is None:
+        line_works = CustomLineWorks(
+            works_id=WORKS_ID,
+            password=PASSWORD
+        )
+    results = send_to_recipients(
+        line_works, flex_content, recipients or get_recipients()
     )
+    for r in results:
+        if r.ok:
+            logger.info("Sent to %s in %.2fs", r.recipient, r.elapsed)
+        else:
+            logger.error("Failed to send to %s: %s", r.recipient, r.error)
+    return results
+
+@dataclass(frozen=True)
+class PendingNotification:
+    """A notification request waiting in the debounce window."""
+
+    result: str
+    status: str
+    recipients: tuple[Recipient, ...]
+
+
+class NotificationDaemon:
+    """Keeps an authenticated client warm and serves a Unix socket.
+
+    Each connection sends one JSON line such as
+    ``{"result": "...", "status": "...", "to": ["user:1"]}`` and receives
+    ``{"queued": true}`` immediately. Requests that arrive within
+    ``debounce`` seconds of each other are sent as a single digest.
+    """
+
+    def __init__(
+        self,
+        socket_path: str = NOTIFY_SOCKET,
+        debounce: float = DEBOUNCE_SECONDS,
+    ) -> None:
+        self.socket_path = socket_path
+        self.debounce = debounce
+        self.line_works = CustomLineWorks(works_id=WORKS_ID, password=PASSWORD)
+        self.default_recipients = tuple(get_recipients())
+        self._pending: List[PendingNotification] = []
+        self._lock = threading.Lock()
+        self._timer: threading.Timer | None = None
+        self._server: socketserver.ThreadingUnixStreamServer | None = None
+        # テンプレートとサンプラーを事前に温めておく
+        get_template()
+        get_sampler()
+
+    def submit(self, request: Dict[str, Any]) -> None:
+        """Queues a request and arms the debounce timer."""
+        specs = request.get("to") or []
+        recipients = (
+            tuple(get_recipients(specs)) if specs else self.default_recipients
+        )
+        pending = PendingNotification(
+            result=str(request.get("result", "")),
+            status=str(request.get("status", "完了")),
+            recipients=recipients,
+        )
+        with self._lock:
+            self._pending.append(pending)
+            if self._timer is None:
+                self._timer = threading.Timer(self.debounce, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> None:
+        """Sends everything queued in the current window."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._timer = None
+        if not pending:
+            return
+
+        # 宛先ごとにまとめて、複数件ならダイジェストとして送信
+        groups: Dict[tuple[Recipient, ...], List[PendingNotification]] = {}
+        for item in pending:
+            groups.setdefault(item.recipients, []).append(item)
+        for recipients, items in groups.items():
+            if len(items) == 1:
+                result, status = items[0].result, items[0].status
+            else:
+                result = "\n".join(f"[{i.status}] {i.result}" for i in items)
+                status = f"{len(items)}件"
+            self._send(result, status, list(recipients))
+
+    def _send(
+        self, result: str, status: str, recipients: List[Recipient]
+    ) -> None:
+        results = send_flex_notification(
+            result, recipients, self.line_works, status
+        )
+        if results and not any(r.ok for r in results):
+            # セッション切れの可能性があるため一度だけ再ログインする
+            logger.warning("All sends failed; logging in again")
+            self.line_works = CustomLineWorks(
+                works_id=WORKS_ID, password=PASSWORD
+            )
+            send_flex_notification(
+                result, recipients, self.line_works, status
+            )
+
+    def serve_forever(self) -> None:
+        """Serves requests until SIGTERM/SIGINT."""
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                try:
+                    daemon.submit(codec.loads(self.rfile.readline()))
+                    reply = {"queued": True}
+                except (AttributeError, TypeError, ValueError) as e:
+                    reply = {"queued": False, "error": str(e)}
+                self.wfile.write(codec.dumpb(reply) + b"\n")
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._server = socketserver.ThreadingUnixStreamServer(
+            self.socket_path, Handler
+        )
+        self._server.daemon_threads = True
+        os.chmod(self.socket_path, 0o600)
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda *_: self.shutdown())
+        logger.info("Notification daemon listening on %s", self.socket_path)
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            self.flush()
+
+    def shutdown(self) -> None:
+        """Stops serving; queued notifications are flushed on exit."""
+        if self._server:
+            threading.Thread(target=self._server.shutdown).start()
+
 
 def main() -> None:
     """Main execution function."""
-    if len(sys.argv) != 2:
-        logger.error("Usage: python notify.py <result>")
+    parser = argparse.ArgumentParser(
+        description="Send a workflow notification."
+    )
+    parser.add_argument("result", nargs="?", help="workflow result text")
+    parser.add_argument("--status", default="完了", help="workflow status")
+    parser.add_argument(
+        "--to",
+        action="append",
+        metavar="RECIPIENT",
+        help="user:<id> or channel:<id> (repeatable)",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="run as a resident daemon on a Unix domain socket",
+    )
+    parser.add_argument("--socket", default=NOTIFY_SOCKET)
+    args = parser.parse_args()
+    configure_logging(NOTIFY_LOG_FILE)
+
+    if args.daemon:
+        NotificationDaemon(socket_path=args.socket).serve_forever()
+        return
+    if args.result is None:
+        parser.error("result is required unless --daemon is given")
+
+    try:
+        recipients = get_recipients(args.to)
+    except ValueError as e:
+        logger.error("Invalid recipient: %s", e)
+        sys.exit(1)
+
+    results = send_flex_notification(
+        args.result, recipients, status=args.status
+    )
+    if not all(r.ok for r in results):
         sys.exit(1)
-    send_flex_notification(sys.argv[1])
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
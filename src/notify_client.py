@@ -0,0 +1,70 @@
+"""Lightweight client for the notification daemon.
+
+Only the standard library is imported so that each workflow step pays the
+interpreter start-up cost alone. When the daemon is not running, the
+notification is sent directly with ``notify.py`` instead.
+
+Usage:
+    python src/notify_client.py <result> [--status STATUS] [--to RECIPIENT]
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+
+NOTIFY_SOCKET = os.getenv("NOTIFY_SOCKET") or os.path.join(
+    os.getenv("XDG_RUNTIME_DIR") or tempfile.gettempdir(),
+    "nezu-works-notify.sock",
+)
+CONNECT_TIMEOUT = 2.0
+
+
+def send(
+    result: str,
+    status: str = "完了",
+    recipients: list[str] | None = None,
+    socket_path: str = NOTIFY_SOCKET,
+) -> dict:
+    """Sends one request to the daemon and returns its reply."""
+    request = {"result": result, "status": status, "to": recipients or []}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        with sock.makefile("rb") as f:
+            return json.loads(f.readline() or b"{}")
+
+
+def main() -> None:
+    """Main execution function."""
+    parser = argparse.ArgumentParser(
+        description="Queue a workflow notification on the daemon."
+    )
+    parser.add_argument("result")
+    parser.add_argument("--status", default="完了")
+    parser.add_argument("--to", action="append", metavar="RECIPIENT")
+    parser.add_argument("--socket", default=NOTIFY_SOCKET)
+    args = parser.parse_args()
+
+    try:
+        reply = send(args.result, args.status, args.to, args.socket)
+    except OSError:
+        # デーモンが起動していない場合は直接送信する
+        notify_py = os.path.join(os.path.dirname(__file__), "notify.py")
+        command = [sys.executable, notify_py, args.result]
+        command += ["--status", args.status]
+        for recipient in args.to or []:
+            command += ["--to", recipient]
+        sys.exit(subprocess.call(command))  # noqa: S603
+
+    if not reply.get("queued"):
+        sys.stderr.write(f"notify daemon rejected request: {reply}\n")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Micro-benchmark of core.codec against the stdlib json module.
+
+Payloads are built from the fake server fixtures at the sizes the bot
+sees in practice: a full searchChannel response, the chat list, a
+getChannelInfo page and a JSON log record. Each case is decoded from raw
+response bytes (what ``custom_request`` receives) and encoded back.
+
+Usage:
+    python src/tools/bench_codec.py [--hits 20000] [--channels 3000]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import timeit
+from collections.abc import Callable
+from typing import Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from core import codec  # noqa: E402
+from tools.fake_line_works_server import Fixtures  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+
+def build_payloads(hits: int, channels: int) -> dict[str, bytes]:
+    """Returns the benchmark payloads as raw UTF-8 response bodies."""
+    fixtures = Fixtures(channels=channels, search_hits=hits)
+    chat = fixtures.channels[0]
+    objects: dict[str, Any] = {
+        "searchChannel": fixtures.search("会議", 0, hits, None),
+        "chatList": {"result": fixtures.channels},
+        "getChannelInfo": fixtures.history(
+            chat["channelNo"], chat["lastMessageNo"], 1, 100
+        ),
+        "logRecord": {
+            "ts": "2026-01-01T00:00:00.000",
+            "level": "INFO",
+            "logger": "core.handlers.message_handler",
+            "msg": "Command !search in channel 100000 was not admitted",
+            "event": "command_rejected",
+        },
+    }
+    return {
+        name: json.dumps(obj, ensure_ascii=False).encode()
+        for name, obj in objects.items()
+    }
+
+
+def best_of(fn: Callable[[], Any], repeat: int) -> float:
+    """Returns the fastest time of one call in seconds."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def main() -> None:
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hits", type=int, default=20000)
+    parser.add_argument("--channels", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    logger.info("codec backend: %s", codec.BACKEND)
+    logger.info(
+        "%-15s %9s %12s %12s %8s %12s %12s %8s",
+        "payload",
+        "KiB",
+        "json.loads",
+        "codec.loads",
+        "speedup",
+        "json.dumps",
+        "codec.dumps",
+        "speedup",
+    )
+    for name, body in build_payloads(args.hits, args.channels).items():
+        obj = json.loads(body)
+        # stdlib path used before: decode the body to text, then parse
+        stdlib_loads = best_of(
+            lambda b=body: json.loads(b.decode()), args.repeat
+        )
+        codec_loads = best_of(lambda b=body: codec.loads(b), args.repeat)
+        stdlib_dumps = best_of(
+            lambda o=obj: json.dumps(o, ensure_ascii=False), args.repeat
+        )
+        codec_dumps = best_of(lambda o=obj: codec.dumps(o), args.repeat)
+        logger.info(
+            "%-15s %9.1f %10.3fms %10.3fms %7.1fx %10.3fms %10.3fms %7.1fx",
+            name,
+            len(body) / 1024,
+            stdlib_loads * 1000,
+            codec_loads * 1000,
+            stdlib_loads / codec_loads,
+            stdlib_dumps * 1000,
+            codec_dumps * 1000,
+            stdlib_dumps / codec_dumps,
+        )
+
+
+if __name__ == "__main__":
+    main()
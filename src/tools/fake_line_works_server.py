@@ -0,0 +1,583 @@
+"""Local stand-in for the LINE WORKS endpoints used by this project.
+
+Serves seeded, deterministic fixtures so commands can be load-tested and
+timed offline. Latency, jitter, 429 responses and 5xx failures can be
+injected per request. Point the bot at it with the base-URL override:
+
+    LINE_WORKS_BASE_URL=http://127.0.0.1:8080 python src/main.py
+
+Only the HTTP APIs are emulated; the MQTT push channel is not.
+
+Usage:
+    python src/tools/fake_line_works_server.py [--port 8080]
+        [--channels 5000] [--search-hits 20000] [--latency 0.05]
+        [--jitter 0.02] [--rate-limit 0.01] [--failure-rate 0.005]
+"""
+
+import argparse
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+DOMAIN_ID = 10000
+TENANT_ID = 20000
+BOT_USER_NO = 1
+FRIEND_CHANNEL_TYPE = 6
+GROUP_CHANNEL_TYPE = 10
+TEXT_MESSAGE_TYPE = 1
+LAST_NAMES = ["佐藤", "鈴木", "高橋", "田中", "伊藤", "渡辺", "山本", "中村"]
+FIRST_NAMES = ["太郎", "花子", "健太", "美咲", "翔", "陽菜", "大輔", "結衣"]
+WORDS = ["会議", "資料", "確認", "障害", "リリース", "レビュー", "ランチ"]
+USER_PATH = re.compile(r"^/p/contact/v4/users/(\d+)$")
+
+
+@dataclass
+class Faults:
+    """Per-request fault injection settings."""
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    rate_limit: float = 0.0
+    failure_rate: float = 0.0
+    retry_after: int = 1
+
+
+class Fixtures:
+    """Deterministic fake data derived from a seed.
+
+    Users and messages are computed on demand from their numbers, so the
+    data set scales to any size without being held in memory. Only the
+    channel list, which is returned as a whole, is materialized.
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        users: int = 2000,
+        channels: int = 1000,
+        messages_per_channel: int = 500,
+        search_hits: int = 10000,
+    ) -> None:
+        """Initializes the fixtures."""
+        self.seed = seed
+        self.users = max(2, users)
+        self.messages_per_channel = max(1, messages_per_channel)
+        self.search_hits = max(0, search_hits)
+        self.started_at = int(time.time())
+        self.channels = [self._channel(i) for i in range(max(0, channels))]
+        self._by_no = {chat["channelNo"]: chat for chat in self.channels}
+
+    def _rng(self, *parts: int) -> random.Random:
+        """Returns a generator seeded by the fixture seed and ``parts``."""
+        return random.Random(hash((self.seed, *parts)))  # noqa: S311
+
+    def display_name(self, user_no: int) -> str:
+        """Returns the display name of a user."""
+        rng = self._rng(1, user_no)
+        return rng.choice(LAST_NAMES) + " " + rng.choice(FIRST_NAMES)
+
+    def user(self, user_no: int) -> dict[str, Any] | None:
+        """Returns the contact of a user, or None if it does not exist."""
+        if not 1 <= user_no <= self.users:
+            return None
+        last, _, first = self.display_name(user_no).partition(" ")
+        return {
+            "userId": user_no,
+            "name": {
+                "firstName": first,
+                "lastName": last,
+                "displayName": f"{last} {first}",
+                "displayPhoneticName": "",
+            },
+            "nickName": "",
+            "photo": {
+                "photoHash": f"{user_no:032x}",
+                "originalPhotoUrl": "https://via.placeholder.com/300",
+                "photoUrl": "https://via.placeholder.com/100",
+                "editable": False,
+            },
+            "organizations": [
+                {"organizationName": "Fake Works", "orgUnits": ["開発部"]}
+            ],
+            "emails": [f"user{user_no}@example.com"],
+            "telephones": [],
+            "messengers": [],
+            "important": False,
+            "worksAt": {
+                "serviceType": "WORKS",
+                "relationStatus": "FRIEND",
+                "privateContactNo": user_no,
+                "guest": False,
+            },
+            "enableDownload": True,
+            "isCounselor": False,
+            "isCounselContact": False,
+        }
+
+    def my_info(self) -> dict[str, Any]:
+        """Returns the logged-in account as expected by the SDK."""
+        return {
+            "tenantId": TENANT_ID,
+            "domainId": DOMAIN_ID,
+            "contactNo": BOT_USER_NO,
+            "readOnly": False,
+            "tempId": False,
+            "name": {
+                "firstName": "Bot",
+                "lastName": "Fake",
+                "phoneticFirstName": "",
+                "phoneticLastName": "",
+                "displayName": "Fake Bot",
+                "phoneticName": "",
+            },
+            "i18nName": "Fake Bot",
+            "i18nNames": [],
+            "photos": [],
+            "organizations": [
+                {
+                    "domainId": DOMAIN_ID,
+                    "organization": "Fake Works",
+                    "groups": [],
+                }
+            ],
+            "emails": [
+                {
+                    "content": "bot@example.com",
+                    "typeCode": "1",
+                    "represent": True,
+                }
+            ],
+            "telephones": [],
+            "messengers": [],
+            "position": "",
+            "department": "",
+            "location": None,
+            "important": False,
+            "executive": False,
+            "photoHash": "",
+            "worksAt": {
+                "id": "fake",
+                "inviteUrl": "",
+                "users": [],
+                "worksAtCount": 0,
+                "idSearchBlock": False,
+            },
+            "accessLimit": False,
+            "userPhotoModify": False,
+            "userAbsenceModify": False,
+            "organization": "Fake Works",
+            "groups": [],
+            "worksServices": [],
+            "customFields": [],
+            "profileStatuses": [],
+            "profileStatusesV2": [],
+            "instance": 0,
+        }
+
+    def _channel(self, index: int) -> dict[str, Any]:
+        """Builds one entry of the channel list."""
+        rng = self._rng(2, index)
+        channel_no = 100000 + index
+        group = rng.random() < 0.3
+        members = rng.sample(
+            range(2, self.users + 1),
+            min(self.users - 1, rng.randint(2, 30) if group else 1),
+        )
+        last_no = rng.randint(1, self.messages_per_channel)
+        last = self.message(channel_no, last_no)
+        channel_type = GROUP_CHANNEL_TYPE if group else FRIEND_CHANNEL_TYPE
+        return {
+            "channelNo": channel_no,
+            "channelType": channel_type,
+            "title": f"グループ{index}" if group else "",
+            "userList": [
+                {
+                    "userNo": BOT_USER_NO,
+                    "name": "Fake Bot",
+                    "relationStatus": "me",
+                }
+            ]
+            + [
+                {
+                    "userNo": user_no,
+                    "name": self.display_name(user_no),
+                    "relationStatus": "friend",
+                }
+                for user_no in members
+            ],
+            "lastMessageNo": last_no,
+            "updateTime": last["createTime"],
+            "content": last["content"],
+            "messageTypeCode": TEXT_MESSAGE_TYPE,
+            "unreadCount": rng.randint(0, 20),
+            "channelExtras": json.dumps({"serviceType": "WORKS"}),
+        }
+
+    def channel(self, channel_no: int) -> dict[str, Any] | None:
+        """Returns a channel of the list, or None if it does not exist."""
+        return self._by_no.get(channel_no)
+
+    def message(self, channel_no: int, message_no: int) -> dict[str, Any]:
+        """Returns one message of a channel."""
+        rng = self._rng(3, channel_no, message_no)
+        user_no = rng.randint(1, self.users)
+        # 1メッセージあたり平均10分の間隔で、起動時刻に最新が来るよう並べる
+        created = (
+            self.started_at
+            - (self.messages_per_channel - message_no) * 600
+            - rng.randint(0, 599)
+        )
+        return {
+            "channelNo": channel_no,
+            "messageNo": message_no,
+            "userNo": user_no,
+            "name": self.display_name(user_no),
+            "content": " ".join(rng.choices(WORDS, k=rng.randint(1, 6))),
+            "messageTypeCode": TEXT_MESSAGE_TYPE,
+            "createTime": created * 1000,
+        }
+
+    def history(
+        self, channel_no: int, message_no: int, direction: int, count: int
+    ) -> dict[str, Any]:
+        """Returns a getChannelInfo page around ``message_no``."""
+        chat = self.channel(channel_no)
+        last_no = chat["lastMessageNo"] if chat else 0
+        count = max(0, min(count, 100))
+        if direction == 2:
+            numbers = range(
+                max(1, message_no), min(last_no, message_no + count - 1) + 1
+            )
+        else:
+            top = min(last_no, message_no or last_no)
+            numbers = range(max(1, top - count + 1), top + 1)
+        return {
+            "result": {
+                "channelNo": channel_no,
+                "lastMessageNo": last_no,
+                "messageList": [self.message(channel_no, n) for n in numbers],
+            }
+        }
+
+    def search(
+        self, keyword: str, start: int, display: int, channel_no: Any
+    ) -> dict[str, Any]:
+        """Returns a page of searchChannel hits for ``keyword``."""
+        total = self.search_hits
+        stop = min(total, max(0, start) + max(0, display))
+        hits = []
+        for i in range(max(0, start), stop):
+            rng = self._rng(4, i)
+            chat = (
+                self.channel(int(channel_no))
+                if channel_no
+                else rng.choice(self.channels or [None])
+            )
+            chat_no = chat["channelNo"] if chat else int(channel_no or 0)
+            user_no = rng.randint(1, self.users)
+            hits.append(
+                {
+                    "channelNo": chat_no,
+                    "messageNo": total - i,
+                    "name": self.display_name(user_no),
+                    "userNo": user_no,
+                    "content": f"{rng.choice(WORDS)} {keyword}",
+                    "messageUnixTime": self.started_at - i * 37,
+                }
+            )
+        return {"result": hits, "totalCount": total}
+
+    def issues(self, timestamp_ms: int) -> list[dict[str, Any]]:
+        """Returns the issues announced for one day."""
+        day = datetime.fromtimestamp(timestamp_ms / 1000, UTC).date()
+        rng = self._rng(5, day.toordinal())
+        return [
+            {
+                "title": f"{rng.choice(WORDS)}機能の不具合 #{i + 1}",
+                "content": "一部の環境で機能が利用できない事象があります。",
+                "date": day.isoformat(),
+            }
+            for i in range(rng.choice([0, 0, 0, 1, 1, 2, 3]))
+        ]
+
+    def sent_message(self, request: dict[str, Any]) -> dict[str, Any]:
+        """Returns the response of sendMessage for ``request``."""
+        now = int(time.time() * 1000)
+        return {
+            "code": 200,
+            "message": "OK",
+            "result": {
+                "messageId": now,
+                "channelNo": int(request.get("channelNo") or 0),
+                "writerId": "bot@example.com",
+                "userNo": BOT_USER_NO,
+                "botNo": 0,
+                "messageNo": now % 1_000_000_000,
+                "content": str(request.get("content") or ""),
+                "memberCount": 2,
+                "messageTypeCode": int(request.get("type") or 1),
+                "messageStatusType": "NORMAL",
+                "messageStatusTypeCode": 1,
+                "extras": request.get("extras"),
+                "tid": 0,
+                "createTime": now,
+                "updateTime": now,
+            },
+        }
+
+
+class FakeLineWorks:
+    """Routes requests to the fixtures and injects faults."""
+
+    def __init__(
+        self, fixtures: Fixtures, faults: Faults | None = None
+    ) -> None:
+        """Initializes the application."""
+        self.fixtures = fixtures
+        self.faults = faults or Faults()
+        self.requests: Counter[str] = Counter()
+        # 負荷試験で増え続けないよう、直近の送信のみ保持する
+        self.sent: deque[dict[str, Any]] = deque(maxlen=1000)
+        self._lock = threading.Lock()
+        self._rng = random.Random(fixtures.seed)  # noqa: S311
+
+    def count(self, path: str) -> None:
+        """Counts one request to ``path``."""
+        with self._lock:
+            self.requests[path] += 1
+
+    def inject(self) -> tuple[HTTPStatus, dict[str, str]] | None:
+        """Sleeps for the configured latency and maybe picks a fault."""
+        with self._lock:
+            jitter = self._rng.uniform(-1, 1) * self.faults.jitter
+            roll = self._rng.random()
+        delay = max(0.0, self.faults.latency + jitter)
+        if delay:
+            time.sleep(delay)
+        if roll < self.faults.rate_limit:
+            return HTTPStatus.TOO_MANY_REQUESTS, {
+                "Retry-After": str(self.faults.retry_after)
+            }
+        if roll < self.faults.rate_limit + self.faults.failure_rate:
+            return HTTPStatus.SERVICE_UNAVAILABLE, {}
+        return None
+
+    def handle(
+        self, method: str, target: str, body: dict[str, Any]
+    ) -> tuple[HTTPStatus, Any]:
+        """Returns the status and JSON body for one request."""
+        url = urlsplit(target)
+        if method == "GET":
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            result = self._get(url.path, query)
+        elif method == "POST":
+            result = self._post(url.path, body)
+        else:
+            result = None
+        if result is None:
+            return HTTPStatus.NOT_FOUND, {"message": f"unknown {url.path}"}
+        return result
+
+    def _get(
+        self, path: str, query: dict[str, str]
+    ) -> tuple[HTTPStatus, Any] | None:
+        """Handles the GET endpoints."""
+        fixtures = self.fixtures
+        if match := USER_PATH.match(path):
+            user = fixtures.user(int(match.group(1)))
+            if user is None:
+                return HTTPStatus.NOT_FOUND, {"message": "user not found"}
+            return HTTPStatus.OK, user
+        if path == "/p/contact/v3/domain/contacts/my":
+            return HTTPStatus.OK, fixtures.my_info()
+        if path == "/p/oneapp/client/status":
+            return HTTPStatus.OK, {"status": "normal", "incidents": []}
+        if path == "/api/v2/issueDetail":
+            return HTTPStatus.OK, fixtures.issues(int(query.get("date", 0)))
+        return None
+
+    def _post(
+        self, path: str, body: dict[str, Any]
+    ) -> tuple[HTTPStatus, Any] | None:
+        """Handles the POST endpoints."""
+        fixtures = self.fixtures
+        if path == "/p/oneapp/client/chat/getVisibleUserChannelList":
+            return HTTPStatus.OK, {"result": fixtures.channels}
+        if path == "/p/oneapp/client/chat/getChannelInfo":
+            return HTTPStatus.OK, fixtures.history(
+                int(body.get("channelNo") or 0),
+                int(body.get("messageNo") or 0),
+                int(body.get("direction") or 1),
+                int(body.get("recentMessageCount") or 20),
+            )
+        if path == "/p/oneapp/client/search/searchChannel":
+            return HTTPStatus.OK, fixtures.search(
+                str(body.get("keyword") or ""),
+                int(body.get("start") or 0),
+                int(body.get("display") or 0),
+                body.get("channelNo"),
+            )
+        if path == "/p/oneapp/client/chat/sendMessage":
+            with self._lock:
+                self.sent.append(body)
+            return HTTPStatus.OK, fixtures.sent_message(body)
+        return None
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """HTTP front end of FakeLineWorks."""
+
+    server: "FakeServer"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:  # noqa: N802
+        """Handles a GET request."""
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:  # noqa: N802
+        """Handles a POST request."""
+        self._dispatch("POST")
+
+    def _dispatch(self, method: str) -> None:
+        """Reads the request, applies faults and writes the response."""
+        app = self.server.app
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            body = json.loads(raw) if raw else {}
+        except ValueError:
+            body = {}
+        if not isinstance(body, dict):
+            body = {}
+
+        app.count(urlsplit(self.path).path)
+        fault = app.inject()
+        if fault is not None:
+            status, headers = fault
+            self._write(status, {"message": status.phrase}, headers)
+            return
+        try:
+            status, payload = app.handle(method, self.path, body)
+        except (TypeError, ValueError) as e:
+            status, payload = HTTPStatus.BAD_REQUEST, {"message": str(e)}
+        self._write(status, payload)
+
+    def _write(
+        self,
+        status: HTTPStatus,
+        payload: Any,
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        """Writes a JSON response."""
+        data = json.dumps(payload, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        """Routes the access log to the module logger."""
+        logger.debug(format, *args)
+
+
+class FakeServer(ThreadingHTTPServer):
+    """Threaded HTTP server bound to a FakeLineWorks application."""
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], app: FakeLineWorks) -> None:
+        """Initializes the server."""
+        super().__init__(address, RequestHandler)
+        self.app = app
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to set in LINE_WORKS_BASE_URL."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> threading.Thread:
+        """Serves in a background thread (for use from load tests)."""
+        thread = threading.Thread(
+            target=self.serve_forever, name="fake-line-works", daemon=True
+        )
+        thread.start()
+        return thread
+
+
+def main() -> None:
+    """Main execution function."""
+    parser = argparse.ArgumentParser(
+        description="Serve fake LINE WORKS endpoints for load testing."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--channels", type=int, default=1000)
+    parser.add_argument("--messages-per-channel", type=int, default=500)
+    parser.add_argument("--search-hits", type=int, default=10000)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds per request"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.0, help="+/- seconds of latency"
+    )
+    parser.add_argument(
+        "--rate-limit", type=float, default=0.0, help="ratio of 429s"
+    )
+    parser.add_argument(
+        "--failure-rate", type=float, default=0.0, help="ratio of 503s"
+    )
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(asctime)s %(levelname)s %(message)s",
+    )
+
+    fixtures = Fixtures(
+        seed=args.seed,
+        users=args.users,
+        channels=args.channels,
+        messages_per_channel=args.messages_per_channel,
+        search_hits=args.search_hits,
+    )
+    faults = Faults(
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_limit=args.rate_limit,
+        failure_rate=args.failure_rate,
+        retry_after=args.retry_after,
+    )
+    app = FakeLineWorks(fixtures, faults)
+    server = FakeServer((args.host, args.port), app)
+    logger.info("Fake LINE WORKS listening on %s", server.base_url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        for path, count in app.requests.most_common():
+            logger.info("%6d %s", count, path)
+
+
+if __name__ == "__main__":
+    main()
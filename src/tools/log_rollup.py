@@ -0,0 +1,641 @@
+"""Incremental rollup of the bot's JSON Lines log into activity charts.
+
+Reads ``logs/bot.jsonl`` and its rotated ``bot.jsonl.N`` backups from the
+position saved by the previous run. It folds the ``message`` and
+``command`` events into hourly and daily aggregate files. Rotated logs
+that have been read completely are compressed into an archive directory.
+The SVG charts and the README stats section are rendered from the
+aggregates alone, so a run costs time proportional to the log written
+since the last run rather than to the whole history.
+
+Files in the stats directory:
+
+    state.json   read position (device, inode, offset) and event times
+    hourly.json  message and command counts per hour (recent days only)
+    daily.json   counts per day by hour of day, message type and command
+
+Usage:
+    python src/tools/log_rollup.py [--log logs/bot.jsonl]
+        [--stats-dir logs/stats] [--archive-dir logs/archive]
+        [--charts-dir docs/stats] [--readme README.md] [--days 30]
+        [--hourly-days 7] [--utc-offset 9] [--no-archive]
+"""
+
+import argparse
+import gzip
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from html import escape
+from typing import Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from config.config import LOG_FILE  # noqa: E402
+from core import codec  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+# Bump when the aggregate layout changes (older files are rebuilt)
+FORMAT_VERSION = 1
+
+# Bytes read from a log file at a time
+CHUNK_SIZE = 1 << 20
+
+# Lines without this marker carry no event and are skipped undecoded
+EVENT_MARKER = b'"event":"'
+
+# The README section between these lines is regenerated
+README_START = "<!-- STATS:START -->"
+README_END = "<!-- STATS:END -->"
+
+# Hours shown in the recent-activity chart
+RECENT_HOURS = 48
+
+# Bars shown in the message type and command charts
+TOP_ITEMS = 10
+
+CHART_COLOR = "#4f81bd"
+
+
+@dataclass(frozen=True)
+class Segment:
+    """One log file, either the live log or a rotated backup."""
+
+    path: str
+    dev: int
+    ino: int
+    size: int
+    mtime: float
+
+
+def list_segments(log_path: str) -> list[Segment]:
+    """Returns the rotated backups and the live log, oldest first."""
+    directory = os.path.dirname(log_path) or "."
+    base = os.path.basename(log_path)
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+
+    backups = []
+    for name in names:
+        suffix = name[len(base) + 1 :] if name.startswith(base + ".") else ""
+        if suffix.isdigit():
+            backups.append((int(suffix), os.path.join(directory, name)))
+    # RotatingFileHandler: a higher number is an older file
+    paths = [path for _, path in sorted(backups, reverse=True)]
+    paths.append(log_path)
+
+    segments = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        segments.append(
+            Segment(
+                path, stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime
+            )
+        )
+    return segments
+
+
+def plan_reads(
+    segments: list[Segment], cursor: dict[str, int] | None
+) -> list[tuple[Segment, int]]:
+    """Returns (segment, start offset) pairs that still have to be read.
+
+    The saved cursor is matched by device and inode, so a file that was
+    renamed by rotation is resumed where the last run stopped and every
+    newer file is read from the start.
+    """
+    if cursor:
+        for i, segment in enumerate(segments):
+            if (segment.dev, segment.ino) != (cursor["dev"], cursor["ino"]):
+                continue
+            # A shorter file than the saved offset was truncated
+            start = cursor["offset"] if cursor["offset"] <= segment.size else 0
+            return [(segment, start)] + [(s, 0) for s in segments[i + 1 :]]
+        logger.warning(
+            "Last read log file is gone; events after offset %d are lost",
+            cursor["offset"],
+        )
+    return [(segment, 0) for segment in segments]
+
+
+def read_events(path: str, start: int, rollup: "Rollup") -> int:
+    """Feeds the event records of complete lines to the rollup.
+
+    A trailing line without a newline is still being written and is left
+    for the next run.
+
+    Returns:
+        int: Offset just past the last complete line.
+    """
+    offset = start
+    with open(path, "rb") as f:
+        f.seek(start)
+        tail = b""
+        while chunk := f.read(CHUNK_SIZE):
+            lines = (tail + chunk).split(b"\n")
+            tail = lines.pop()
+            for line in lines:
+                offset += len(line) + 1
+                if EVENT_MARKER not in line:
+                    continue
+                try:
+                    record = codec.loads(line)
+                except ValueError:
+                    rollup.malformed += 1
+                    continue
+                if isinstance(record, dict):
+                    rollup.add(record)
+    return offset
+
+
+def _load_json(path: str) -> dict[str, Any]:
+    """Loads an aggregate file, or returns {} if it is missing or stale."""
+    try:
+        data = codec.load_file(path)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable %s: %s", path, e)
+        return {}
+    if not isinstance(data, dict) or data.get("version") != FORMAT_VERSION:
+        return {}
+    return data
+
+
+def write_atomic(path: str, data: bytes) -> bool:
+    """Writes a file via a temporary file and rename.
+
+    Returns:
+        bool: False if the file already had this content.
+    """
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        os.unlink(tmp_path)
+        raise
+    return True
+
+
+class Rollup:
+    """Hourly and daily aggregates plus the saved read position."""
+
+    def __init__(self, stats_dir: str, utc_offset: int) -> None:
+        """Loads the aggregates saved in stats_dir."""
+        self.stats_dir = stats_dir
+        self.tz = timezone(timedelta(hours=utc_offset))
+        state = _load_json(self._path("state"))
+        if state.get("utc_offset") != utc_offset:
+            # Buckets are keyed by local time; a new offset starts over
+            state = {}
+        self.state: dict[str, Any] = state or {
+            "version": FORMAT_VERSION,
+            "utc_offset": utc_offset,
+            "cursor": None,
+            "first_event": None,
+            "last_event": None,
+            "last_message": None,
+        }
+        hourly = _load_json(self._path("hourly")) if state else {}
+        daily = _load_json(self._path("daily")) if state else {}
+        self.hourly: dict[str, dict[str, int]] = hourly.get("hours", {})
+        self.daily: dict[str, dict[str, Any]] = daily.get("days", {})
+        self.events = 0
+        self.malformed = 0
+        # UTC hour ("2026-01-01T00") -> (local hour key, day key, hour)
+        self._buckets: dict[str, tuple[str, str, int]] = {}
+
+    def _path(self, name: str) -> str:
+        """Returns the path of an aggregate file."""
+        return os.path.join(self.stats_dir, f"{name}.json")
+
+    def _bucket(self, ts: str) -> tuple[str, str, int]:
+        """Maps a record timestamp to its local hour and day buckets."""
+        bucket = self._buckets.get(ts[:13])
+        if bucket is None:
+            local = datetime.fromisoformat(ts).astimezone(self.tz)
+            bucket = self._buckets[ts[:13]] = (
+                local.strftime("%Y-%m-%dT%H"),
+                local.strftime("%Y-%m-%d"),
+                local.hour,
+            )
+        return bucket
+
+    def add(self, record: dict[str, Any]) -> None:
+        """Adds one log record to the aggregates."""
+        event = record.get("event")
+        if event not in ("message", "command"):
+            return
+        ts = record.get("ts")
+        try:
+            hour_key, day_key, hour = self._bucket(ts)
+        except (TypeError, ValueError):
+            self.malformed += 1
+            return
+
+        self.events += 1
+        state = self.state
+        if state["first_event"] is None or ts < state["first_event"]:
+            state["first_event"] = ts
+        if state["last_event"] is None or ts > state["last_event"]:
+            state["last_event"] = ts
+
+        hourly = self.hourly.setdefault(
+            hour_key, {"messages": 0, "commands": 0}
+        )
+        daily = self.daily.setdefault(
+            day_key,
+            {"messages": 0, "hours": [0] * 24, "types": {}, "commands": {}},
+        )
+        if event == "message":
+            hourly["messages"] += 1
+            daily["messages"] += 1
+            daily["hours"][hour] += 1
+            name = str(record.get("message_type") or "UNKNOWN")
+            daily["types"][name] = daily["types"].get(name, 0) + 1
+            if state["last_message"] is None or ts > state["last_message"]:
+                state["last_message"] = ts
+        else:
+            hourly["commands"] += 1
+            name = str(record.get("command") or "?")
+            daily["commands"][name] = daily["commands"].get(name, 0) + 1
+
+    def prune(self, hourly_days: int) -> None:
+        """Drops hourly buckets older than hourly_days before the newest."""
+        if not self.hourly:
+            return
+        newest = datetime.strptime(max(self.hourly), "%Y-%m-%dT%H")
+        oldest = (newest - timedelta(days=hourly_days)).strftime("%Y-%m-%dT%H")
+        for key in [key for key in self.hourly if key <= oldest]:
+            del self.hourly[key]
+
+    def save(self) -> None:
+        """Writes the aggregates and the read position."""
+        version = {"version": FORMAT_VERSION}
+        write_atomic(
+            self._path("hourly"),
+            codec.dumpb({**version, "hours": self.hourly}, sort_keys=True),
+        )
+        write_atomic(
+            self._path("daily"),
+            codec.dumpb({**version, "days": self.daily}, sort_keys=True),
+        )
+        # The position is written last so a crash re-reads, not skips
+        write_atomic(self._path("state"), codec.dumpb(self.state))
+
+    def window(self, days: int) -> list[str]:
+        """Returns the day keys of the last `days` days with data."""
+        if not self.daily:
+            return []
+        newest = datetime.strptime(max(self.daily), "%Y-%m-%d")
+        oldest = (newest - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        return sorted(key for key in self.daily if key >= oldest)
+
+    def recent_hours(self) -> list[tuple[str, int]]:
+        """Returns (local hour key, messages) for the last RECENT_HOURS."""
+        if not self.hourly:
+            return []
+        newest = datetime.strptime(max(self.hourly), "%Y-%m-%dT%H")
+        keys = [
+            (newest - timedelta(hours=i)).strftime("%Y-%m-%dT%H")
+            for i in range(RECENT_HOURS - 1, -1, -1)
+        ]
+        return [
+            (key, self.hourly.get(key, {}).get("messages", 0)) for key in keys
+        ]
+
+
+def archive_segments(segments: list[Segment], archive_dir: str) -> list[str]:
+    """Gzips fully read rotated logs into archive_dir and removes them.
+
+    A file is skipped if rotation replaced it since it was listed.
+
+    Returns:
+        list[str]: The archives that were written.
+    """
+    written = []
+    for segment in segments:
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime(segment.mtime))
+        name = os.path.basename(segment.path).rsplit(".", 1)[0]
+        target = os.path.join(archive_dir, f"{name}.{stamp}.gz")
+        if os.path.exists(target):
+            target = os.path.join(
+                archive_dir, f"{name}.{stamp}-{segment.ino}.gz"
+            )
+        os.makedirs(archive_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=archive_dir, suffix=".tmp")
+        try:
+            with open(segment.path, "rb") as src:
+                if os.fstat(src.fileno()).st_ino != segment.ino:
+                    raise FileNotFoundError(segment.path)
+                with (
+                    os.fdopen(fd, "wb") as raw,
+                    gzip.GzipFile(
+                        os.path.basename(segment.path), "wb", fileobj=raw
+                    ) as dst,
+                ):
+                    shutil.copyfileobj(src, dst)
+            os.replace(tmp_path, target)
+        except OSError as e:
+            os.unlink(tmp_path)
+            logger.warning("Could not archive %s: %s", segment.path, e)
+            continue
+        try:
+            if os.stat(segment.path).st_ino == segment.ino:
+                os.unlink(segment.path)
+        except FileNotFoundError:
+            pass
+        written.append(target)
+    return written
+
+
+def _svg(width: int, height: int, title: str, body: list[str]) -> str:
+    """Wraps chart elements in an SVG document."""
+    return "\n".join(
+        [
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" '
+            f'height="{height}" viewBox="0 0 {width} {height}" '
+            'font-family="sans-serif" font-size="11">',
+            f'<rect width="{width}" height="{height}" fill="#ffffff"/>',
+            f'<text x="{width // 2}" y="18" text-anchor="middle" '
+            f'font-size="14">{escape(title)}</text>',
+            *body,
+            "</svg>",
+            "",
+        ]
+    )
+
+
+def column_chart(
+    title: str,
+    labels: list[str],
+    values: list[int],
+    label_every: int = 1,
+) -> str:
+    """Renders a vertical bar chart as SVG."""
+    width, height = 720, 260
+    left, right, top, bottom = 48, 12, 32, 36
+    plot_w, plot_h = width - left - right, height - top - bottom
+    peak = max(values, default=0) or 1
+    step = plot_w / max(len(values), 1)
+    body = [
+        f'<line x1="{left}" y1="{top + plot_h}" x2="{width - right}" '
+        f'y2="{top + plot_h}" stroke="#888888"/>',
+        f'<text x="{left - 6}" y="{top + 4}" text-anchor="end">{peak}</text>',
+        f'<text x="{left - 6}" y="{top + plot_h}" text-anchor="end">0</text>',
+    ]
+    for i, (label, value) in enumerate(zip(labels, values, strict=True)):
+        bar_h = value / peak * plot_h
+        x = left + i * step
+        body.append(
+            f'<rect x="{x + step * 0.1:.1f}" y="{top + plot_h - bar_h:.1f}" '
+            f'width="{step * 0.8:.1f}" height="{bar_h:.1f}" '
+            f'fill="{CHART_COLOR}"><title>{escape(label)}: {value}</title>'
+            "</rect>"
+        )
+        if i % label_every == 0:
+            body.append(
+                f'<text x="{x + step / 2:.1f}" y="{height - bottom + 16}" '
+                f'text-anchor="middle">{escape(label)}</text>'
+            )
+    return _svg(width, height, title, body)
+
+
+def bar_chart(title: str, items: list[tuple[str, int]]) -> str:
+    """Renders a horizontal bar chart (one row per item) as SVG."""
+    width, left, right, row = 720, 160, 60, 22
+    top = 32
+    height = top + row * max(len(items), 1) + 12
+    peak = max((value for _, value in items), default=0) or 1
+    plot_w = width - left - right
+    body = []
+    if not items:
+        body.append(
+            f'<text x="{width // 2}" y="{top + 14}" '
+            'text-anchor="middle">-</text>'
+        )
+    for i, (label, value) in enumerate(items):
+        y = top + i * row
+        bar_w = value / peak * plot_w
+        body.extend(
+            [
+                f'<text x="{left - 6}" y="{y + 15}" text-anchor="end">'
+                f"{escape(label)}</text>",
+                f'<rect x="{left}" y="{y + 4}" width="{bar_w:.1f}" '
+                f'height="{row - 8}" fill="{CHART_COLOR}"/>',
+                f'<text x="{left + bar_w + 4:.1f}" y="{y + 15}">'
+                f"{value}</text>",
+            ]
+        )
+    return _svg(width, height, title, body)
+
+
+def render_charts(
+    rollup: Rollup, charts_dir: str, days: int
+) -> dict[str, str]:
+    """Writes the SVG charts from the aggregates.
+
+    Returns:
+        dict[str, str]: Chart path by its README caption.
+    """
+    window = rollup.window(days)
+    hours = [0] * 24
+    types: Counter[str] = Counter()
+    commands: Counter[str] = Counter()
+    for key in window:
+        day = rollup.daily[key]
+        hours = [a + b for a, b in zip(hours, day["hours"], strict=True)]
+        types.update(day["types"])
+        commands.update(day["commands"])
+    recent = rollup.recent_hours()
+
+    charts = {
+        f"直近{RECENT_HOURS}時間のメッセージ数": (
+            "messages_recent.svg",
+            column_chart(
+                f"直近{RECENT_HOURS}時間のメッセージ数",
+                [key[-2:] for key, _ in recent],
+                [value for _, value in recent],
+                label_every=3,
+            ),
+        ),
+        "時間帯別のメッセージ数": (
+            "messages_by_hour.svg",
+            column_chart(
+                f"時間帯別のメッセージ数 (直近{days}日)",
+                [f"{hour}" for hour in range(24)],
+                hours,
+            ),
+        ),
+        "メッセージタイプ別の分布": (
+            "message_types.svg",
+            bar_chart(
+                f"メッセージタイプ別の分布 (直近{days}日)",
+                [
+                    (name.removeprefix("NOTIFICATION_"), count)
+                    for name, count in types.most_common(TOP_ITEMS)
+                ],
+            ),
+        ),
+        "コマンドの使用頻度": (
+            "commands.svg",
+            bar_chart(
+                f"コマンドの使用頻度 (直近{days}日)",
+                commands.most_common(TOP_ITEMS),
+            ),
+        ),
+    }
+    paths = {}
+    for caption, (name, svg) in charts.items():
+        path = os.path.join(charts_dir, name)
+        write_atomic(path, svg.encode())
+        paths[caption] = path
+    return paths
+
+
+def _local_time(rollup: Rollup, ts: str | None) -> str:
+    """Formats a record timestamp in the rollup's time zone."""
+    if not ts:
+        return "-"
+    return (
+        datetime.fromisoformat(ts)
+        .astimezone(rollup.tz)
+        .strftime("%Y-%m-%d %H:%M")
+    )
+
+
+def render_readme_section(
+    rollup: Rollup, charts: dict[str, str], readme_dir: str, days: int
+) -> str:
+    """Builds the Markdown placed between the README markers."""
+    if not rollup.daily:
+        return "まだ集計データがありません。"
+    window = rollup.window(days)
+    messages = sum(rollup.daily[key]["messages"] for key in window)
+    commands = sum(
+        sum(rollup.daily[key]["commands"].values()) for key in window
+    )
+    total = sum(day["messages"] for day in rollup.daily.values())
+    offset = rollup.state["utc_offset"]
+    lines = [
+        f"集計期間: {window[0]} 〜 {window[-1]} (UTC{offset:+d})",
+        "",
+        "| 項目 | 値 |",
+        "| --- | ---: |",
+        f"| メッセージ数 (直近{days}日) | {messages:,} |",
+        f"| コマンド数 (直近{days}日) | {commands:,} |",
+        f"| メッセージ数 (累計) | {total:,} |",
+        f"| 集計開始 | {_local_time(rollup, rollup.state['first_event'])} |",
+        f"| 最終受信 | {_local_time(rollup, rollup.state['last_message'])} |",
+        "",
+    ]
+    for caption, path in charts.items():
+        link = os.path.relpath(path, readme_dir).replace(os.sep, "/")
+        lines.append(f"![{caption}]({link})")
+    return "\n".join(lines)
+
+
+def update_readme(path: str, section: str) -> bool:
+    """Replaces the text between the README markers.
+
+    Returns:
+        bool: True if the README changed.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+    except FileNotFoundError:
+        logger.warning("README not found: %s", path)
+        return False
+    start = text.find(README_START)
+    end = text.find(README_END, start)
+    if start < 0 or end < 0:
+        logger.warning(
+            "README has no %s ... %s section: %s",
+            README_START,
+            README_END,
+            path,
+        )
+        return False
+    updated = (
+        text[: start + len(README_START)] + "\n" + section + "\n" + text[end:]
+    )
+    return write_atomic(path, updated.encode())
+
+
+def main() -> None:
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--log", default=LOG_FILE)
+    parser.add_argument("--stats-dir", default="logs/stats")
+    parser.add_argument("--archive-dir", default="logs/archive")
+    parser.add_argument("--charts-dir", default="docs/stats")
+    parser.add_argument("--readme", default="README.md")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--hourly-days", type=int, default=7)
+    parser.add_argument("--utc-offset", type=int, default=9)
+    parser.add_argument("--no-archive", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    started = time.perf_counter()
+    rollup = Rollup(args.stats_dir, args.utc_offset)
+    segments = list_segments(args.log)
+    read = 0
+    for segment, start in plan_reads(segments, rollup.state["cursor"]):
+        end = read_events(segment.path, start, rollup)
+        read += end - start
+        rollup.state["cursor"] = {
+            "dev": segment.dev,
+            "ino": segment.ino,
+            "offset": end,
+        }
+    rollup.prune(args.hourly_days)
+    rollup.save()
+    logger.info(
+        "Read %d bytes from %d file(s): %d events, %d malformed",
+        read,
+        len(segments),
+        rollup.events,
+        rollup.malformed,
+    )
+
+    # Everything but the newest file has now been read completely
+    if not args.no_archive and len(segments) > 1:
+        for path in archive_segments(segments[:-1], args.archive_dir):
+            logger.info("Archived %s", path)
+
+    charts = render_charts(rollup, args.charts_dir, args.days)
+    readme_dir = os.path.dirname(os.path.abspath(args.readme))
+    section = render_readme_section(rollup, charts, readme_dir, args.days)
+    if update_readme(args.readme, section):
+        logger.info("Updated %s", args.readme)
+    logger.info(
+        "Rollup finished in %.1fms", (time.perf_counter() - started) * 1000
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""HighWaterMarks と CatchUp のテスト."""
+
+import json
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from core import catchup
+from core.catchup import CatchUp, HighWaterMarks
+
+
+def read_marks(path: Path) -> dict[str, Any]:
+    """保存されたハイウォーターマークを読み込む."""
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def test_skipped_save_is_flushed_later(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """間隔内で見送った保存も、間隔が空いた時点でファイルに反映する."""
+    monkeypatch.setattr(catchup, "SAVE_INTERVAL", 0.2)
+    path = tmp_path / "marks.json"
+    marks = HighWaterMarks(str(path))
+    for message_no in (10, 11, 12):
+        marks.update("1", message_no)
+    assert read_marks(path)["1"]["message_no"] == 10
+
+    deadline = time.monotonic() + 5
+    while read_marks(path)["1"]["message_no"] != 12:
+        assert time.monotonic() < deadline, "deferred save never ran"
+        time.sleep(0.05)
+
+
+def test_client_is_created_on_first_use(tmp_path: Path) -> None:
+    """クライアントの作成 (ログイン) は初めて使うまで行わない."""
+    calls = []
+
+    class Client:
+        def get_all_chats(
+            self, domain_id: int, user_no: int
+        ) -> dict[str, Any]:
+            return {"result": []}
+
+    def connect() -> Client:
+        calls.append(1)
+        return Client()
+
+    class Works:
+        domain_id = 1
+        contact_no = 2
+
+    catch_up = CatchUp(
+        connect,
+        Works(),  # type: ignore[arg-type]
+        lambda works, payload: None,
+        HighWaterMarks(str(tmp_path / "marks.json")),
+    )
+    assert calls == []
+    assert catch_up.run() == 0
+    assert calls == [1]
@@ -0,0 +1,111 @@
+"""ChannelHistoryIterator のテスト."""
+
+import threading
+from typing import Any
+
+import pytest
+
+from core.history import (
+    DIRECTION_BACKWARD,
+    DIRECTION_FORWARD,
+    ChannelHistoryIterator,
+)
+
+
+class FakeChannelClient:
+    """messageNo の一覧から getChannelInfo を返すクライアント."""
+
+    def __init__(self, message_nos: list[int], cap: int | None = None) -> None:
+        """初期化.
+
+        Args:
+            message_nos: 存在するメッセージ番号
+            cap: 1回に返す件数の上限 (recent_message_count より優先)
+        """
+        self.message_nos = sorted(message_nos)
+        self.cap = cap
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get_channel_info(
+        self,
+        channel_no: str,
+        message_no: str,
+        direction: int = DIRECTION_BACKWARD,
+        recent_message_count: int = 50,
+    ) -> dict[str, Any]:
+        """起点から走査方向に最大件数のメッセージを返す."""
+        with self._lock:
+            self.calls += 1
+        anchor = int(message_no)
+        count = min(recent_message_count, self.cap or recent_message_count)
+        if direction == DIRECTION_BACKWARD:
+            found = [n for n in self.message_nos if n <= anchor][-count:]
+        else:
+            found = [n for n in self.message_nos if n >= anchor][:count]
+        return {"messageList": [{"messageNo": n} for n in found]}
+
+
+def scan(client: FakeChannelClient, **kwargs: Any) -> list[int]:
+    """走査したメッセージ番号を返す."""
+    iterator = ChannelHistoryIterator(client, "1", **kwargs)
+    return [int(m["messageNo"]) for m in iterator]
+
+
+@pytest.mark.parametrize("cap", [None, 30, 7, 1])
+def test_backward_returns_every_message(cap: int | None) -> None:
+    """上限の有無に関わらず過去方向にすべてのメッセージを返す."""
+    client = FakeChannelClient(list(range(1, 501)), cap=cap)
+    result = scan(client, start_message_no=500, page_size=50)
+    assert result == list(range(500, 0, -1))
+
+
+@pytest.mark.parametrize("cap", [None, 30, 7, 1])
+def test_forward_returns_every_message(cap: int | None) -> None:
+    """上限の有無に関わらず未来方向にすべてのメッセージを返す."""
+    client = FakeChannelClient(list(range(1, 501)), cap=cap)
+    result = scan(
+        client,
+        start_message_no=1,
+        direction=DIRECTION_FORWARD,
+        page_size=50,
+    )
+    assert result == list(range(1, 501))
+
+
+def test_capped_pages_keep_prefetch_aligned() -> None:
+    """間隔を上限に合わせた後は先読みを捨て続けない."""
+    client = FakeChannelClient(list(range(1, 501)), cap=30)
+    iterator = ChannelHistoryIterator(
+        client, "1", start_message_no=500, page_size=50, prefetch=4
+    )
+    assert len(list(iterator)) == 500
+    # 最初の先読み (4件) 以外は 30件ずつの取得で足りる
+    assert iterator.requests <= 4 + 500 // 30 + 2
+
+
+@pytest.mark.parametrize("cap", [None, 30])
+def test_gaps_are_skipped(cap: int | None) -> None:
+    """欠番があっても重複や抜けなく返す."""
+    message_nos = [n for n in range(1, 501) if n % 7 and not 200 < n < 320]
+    client = FakeChannelClient(message_nos, cap=cap)
+    backward = scan(client, start_message_no=500, page_size=50)
+    forward = scan(
+        client,
+        start_message_no=1,
+        direction=DIRECTION_FORWARD,
+        page_size=50,
+    )
+    assert backward == sorted(message_nos, reverse=True)
+    assert forward == message_nos
+
+
+def test_stop_and_limit() -> None:
+    """終了番号と件数の上限で走査を終える."""
+    client = FakeChannelClient(list(range(1, 501)), cap=30)
+    assert scan(
+        client, start_message_no=400, stop_message_no=321, page_size=50
+    ) == list(range(400, 320, -1))
+    assert scan(client, start_message_no=400, limit=75, page_size=50) == list(
+        range(400, 325, -1)
+    )
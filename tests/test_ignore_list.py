@@ -0,0 +1,90 @@
+"""IgnoreList の再読み込みのテスト."""
+
+import itertools
+import logging
+import os
+from pathlib import Path
+
+import pytest
+
+from core.ignore_list import IgnoreList
+
+# 書き込みごとに進める更新時刻 (ナノ秒). 時刻の分解能に左右されないよう
+# 明示的に設定する
+_mtimes = itertools.count(1_000_000_000_000_000_000, 1_000_000_000)
+
+
+def write(path: Path, text: str, mode: str = "w") -> None:
+    """ファイルに書き込み、更新時刻を進める."""
+    with open(path, mode, encoding="utf-8") as f:
+        f.write(text)
+    mtime = next(_mtimes)
+    os.utime(path, ns=(mtime, mtime))
+
+
+def ignored(ignore_list: IgnoreList, *user_nos: str) -> list[bool]:
+    """ファイルを読み直してから各ユーザーを判定する."""
+    ignore_list.reload()
+    return [ignore_list.is_ignored(user_no) for user_no in user_nos]
+
+
+@pytest.fixture
+def path(tmp_path: Path) -> Path:
+    """無視リストのファイル."""
+    return tmp_path / "ignore.txt"
+
+
+def test_append_reads_only_new_lines(
+    path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    """追記は追記された行のみを読み込む."""
+    write(path, "1\n100-200\n")
+    ignore_list = IgnoreList(str(path), check_interval=3600)
+    write(path, "3\nchannel:9\n", mode="a")
+    with caplog.at_level(logging.INFO, logger="core.ignore_list"):
+        assert ignored(ignore_list, "1", "150", "3") == [True, True, True]
+    assert ignore_list.is_ignored("4", channel_no="9")
+    assert "Loaded 2 appended ignore entries" in caplog.text
+
+
+def test_rewrite_drops_removed_lines(path: Path) -> None:
+    """書き換えられた場合は全体を読み直し、消えた行を除く."""
+    write(path, "1\n2\n")
+    ignore_list = IgnoreList(str(path), check_interval=3600)
+    write(path, "5\n")
+    assert ignored(ignore_list, "1", "2", "5") == [False, False, True]
+
+
+def test_partial_line_is_replaced_when_completed(path: Path) -> None:
+    """書き込み途中の行は、行が完成したときに完成した値に置き換わる."""
+    write(path, "1\n77")
+    ignore_list = IgnoreList(str(path), check_interval=3600)
+    assert ignored(ignore_list, "1", "77") == [True, True]
+
+    write(path, "7\n", mode="a")
+    assert ignored(ignore_list, "1", "77", "777") == [True, False, True]
+
+    # 行が完成した後は再び追記として読み込む
+    write(path, "8\n", mode="a")
+    assert ignored(ignore_list, "777", "8") == [True, True]
+
+
+def test_partial_range_is_replaced_when_completed(path: Path) -> None:
+    """書き込み途中の範囲も完成した範囲に置き換わる."""
+    write(path, "10-2")
+    ignore_list = IgnoreList(str(path), check_interval=3600)
+    assert ignored(ignore_list, "5", "15") == [True, False]
+
+    write(path, "0\n", mode="a")
+    assert ignored(ignore_list, "5", "15") == [False, True]
+
+
+def test_restored_partial_state_is_read_again(path: Path) -> None:
+    """途中の行を含む状態を復元した場合も、追記時に全体を読み直す."""
+    write(path, "1\n77")
+    state = IgnoreList(str(path), check_interval=3600).export_state()
+    assert state is not None
+
+    ignore_list = IgnoreList(str(path), check_interval=3600, state=state)
+    write(path, "7\n", mode="a")
+    assert ignored(ignore_list, "1", "77", "777") == [True, False, True]
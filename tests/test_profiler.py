@@ -0,0 +1,91 @@
+"""Profiler のテスト."""
+
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from core.profiler import Profiler, ProfileReport
+
+
+def busy_loop(running: list[bool]) -> int:
+    """止められるまで計算を続ける."""
+    total = 0
+    while running[0]:
+        total += 1
+    return total
+
+
+def test_idle_executor_workers_are_not_counted(tmp_path: Path) -> None:
+    """待機中の ThreadPoolExecutor のワーカーより実処理を上位に出す."""
+    running = [True]
+    with ThreadPoolExecutor(max_workers=4) as idle:
+        # ワーカーを起動して作業キューで待機させる
+        for future in [idle.submit(int) for _ in range(4)]:
+            future.result()
+        busy = threading.Thread(target=busy_loop, args=(running,))
+        busy.start()
+        try:
+            profiler = Profiler(interval=0.005, profile_dir=str(tmp_path))
+            assert profiler.start(duration=10)
+            threading.Event().wait(0.5)
+            report = profiler.stop()
+        finally:
+            running[0] = False
+            busy.join()
+
+    assert report is not None
+    assert report.samples > 0
+    (top, _), *_ = report.self_counts.most_common(1)
+    assert top[2] == "busy_loop"
+    assert all(name != "_worker" for _, _, name in report.self_counts)
+
+
+def test_memory_tracing_is_opt_in(tmp_path: Path) -> None:
+    """メモリの割り当ては指定した場合のみ計測する."""
+    profiler = Profiler(interval=0.005, profile_dir=str(tmp_path))
+    assert profiler.start(duration=10)
+    assert not tracemalloc.is_tracing()
+    assert profiler.stop() is not None
+
+    assert profiler.start(duration=10, memory=True)
+    assert tracemalloc.is_tracing()
+    assert profiler.stop() is not None
+    assert not tracemalloc.is_tracing()
+
+
+def test_stop_while_expiring_reports_once(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """期間の満了と同時に止めても結果は1回だけ通知する."""
+    profiler = Profiler(interval=0.005, profile_dir=str(tmp_path))
+    finishing = threading.Event()
+    release = threading.Event()
+    finish = profiler._finish
+
+    def slow_finish(report: ProfileReport, expired: bool) -> None:
+        finishing.set()
+        release.wait(5)
+        finish(report, expired)
+
+    monkeypatch.setattr(profiler, "_finish", slow_finish)
+    delivered: list[ProfileReport] = []
+    assert profiler.start(duration=0.05, on_complete=delivered.append)
+    assert finishing.wait(5)
+
+    stopper = threading.Thread(
+        target=lambda: delivered.extend(filter(None, [profiler.stop()]))
+    )
+    stopper.start()
+    stopper.join(0.5)
+    release.set()
+    stopper.join()
+
+    deadline = time.monotonic() + 5
+    while profiler.running:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert len(delivered) == 1
@@ -0,0 +1,71 @@
+"""AdmissionController のテスト."""
+
+import threading
+import time
+from collections.abc import Iterator
+
+import pytest
+
+from core import scheduler
+from core.scheduler import Admission, AdmissionController
+
+
+@pytest.fixture
+def controller() -> Iterator[AdmissionController]:
+    """1チャンネル1件のみ受け付ける受付制御."""
+    controller = AdmissionController(
+        workers=1,
+        channel_max_inflight=1,
+        channel_max_queue=0,
+        user_rate_per_minute=0.001,
+        user_burst=1,
+    )
+    yield controller
+    controller.stop()
+
+
+def test_busy_channel_does_not_use_user_token(
+    controller: AdmissionController,
+) -> None:
+    """チャンネルの混雑で断ったコマンドはユーザーのトークンを消費しない."""
+    release = threading.Event()
+    assert (
+        controller.submit("busy", "owner", "!a", lambda: release.wait(5))
+        == Admission.ACCEPTED
+    )
+    try:
+        for _ in range(3):
+            assert (
+                controller.submit("busy", "user", "!a", lambda: None)
+                == Admission.CHANNEL_BUSY
+            )
+        assert (
+            controller.submit("free", "user", "!a", lambda: None)
+            == Admission.ACCEPTED
+        )
+        assert (
+            controller.submit("other", "user", "!a", lambda: None)
+            == Admission.RATE_LIMITED
+        )
+    finally:
+        release.set()
+
+
+def test_refilled_buckets_are_evicted(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """満タンまで回復したユーザーのバケットは破棄する."""
+    monkeypatch.setattr(scheduler, "USER_SWEEP_INTERVAL", 0.0)
+    controller = AdmissionController(
+        workers=1, user_rate_per_minute=60_000, user_burst=1
+    )
+    try:
+        for user in range(100):
+            controller.submit(str(user), str(user), "!a", lambda: None)
+        time.sleep(0.05)
+        assert controller.submit("x", "new", "!a", lambda: None) == (
+            Admission.ACCEPTED
+        )
+        assert list(controller._users) == ["new"]
+    finally:
+        controller.stop()